@@ -211,6 +211,88 @@ export interface DocumentUploadResponse {
   doc_id: string;
   document_id: string;  // MongoDB ObjectId as string
   message: string;
+  verification_job_id?: string | null;  // Set when the server verifies uploads automatically
+}
+
+interface DirectUploadInitResponse {
+  upload_url: string;
+  method: string;
+  headers: Record<string, string>;
+  expires_in: number;
+  file_path: string;
+}
+
+// Cleared once the server answers 501 (direct uploads disabled) or a PUT to
+// storage fails (e.g. the bucket has no CORS rule for this origin)
+let directUploadsEnabled = true;
+
+async function sha256Hex(file: File): Promise<string | undefined> {
+  if (!globalThis.crypto?.subtle) return undefined;  // Only in secure contexts
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+/**
+ * Upload a file straight to storage with a presigned URL, then record it.
+ * Returns null if the server does not support direct uploads or the PUT to
+ * storage fails, so the caller falls back to /upload.
+ */
+async function uploadDocumentDirect(
+  sessionId: string,
+  docId: string,
+  file: File
+): Promise<DocumentUploadResponse | null> {
+  const initResponse = await fetch(`${API_BASE_URL}/upload/init`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      session_id: sessionId,
+      doc_id: docId,
+      filename: file.name,
+      file_size: file.size,
+      content_type: file.type || undefined,
+      content_sha256: await sha256Hex(file),
+    }),
+  });
+
+  if (initResponse.status === 501) {
+    directUploadsEnabled = false;
+    return null;
+  }
+  if (!initResponse.ok) {
+    const errorData = await initResponse.json().catch(() => ({ detail: initResponse.statusText }));
+    throw new Error(errorData.detail || `Failed to upload document: ${initResponse.statusText}`);
+  }
+  const upload: DirectUploadInitResponse = await initResponse.json();
+
+  // Content-Length is set by the browser from the body
+  const headers = Object.fromEntries(
+    Object.entries(upload.headers).filter(([name]) => name.toLowerCase() !== 'content-length')
+  );
+  let putResponse: Response;
+  try {
+    putResponse = await fetch(upload.upload_url, { method: upload.method, headers, body: file });
+  } catch (error) {
+    // Network / CORS failure: storage is not reachable from the browser
+    console.warn('Direct upload failed, using /upload instead:', error);
+    directUploadsEnabled = false;
+    return null;
+  }
+  if (!putResponse.ok) {
+    console.warn(`Direct upload failed (${putResponse.status}), using /upload instead`);
+    return null;
+  }
+
+  const completeResponse = await fetch(`${API_BASE_URL}/upload/complete`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ session_id: sessionId, doc_id: docId, filename: file.name }),
+  });
+  if (!completeResponse.ok) {
+    const errorData = await completeResponse.json().catch(() => ({ detail: completeResponse.statusText }));
+    throw new Error(errorData.detail || `Failed to upload document: ${completeResponse.statusText}`);
+  }
+  return await completeResponse.json();
 }
 
 export async function uploadDocument(
@@ -219,6 +301,11 @@ export async function uploadDocument(
   file: File
 ): Promise<DocumentUploadResponse> {
   try {
+    if (directUploadsEnabled) {
+      const result = await uploadDocumentDirect(sessionId, docId, file);
+      if (result) return result;
+    }
+
     const formData = new FormData();
     formData.append('session_id', sessionId);
     formData.append('doc_id', docId);
@@ -282,6 +369,54 @@ export async function getSessionDocuments(sessionId: string): Promise<DocumentsR
   }
 }
 
+/**
+ * Verification jobs
+ * The verify endpoints queue a job and answer 202 with its id; poll the job until it finishes
+ */
+export interface VerificationJobResponse<T> {
+  job_id: string;
+  kind: 'session' | 'document';
+  session_id: string;
+  document_id?: string | null;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  attempts: number;
+  result?: T | null;
+  error?: string | null;
+}
+
+const JOB_POLL_INTERVAL_MS = 1000;
+const JOB_POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
+export async function getJob<T>(jobId: string): Promise<VerificationJobResponse<T>> {
+  const response = await fetch(`${API_BASE_URL}/jobs/${jobId}`, {
+    method: 'GET',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+  });
+
+  if (!response.ok) {
+    throw new Error(`Failed to get job status: ${response.statusText}`);
+  }
+
+  return await response.json();
+}
+
+async function waitForJobResult<T>(jobId: string): Promise<T> {
+  const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    const job = await getJob<T>(jobId);
+    if (job.status === 'succeeded' && job.result) {
+      return job.result;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Verification failed');
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+  throw new Error('Verification is taking too long');
+}
+
 /**
  * Verify all documents for a session
  */
@@ -318,7 +453,8 @@ export async function verifySessionDocuments(sessionId: string): Promise<Documen
       throw new Error(`Failed to verify documents: ${response.statusText}`);
     }
 
-    return await response.json();
+    const { job_id } = await response.json();
+    return await waitForJobResult<DocumentVerificationResponse>(job_id);
   } catch (error) {
     console.error('Error verifying documents:', error);
     throw error;
@@ -352,7 +488,8 @@ export async function verifyDocument(documentId: string): Promise<SingleDocument
       throw new Error(`Failed to verify document: ${response.statusText}`);
     }
 
-    return await response.json();
+    const { job_id } = await response.json();
+    return await waitForJobResult<SingleDocumentVerificationResponse>(job_id);
   } catch (error) {
     console.error('Error verifying document:', error);
     throw error;
@@ -63,11 +63,11 @@ const ChatScreen = (props: ScreenProps) => {
     input.onchange = (e) => {
       const file = (e.target as HTMLInputElement).files?.[0];
       if (file) {
-        // Validate file size (1MB = 1048576 bytes)
-        const MAX_FILE_SIZE = 1048576;
+        // Validate file size (10MB, the server's default MAX_UPLOAD_BYTES)
+        const MAX_FILE_SIZE = 10 * 1024 * 1024;
         if (file.size > MAX_FILE_SIZE) {
           alert(
-            `File size exceeds 1MB limit. Current size: ${(
+            `File size exceeds 10MB limit. Current size: ${(
               file.size /
               1024 /
               1024
@@ -4,33 +4,69 @@ FastAPI Application for Vittam - Tata Capital Personal Loan AI Assistant
 This module provides REST API endpoints for the multi-agent loan sales system.
 """
 
-import re
+import os
+import json
 import uuid
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from anyio import to_thread
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from dotenv import load_dotenv
 
-from langchain.agents import create_agent
-from langchain.messages import HumanMessage, AIMessage
+from langchain.messages import AIMessage
+from langchain_core.messages import BaseMessage
 from langchain_openai import ChatOpenAI
 
-from main import (
-    master_agent_tools,
-    get_master_agent_prompt,
-    sync_session_to_db,
-    model,
+from main import master_agent
+from session_service import create_session, get_session
+from conversation_service import get_conversations
+from history_service import update_history_summary
+from document_service import (
+    DIRECT_UPLOADS_ENABLED,
+    MAX_UPLOAD_BYTES,
+    UploadTooLarge,
+    complete_direct_upload,
+    create_document,
+    get_documents_by_session,
+    prepare_direct_upload,
 )
-from session_service import create_session, get_session, update_session
-from conversation_service import create_conversation, get_conversations
-from document_service import create_document, get_documents_by_session
-from document_verification_service import verify_document, verify_session_documents
-from models import SessionMetadata
-from database import sanctions_collection
+from session_context import SessionContext, get_session_context, set_session_context
+from turn_service import ChatTurn
+from fast_path import try_fast_path
+import response_cache
+from response_cache import CacheLookup
+from customer_cache import get_customer_cache_stats
+import offer_index
+from services import get_offer_grid, invalidate_customer_profile
+from notification_outbox import (
+    NOTIFICATION_DISPATCHER_ENABLED,
+    dispatcher as notification_dispatcher,
+    get_notification,
+    get_sanction_notifications,
+)
+from verification_cache import get_verification_cache_stats
+from verification_jobs import (
+    AUTO_VERIFY_ON_UPLOAD,
+    VERIFICATION_PUSH_TO_CHAT_STREAM,
+    VERIFICATION_WORKERS_ENABLED,
+    enqueue_document_verification,
+    enqueue_session_verification,
+    get_job,
+    take_undelivered_results,
+    worker as verification_worker,
+)
+from document_detection import ALLOWED_DOCUMENT_TYPES, detect_document_requests
 
 load_dotenv()
 
@@ -41,6 +77,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Size of the bounded thread pool used for blocking work (pymongo, S3, PDF
+# rendering) so that the event loop stays free while LLM calls are in flight.
+BLOCKING_IO_THREADS = int(os.getenv("BLOCKING_IO_THREADS", "64"))
+
 
 # ==================== SESSION MANAGEMENT ====================
 
@@ -67,227 +107,17 @@ def get_or_create_session(session_id: str) -> Dict[str, Any]:
     return session_state
 
 
-def get_conversation_history_from_db(session_id: str) -> List:
-    """
-    Get conversation history from database and convert to LangChain messages.
-    Returns list of HumanMessage and AIMessage objects.
-    """
-    conversations = get_conversations(session_id)
-    messages = []
-
-    for conv in conversations:
-        msg_data = conv.get("message", {})
-        role = msg_data.get("role", "")
-        content = msg_data.get("content", "")
-
-        if role == "user":
-            messages.append(HumanMessage(content=content))
-        elif role == "assistant":
-            messages.append(AIMessage(content=content))
-
-    return messages
-
-
-def sync_session_state_to_db(session_id: str, session_state: Dict[str, Any]):
-    """Sync session state to database."""
-    metadata: SessionMetadata = {
-        "customer_id": session_state.get("customer_id"),
-        "loan_amount": session_state.get("loan_amount"),
-        "tenure_months": session_state.get("tenure_months"),
-        "conversation_stage": session_state.get("conversation_stage"),
-        "customer_data": session_state.get("customer_data"),
-    }
-    update_session(
-        session_id,
-        metadata=metadata,
-        conversation_stage=session_state.get("conversation_stage"),
-    )
-
-
 # ==================== DOCUMENT INPUT DETECTION ====================
 
-# DOCUMENT TYPES - These are the ONLY document types allowed
-ALLOWED_DOCUMENT_TYPES = {
-    "identity_proof": {
-        "name": "Identity Proof",
-        "description": "Aadhaar Card / Voter ID / Passport / Driving License",
-        "mandatory": True,  # Always required
-        "key": "identity_proof",
-        "patterns": [
-            r"identity\s*proof",
-            r"id\s*proof",
-            r"photo\s*id",
-            r"aadhaar",
-            r"aadhar",
-            r"voter\s*id",
-            r"passport",
-            r"driving\s*licen[sc]e",
-        ],
-    },
-    "address_proof": {
-        "name": "Address Proof",
-        "description": "Aadhaar Card / Voter ID / Passport / Driving License",
-        "mandatory": True,  # Always required
-        "key": "address_proof",
-        "patterns": [
-            r"address\s*proof",
-        ],
-    },
-    "bank_statement": {
-        "name": "Bank Statement",
-        "description": "Primary bank statement (salary account) for last 3 months",
-        "mandatory": True,  # Always required
-        "key": "bank_statement",  # Standardized key for AI to use
-        "patterns": [
-            r"bank\s*statement",
-            r"salary\s*account\s*statement",
-        ],
-    },
-    "salary_slip": {
-        "name": "Salary Slips",
-        "description": "Salary slips for last 2 months",
-        "mandatory": False,  # Sometimes required (only for conditional approvals)
-        "key": "salary_slip",  # Standardized key for AI to use
-        "patterns": [
-            r"salary\s*slip",
-            r"pay\s*slip",
-            r"salary\s*certificate",
-        ],
-    },
-    "employment_certificate": {
-        "name": "Employment Certificate",
-        "description": "Certificate confirming at least 1 year of continuous employment",
-        "mandatory": False,  # Sometimes required (only for conditional approvals)
-        "key": "employment_certificate",  # Standardized key for AI to use
-        "patterns": [
-            r"employment\s*certificate",
-            r"employment\s*proof",
-            r"job\s*certificate",
-        ],
-    },
-}
-
-# Document keys list for AI prompts (standardized format)
-DOCUMENT_TYPE_KEYS = {
-    "identity_proof": "identity_proof",
-    "address_proof": "address_proof",
-    "bank_statement": "bank_statement",
-    "salary_slip": "salary_slip",
-    "employment_certificate": "employment_certificate",
-}
-
-# Legacy DOCUMENT_PATTERNS for backward compatibility (uses ALLOWED_DOCUMENT_TYPES)
-DOCUMENT_PATTERNS = {
-    doc_id: {
-        "name": doc_info["name"],
-        "description": doc_info["description"],
-        "patterns": doc_info["patterns"],
-    }
-    for doc_id, doc_info in ALLOWED_DOCUMENT_TYPES.items()
-}
-
-# Patterns that indicate document upload request context
-UPLOAD_CONTEXT_PATTERNS = [
-    r"upload",
-    r"share",
-    r"provide",
-    r"submit",
-    r"send\s*(me|us)?",
-    r"attach",
-    r"need.*document",
-    r"require.*document",
-    r"please.*document",
-]
-
-
-def detect_document_requests(response: str) -> List[Dict[str, str]]:
-    """
-    Detect if the agent is asking for document uploads.
-    Returns list of input specifications for documents needed.
-
-    IMPORTANT: Only detects documents from ALLOWED_DOCUMENT_TYPES.
-    The AI must ONLY request these specific document types:
-    - identity_proof (always mandatory)
-    - address_proof (always mandatory)
-    - bank_statement (always mandatory)
-    - salary_slip (sometimes required)
-    - employment_certificate (sometimes required)
-
-    Note: PAN is NOT included as agent asks for PAN number directly (not upload)
-    """
-    inputs = []
-    response_lower = response.lower()
-
-    # Check if response contains upload context
-    has_upload_context = any(
-        re.search(pattern, response_lower) for pattern in UPLOAD_CONTEXT_PATTERNS
-    )
-
-    if not has_upload_context:
-        return inputs
-
-    # First, check for exact key matches (AI using standardized keys like "identity_proof")
-    detected_docs = set()
-    for doc_id, doc_info in ALLOWED_DOCUMENT_TYPES.items():
-        # Check for exact key match (e.g., "identity_proof", "bank_statement")
-        # Use word boundaries to match exact keys
-        key_pattern = r"\b" + re.escape(doc_id) + r"\b"
-        if re.search(key_pattern, response_lower):
-            if doc_id not in detected_docs:
-                detected_docs.add(doc_id)
-                inputs.append(
-                    {
-                        "name": doc_info["name"],
-                        "description": doc_info["description"],
-                        "doc_id": doc_id,  # Always include doc_id
-                    }
-                )
-                continue  # Skip pattern matching if key found
-
-    # Then check for pattern matches (fallback for natural language)
-    for doc_id, doc_info in ALLOWED_DOCUMENT_TYPES.items():
-        if doc_id in detected_docs:
-            continue  # Already detected via key match
-
-        for pattern in doc_info["patterns"]:
-            if re.search(pattern, response_lower):
-                if doc_id not in detected_docs:
-                    detected_docs.add(doc_id)
-                    inputs.append(
-                        {
-                            "name": doc_info["name"],
-                            "description": doc_info["description"],
-                            "doc_id": doc_id,  # Always include doc_id
-                        }
-                    )
-                break
-
-    return inputs
-
-
-def get_doc_id_from_name(doc_name: str) -> Optional[str]:
-    """
-    Map document display name to doc_id.
-    Returns None if not found.
-    """
-    for doc_key, doc_info in DOCUMENT_PATTERNS.items():
-        if doc_info["name"] == doc_name:
-            return doc_key
-    return None
-
-
-def get_verified_document_status(session_id: str) -> Dict[str, bool]:
-    """
-    Get verification status for all document types for a session.
+def build_verified_document_status(documents: List[Dict[str, Any]]) -> Dict[str, bool]:
+    """
+    Get verification status for all document types from a session's documents.
 
     Returns:
         Dict mapping doc_id to verification status (True if verified, False otherwise)
         Example: {"identity_proof": True, "address_proof": True, "bank_statement": False}
     """
     try:
-        # Get all documents for session
-        documents = get_documents_by_session(session_id)
-
         # Create status map
         status_map = {}
         for doc in documents:
@@ -356,6 +186,38 @@ class DocumentUploadResponse(BaseModel):
     doc_id: str
     document_id: str  # ObjectId as string
     message: str
+    verification_job_id: Optional[str] = None  # Set when AUTO_VERIFY_ON_UPLOAD queued a job
+
+
+class DirectUploadInitRequest(BaseModel):
+    """Request model for starting a direct-to-S3 upload."""
+
+    session_id: str
+    doc_id: str
+    filename: str
+    file_size: int
+    content_type: Optional[str] = None
+    # Hex SHA-256 of the file; S3 then rejects any other content
+    content_sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class DirectUploadInitResponse(BaseModel):
+    """Response model for a direct-upload URL (PUT the file there with these headers)."""
+
+    upload_url: str
+    method: str
+    headers: Dict[str, str]
+    expires_in: int
+    file_path: str
+
+
+class DirectUploadCompleteRequest(BaseModel):
+    """Request model for recording a finished direct upload."""
+
+    session_id: str
+    doc_id: str
+    filename: str  # Same filename as in /upload/init
+    verify: Optional[bool] = None  # Queue verification (default: AUTO_VERIFY_ON_UPLOAD)
 
 
 class DocumentsResponse(BaseModel):
@@ -381,15 +243,411 @@ class DocumentVerificationResponse(BaseModel):
     rejected_count: Optional[int] = None
 
 
+# ==================== CHAT TURN HELPERS ====================
+
+
+async def prepare_chat_turn(session_id: str, message: str) -> Tuple[ChatTurn, List[BaseMessage]]:
+    """
+    Load the turn's data, stage the user message and bind the session context.
+
+    Returns:
+        (turn, conversation history to send to the master agent)
+    """
+    logger.info(
+        f"[API] Chat request - Session: {session_id}, Message: {message[:100]}..."
+    )
+
+    # Session, unsummarized history, documents and latest sanction in one read;
+    # the user message is staged and written with the reply in flush()
+    turn = ChatTurn(session_id, message)
+    await run_in_threadpool(turn.load)
+    session_state = turn.session_state()
+
+    # Get bounded conversation context: rolling summary + recent turns
+    history_summary, conversation_history = turn.agent_history()
+    # Worker agents take their recent turns from the session state
+    session_state["conversation_history"] = conversation_history
+
+    # Get verified document status BEFORE invoking the agent
+    verified_documents = build_verified_document_status(turn.documents)
+
+    # Bind session state to this request so the prompt and tools only see
+    # this customer, even with other conversations in flight. The compiled
+    # master agent renders its prompt from this context on every model call.
+    set_session_context(
+        SessionContext(
+            session_id=session_id,
+            state=session_state,
+            verified_documents=verified_documents,
+            history_summary=history_summary,
+            turn=turn,
+        )
+    )
+
+    logger.info(
+        f"[API] Invoking master agent - History length: {len(conversation_history)}"
+    )
+    return turn, conversation_history
+
+
+def extract_response_text(result: Any) -> str:
+    """Extract the final assistant reply from a master agent result."""
+    response_text = None
+    if isinstance(result, dict) and "messages" in result:
+        for msg in reversed(result["messages"]):
+            if isinstance(msg, AIMessage) or (
+                hasattr(msg, "content")
+                and hasattr(msg, "type")
+                and msg.type == "ai"
+            ):
+                if hasattr(msg, "content") and msg.content:
+                    response_text = msg.content
+                    break
+
+        if not response_text:
+            for msg in reversed(result["messages"]):
+                if hasattr(msg, "content") and msg.content:
+                    response_text = msg.content
+                    break
+
+    elif isinstance(result, list):
+        for msg in reversed(result):
+            if isinstance(msg, AIMessage) or (
+                hasattr(msg, "content")
+                and hasattr(msg, "type")
+                and getattr(msg, "type", None) == "ai"
+            ):
+                if hasattr(msg, "content") and msg.content:
+                    response_text = msg.content
+                    break
+
+        if not response_text and result:
+            last_msg = result[-1]
+            if hasattr(last_msg, "content"):
+                response_text = last_msg.content
+            else:
+                response_text = str(last_msg)
+
+    if not response_text:
+        response_text = str(result)
+
+    return response_text
+
+
+async def finalize_chat_turn(turn: ChatTurn, response_text: str) -> ChatResponse:
+    """
+    Persist the assistant reply and session state, then build the ChatResponse
+    (document upload inputs and sanction_id) for the turn.
+    """
+    session_id = turn.session_id
+    session_state = get_session_context().state
+
+    # Write both messages and the session state (including tool updates)
+    turn.add_message("assistant", response_text, "master")
+    await run_in_threadpool(turn.flush, session_state)
+
+    # Detect if agent is asking for document uploads
+    detected_inputs = detect_document_requests(response_text)
+
+    # Filter out documents that are already uploaded and verified
+    if detected_inputs:
+        # Get all existing documents for this session
+        existing_documents = await run_in_threadpool(turn.get_documents)
+
+        # Create a map of doc_id -> verification_status
+        existing_docs_map = {}
+        for doc in existing_documents:
+            doc_id = doc.get("doc_id")
+            if doc_id:
+                status = doc.get("verification_status", "pending")
+                existing_docs_map[doc_id] = status
+
+        # Filter inputs: only include documents that are missing or not verified
+        filtered_inputs = []
+        for inp in detected_inputs:
+            doc_id = inp.get("doc_id")
+            if doc_id:
+                # Check if document exists and is verified
+                if doc_id in existing_docs_map:
+                    if existing_docs_map[doc_id] == "verified":
+                        # Document is already verified, skip it
+                        logger.info(f"[API] Skipping {doc_id} - already verified")
+                        continue
+                    else:
+                        # Document exists but not verified, ask for reupload
+                        logger.info(
+                            f"[API] Including {doc_id} - exists but not verified (status: {existing_docs_map[doc_id]})"
+                        )
+                # Document doesn't exist or needs reupload
+                filtered_inputs.append(inp)
+            else:
+                # No doc_id, include it (shouldn't happen but be safe)
+                filtered_inputs.append(inp)
+
+        inputs = filtered_inputs
+    else:
+        inputs = []
+
+    logger.info(
+        f"[API] Response generated - Length: {len(response_text)}, Detected inputs: {len(detected_inputs)}, Filtered inputs: {len(inputs)}"
+    )
+
+    sub_agent_usage = get_session_context().sub_agent_usage
+    if sub_agent_usage:
+        logger.info(
+            f"[API] Worker agent calls: {len(sub_agent_usage)}, "
+            f"Tokens: {sum(usage['total_tokens'] for usage in sub_agent_usage)}"
+        )
+
+    # Check if a sanction was created in this session
+    # Only return sanction_id if conversation_stage is "sanction" (indicates sanction was just created)
+    sanction_id = None
+    if session_state.get("conversation_stage") == "sanction":
+        # Sanction created this turn, else the most recent one loaded with the turn
+        sanction_id = turn.sanction_id
+        if sanction_id:
+            logger.info(f"[API] Detected sanction creation: {sanction_id}")
+
+    return ChatResponse(
+        message=response_text,
+        inputs=[InputSpec(**inp) for inp in inputs],
+        session_id=session_id,
+        sanction_id=sanction_id,
+    )
+
+
+async def flush_failed_chat_turn(turn: Optional[ChatTurn]) -> None:
+    """Persist the user message and any tool updates of a turn that failed."""
+    if not turn:
+        return
+    try:
+        await run_in_threadpool(turn.flush, get_session_context().state)
+    except Exception as e:
+        logger.error(f"[API] Error saving failed chat turn: {str(e)}")
+
+
+async def answer_without_master_agent(message: str) -> Tuple[Optional[str], Optional[CacheLookup]]:
+    """
+    Answer from the fast path or the response cache when possible.
+
+    Returns:
+        (reply or None, cache lookup to store the master agent's reply into)
+    """
+    # Obvious intents (bare PAN, phone, OTP, "yes") skip the master agent
+    reply = await try_fast_path(message)
+    if reply is not None:
+        return reply, None
+
+    # FAQ product questions answered before at this stage (shared only before identification)
+    session_state = get_session_context().state
+    stage = session_state.get("conversation_stage") or "initial"
+    cache_lookup = await response_cache.lookup(message, stage, session_state)
+    return cache_lookup.response, cache_lookup
+
+
+async def cache_master_agent_reply(cache_lookup: Optional[CacheLookup], response_text: str) -> None:
+    """Store the master agent's reply to an informational question."""
+    if cache_lookup and cache_lookup.cacheable:
+        session_state = get_session_context().state
+        await response_cache.store(
+            cache_lookup, response_text, session_state, session_state.get("conversation_stage")
+        )
+
+
+# ==================== CHAT STREAMING ====================
+
+# Status shown to the customer while the master agent waits on a worker agent
+ROUTING_STATUS_LABELS = {
+    "route_to_sales_agent": ("sales", "Preparing your loan options…"),
+    "route_to_verification_agent": ("verification", "Verifying your details…"),
+    "route_to_underwriting_agent": ("underwriting", "Checking eligibility…"),
+    "route_to_sanction_agent": ("sanction", "Preparing your sanction letter…"),
+}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def is_master_model_token(metadata: Dict[str, Any]) -> bool:
+    """
+    True for LLM tokens produced by the master agent's own model node.
+
+    Worker agents run inside the master's tool node, so their model calls
+    carry a nested checkpoint namespace ("tools:...|model:...") and are not
+    streamed to the customer.
+    """
+    return (
+        metadata.get("langgraph_node") == "model"
+        and "|" not in metadata.get("langgraph_checkpoint_ns", "")
+    )
+
+
+async def stream_verification_results(session_id: str) -> AsyncIterator[str]:
+    """Yield a "verification" frame for each of the session's jobs that finished since the last push."""
+    if not VERIFICATION_PUSH_TO_CHAT_STREAM:
+        return
+    try:
+        jobs = await run_in_threadpool(take_undelivered_results, session_id)
+    except Exception as e:
+        logger.error(f"[API] Error loading verification results: {str(e)}")
+        return
+    for job in jobs:
+        yield format_sse("verification", jsonable_encoder(job))
+
+
+async def stream_chat_events(session_id: str, message: str) -> AsyncIterator[str]:
+    """
+    Run one chat turn and yield SSE frames as the master agent works.
+
+    Events:
+    - start: {"session_id"} - sent before any database or LLM work
+    - routing: {"agent", "label"} - the master agent handed off to a worker agent
+    - token: {"content"} - a chunk of the master agent's reply
+    - verification: a verification job of the session finished (GET /jobs/{id} payload)
+    - done: ChatResponse payload; "message" is the authoritative final reply
+    - error: {"detail"}
+    """
+    yield format_sse("start", {"session_id": session_id})
+    async for frame in stream_verification_results(session_id):
+        yield frame
+
+    turn = None
+    try:
+        turn, conversation_history = await prepare_chat_turn(session_id, message)
+
+        direct_reply, cache_lookup = await answer_without_master_agent(message)
+        if direct_reply is not None:
+            yield format_sse("token", {"content": direct_reply})
+            response = await finalize_chat_turn(turn, direct_reply)
+            turn = None
+            yield format_sse("done", response.model_dump())
+            return
+
+        final_messages: List[BaseMessage] = []
+        async for mode, chunk in master_agent.astream(
+            {"messages": conversation_history}, stream_mode=["messages", "updates"]
+        ):
+            if mode == "messages":
+                token, metadata = chunk
+                if is_master_model_token(metadata) and isinstance(token.content, str) and token.content:
+                    yield format_sse("token", {"content": token.content})
+                continue
+
+            # "updates": one entry per finished node of the master agent graph
+            for node_output in chunk.values():
+                messages = (node_output or {}).get("messages", []) if isinstance(node_output, dict) else []
+                final_messages.extend(messages)
+                for msg in messages:
+                    for tool_call in getattr(msg, "tool_calls", None) or []:
+                        agent, label = ROUTING_STATUS_LABELS.get(
+                            tool_call["name"], (tool_call["name"], "Working on it…")
+                        )
+                        logger.info(f"[API] Streaming routing event - Agent: {agent}")
+                        yield format_sse("routing", {"agent": agent, "label": label})
+
+        response_text = extract_response_text({"messages": final_messages})
+        await cache_master_agent_reply(cache_lookup, response_text)
+        response = await finalize_chat_turn(turn, response_text)
+        turn = None
+        # Jobs that finished while the agent was working (e.g. it waited on them)
+        async for frame in stream_verification_results(session_id):
+            yield frame
+        yield format_sse("done", response.model_dump())
+
+    except Exception as e:
+        logger.error(f"[API] Error in chat stream: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        await flush_failed_chat_turn(turn)
+        yield format_sse("error", {"detail": f"Error processing request: {str(e)}"})
+
+
 # ==================== FASTAPI APP ====================
 
+# Allowance over MAX_UPLOAD_BYTES for the multipart framing and form fields of /upload
+UPLOAD_REQUEST_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects an upload request body larger than max_bytes with 413 before it is
+    received in full. FastAPI parses the multipart form (spooling the file to
+    disk) before the endpoint runs, so the endpoint cannot check this itself.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def _too_large(self) -> str:
+        return f"File size exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)}MB limit"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        # Declared size: reject without reading the body
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            logger.warning(f"[API] Upload rejected - Content-Length {content_length} bytes")
+            response = JSONResponse({"detail": self._too_large()}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        # Chunked (or understated) body: stop once more than max_bytes arrived.
+        # FastAPI re-raises HTTPException from form parsing as the response.
+        received = 0
+
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    logger.warning(f"[API] Upload rejected - body over {self.max_bytes} bytes")
+                    raise HTTPException(status_code=413, detail=self._too_large())
+            return message
+
+        await self.app(scope, receive_limited, send)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown."""
+    # Bound the threads used for blocking work: FastAPI's run_in_threadpool
+    # goes through anyio's limiter, sync LangChain tools run on the loop's
+    # default executor when agents are invoked with ainvoke.
+    executor = ThreadPoolExecutor(
+        max_workers=BLOCKING_IO_THREADS, thread_name_prefix="vittam-io"
+    )
+    asyncio.get_running_loop().set_default_executor(executor)
+    to_thread.current_default_thread_limiter().total_tokens = BLOCKING_IO_THREADS
+
+    # Load the offer catalogue before the first request needs it
+    try:
+        await run_in_threadpool(offer_index.load)
+    except Exception as e:
+        logger.error(f"[OFFER_INDEX] Error loading offer index at startup: {str(e)}")
+
+    # Send queued WhatsApp notifications in the background
+    if NOTIFICATION_DISPATCHER_ENABLED:
+        await notification_dispatcher.start()
+
+    # Run queued document verification jobs in the background
+    if VERIFICATION_WORKERS_ENABLED:
+        await verification_worker.start()
+
     logger.info("Tata Capital Personal Loan AI Assistant ready!")
     yield
     logger.info("Vittam API shutting down...")
+    await notification_dispatcher.stop()
+    await verification_worker.stop()
+    executor.shutdown(wait=False)
 
 
 app = FastAPI(
@@ -399,6 +657,11 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    path="/upload",
+    max_bytes=MAX_UPLOAD_BYTES + UPLOAD_REQUEST_OVERHEAD_BYTES,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -427,11 +690,90 @@ async def health_check():
     )
 
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Cache statistics.
+
+    - response_cache: semantic response cache hit ratio, counters and latency saved
+    - customer_cache: process-wide customer profile cache counters
+    - offer_index: in-memory offer template index size and age
+    - verification_cache: document verdicts reused for identical uploads
+    """
+    return {
+        "response_cache": response_cache.get_cache_stats(),
+        "customer_cache": get_customer_cache_stats(),
+        "offer_index": offer_index.get_offer_index_stats(),
+        "verification_cache": get_verification_cache_stats(),
+    }
+
+
+@app.post("/offers/index/refresh")
+async def refresh_offer_index():
+    """Reload the in-memory offer index, e.g. after editing offer templates."""
+    snapshot = await run_in_threadpool(offer_index.load)
+    return {
+        "success": True,
+        "message": f"Offer index reloaded with {len(snapshot.offers)} offer templates",
+    }
+
+
+@app.delete("/customers/{customer_id}/cache")
+async def invalidate_customer_cache(customer_id: str):
+    """
+    Drop a customer's cached profile, e.g. after their users / kycs records were updated.
+
+    customer_id may also be a phone in any format or a PAN. Only this
+    process's cache is cleared; other workers serve the old profile for at
+    most CUSTOMER_CACHE_TTL_SECONDS.
+    """
+    return await run_in_threadpool(invalidate_customer_profile, customer_id)
+
+
+@app.get("/customers/{customer_id}/offer-grid")
+async def get_customer_offer_grid(customer_id: str):
+    """
+    Precomputed offer grid for a customer.
+
+    Every loan amount step up to 2x the pre-approved limit against tenures
+    12-60 months, with interest rate, EMI and eligibility per option.
+    """
+    result = await run_in_threadpool(get_offer_grid, customer_id)
+    if not result.get("success"):
+        raise HTTPException(status_code=404, detail=result.get("message", "Customer not found"))
+    return result
+
+
+@app.get("/notifications/{notification_id}")
+async def get_notification_status(notification_id: str):
+    """Delivery status of a queued notification (pending, sending, sent or failed)."""
+    notification = await run_in_threadpool(get_notification, notification_id)
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return notification
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Status of a verification job (queued, running, succeeded or failed) and its result once finished."""
+    job = await run_in_threadpool(get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/sanctions/{sanction_id}/notifications")
+async def get_sanction_notification_status(sanction_id: str):
+    """Delivery status of every notification queued for a sanction."""
+    notifications = await run_in_threadpool(get_sanction_notifications, sanction_id)
+    return {"sanction_id": sanction_id, "notifications": notifications}
+
+
 @app.post("/session", response_model=SessionResponse)
 async def create_new_session():
     """Create a new chat session."""
     session_id = str(uuid.uuid4())
-    get_or_create_session(session_id)
+    await run_in_threadpool(get_or_create_session, session_id)
 
     logger.info(f"[API] New session created: {session_id}")
 
@@ -442,7 +784,7 @@ async def create_new_session():
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, background_tasks: BackgroundTasks, http_response: Response):
     """
     Main chat endpoint for conversation with Vittam.
 
@@ -454,182 +796,72 @@ async def chat(request: ChatRequest):
     - message: Agent's response in natural language
     - inputs: Array of document upload requirements (empty if none needed)
     - session_id: Session ID for continuing conversation
+
+    The X-DB-Round-Trips header reports the MongoDB round-trips of the turn.
     """
+    turn = None
     try:
-        # Get or create session
         session_id = request.session_id or str(uuid.uuid4())
-        session_state = get_or_create_session(session_id)
+        turn, conversation_history = await prepare_chat_turn(session_id, request.message)
 
-        logger.info(
-            f"[API] Chat request - Session: {session_id}, Message: {request.message[:100]}..."
-        )
-
-        # Store user message in database
-        create_conversation(session_id, "user", request.message)
-
-        # Get conversation history from database
-        conversation_history = get_conversation_history_from_db(session_id)
-
-        # Get verified document status BEFORE creating agent
-        verified_documents = get_verified_document_status(session_id)
+        response_text, cache_lookup = await answer_without_master_agent(request.message)
+        if response_text is None:
+            # Invoke master agent with conversation history from database
+            result = await master_agent.ainvoke({"messages": conversation_history})
+            response_text = extract_response_text(result)
+            await cache_master_agent_reply(cache_lookup, response_text)
 
-        # Create master agent with current session state
-        # We need to inject session_state into the prompt
-        import main
+        response = await finalize_chat_turn(turn, response_text)
+        http_response.headers["X-DB-Round-Trips"] = str(turn.round_trips)
+        turn = None
 
-        main.session_state = session_state
-        main.current_session_id = session_id
-        main.verified_documents = verified_documents  # Pass verified documents to main
+        # Fold turns that left the recent window into the rolling summary
+        # after the response is sent, so it never adds to this turn's latency
+        background_tasks.add_task(update_history_summary, session_id)
 
-        master_agent = create_agent(
-            model=model,
-            tools=master_agent_tools,
-            system_prompt=get_master_agent_prompt(),
-        )
-
-        logger.info(
-            f"[API] Invoking master agent - History length: {len(conversation_history)}"
-        )
-
-        # Invoke master agent with conversation history from database
-        result = master_agent.invoke({"messages": conversation_history})
-
-        # Extract response from agent result
-        response_text = None
-        if isinstance(result, dict) and "messages" in result:
-            for msg in reversed(result["messages"]):
-                if isinstance(msg, AIMessage) or (
-                    hasattr(msg, "content")
-                    and hasattr(msg, "type")
-                    and msg.type == "ai"
-                ):
-                    if hasattr(msg, "content") and msg.content:
-                        response_text = msg.content
-                        break
-
-            if not response_text:
-                for msg in reversed(result["messages"]):
-                    if hasattr(msg, "content") and msg.content:
-                        response_text = msg.content
-                        break
-
-        elif isinstance(result, list):
-            for msg in reversed(result):
-                if isinstance(msg, AIMessage) or (
-                    hasattr(msg, "content")
-                    and hasattr(msg, "type")
-                    and getattr(msg, "type", None) == "ai"
-                ):
-                    if hasattr(msg, "content") and msg.content:
-                        response_text = msg.content
-                        break
-
-            if not response_text and result:
-                last_msg = result[-1]
-                if hasattr(last_msg, "content"):
-                    response_text = last_msg.content
-                else:
-                    response_text = str(last_msg)
-
-        if not response_text:
-            response_text = str(result)
-
-        # Store assistant response in database
-        create_conversation(session_id, "assistant", response_text, "master")
-
-        # Update session state if needed (from tools that modify state)
-        # Re-fetch session state to get any updates from tools
-        updated_session_state = get_or_create_session(session_id)
-        updated_session_state.update(session_state)  # Preserve any tool updates
-
-        # Sync session state to database
-        sync_session_state_to_db(session_id, updated_session_state)
-
-        # Detect if agent is asking for document uploads
-        detected_inputs = detect_document_requests(response_text)
-
-        # Filter out documents that are already uploaded and verified
-        if detected_inputs:
-            # Get all existing documents for this session
-            existing_documents = get_documents_by_session(session_id)
-
-            # Create a map of doc_id -> verification_status
-            existing_docs_map = {}
-            for doc in existing_documents:
-                doc_id = doc.get("doc_id")
-                if doc_id:
-                    status = doc.get("verification_status", "pending")
-                    existing_docs_map[doc_id] = status
-
-            # Filter inputs: only include documents that are missing or not verified
-            filtered_inputs = []
-            for inp in detected_inputs:
-                doc_id = inp.get("doc_id")
-                if doc_id:
-                    # Check if document exists and is verified
-                    if doc_id in existing_docs_map:
-                        if existing_docs_map[doc_id] == "verified":
-                            # Document is already verified, skip it
-                            logger.info(f"[API] Skipping {doc_id} - already verified")
-                            continue
-                        else:
-                            # Document exists but not verified, ask for reupload
-                            logger.info(
-                                f"[API] Including {doc_id} - exists but not verified (status: {existing_docs_map[doc_id]})"
-                            )
-                    # Document doesn't exist or needs reupload
-                    filtered_inputs.append(inp)
-                else:
-                    # No doc_id, include it (shouldn't happen but be safe)
-                    filtered_inputs.append(inp)
-
-            inputs = filtered_inputs
-        else:
-            inputs = []
-
-        logger.info(
-            f"[API] Response generated - Length: {len(response_text)}, Detected inputs: {len(detected_inputs)}, Filtered inputs: {len(inputs)}"
-        )
-
-        # Check if a sanction was created in this session
-        # Only return sanction_id if conversation_stage is "sanction" (indicates sanction was just created)
-        sanction_id = None
-        try:
-            if updated_session_state.get("conversation_stage") == "sanction":
-                # Get the most recent sanction for this session
-                latest_sanction = sanctions_collection.find_one(
-                    {"session_id": session_id},
-                    sort=[("created_at", -1)]
-                )
-                if latest_sanction:
-                    sanction_id = latest_sanction.get("sanction_id") or str(latest_sanction.get("_id"))
-                    logger.info(f"[API] Detected sanction creation: {sanction_id}")
-        except Exception as e:
-            logger.error(f"[API] Error checking for sanction: {str(e)}")
-            # Continue without sanction_id if there's an error
-
-        return ChatResponse(
-            message=response_text,
-            inputs=[InputSpec(**inp) for inp in inputs],
-            session_id=session_id,
-            sanction_id=sanction_id,
-        )
+        return response
 
     except Exception as e:
         logger.error(f"[API] Error in chat: {str(e)}")
         import traceback
 
         traceback.print_exc()
+        await flush_failed_chat_turn(turn)
         raise HTTPException(
             status_code=500, detail=f"Error processing request: {str(e)}"
         )
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, background_tasks: BackgroundTasks):
+    """
+    Streaming chat endpoint (Server-Sent Events).
+
+    Same request body as /chat. Streams master agent tokens and worker agent
+    routing events as they happen; the final "done" event carries the same
+    payload as ChatResponse (message, inputs, session_id, sanction_id).
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+
+    # Runs after the stream completes, as for /chat
+    background_tasks.add_task(update_history_summary, session_id)
+
+    return StreamingResponse(
+        stream_chat_events(session_id, request.message),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        },
+        background=background_tasks,
+    )
+
+
 @app.get("/session/{session_id}/history")
 async def get_session_history(session_id: str):
     """Get conversation history for a session."""
     try:
-        history = get_conversations(session_id)
+        history = await run_in_threadpool(get_conversations, session_id)
 
         if not history:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -671,6 +903,24 @@ async def delete_session(session_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting session: {str(e)}")
 
 
+async def validate_upload_target(session_id: str, doc_id: str) -> str:
+    """Check the session exists and doc_id is an allowed type; returns the document's name."""
+    session = await run_in_threadpool(get_session, session_id)
+    if not session:
+        raise HTTPException(
+            status_code=404, detail=f"Session {session_id} not found"
+        )
+
+    # Validate doc_id - must be from ALLOWED_DOCUMENT_TYPES
+    if doc_id not in ALLOWED_DOCUMENT_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid doc_id: {doc_id}. Allowed types: {', '.join(ALLOWED_DOCUMENT_TYPES.keys())}",
+        )
+
+    return ALLOWED_DOCUMENT_TYPES[doc_id]["name"]
+
+
 @app.post("/upload", response_model=DocumentUploadResponse)
 async def upload_document(
     session_id: str = Form(...), doc_id: str = Form(...), file: UploadFile = File(...)
@@ -690,58 +940,56 @@ async def upload_document(
     - message: Status message
     """
     try:
-        # Validate session exists
-        session = get_session(session_id)
-        if not session:
+        doc_name = await validate_upload_target(session_id, doc_id)
+
+        # Validate file size before storing anything. UploadSizeLimitMiddleware
+        # already rejected bodies far over the limit while they were received;
+        # the multipart parser spools the file to a temporary file (in memory
+        # only up to 1MB), and create_document copies it to storage in chunks
+        # off the event loop, enforcing the limit again when the size was not
+        # reported.
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
             raise HTTPException(
-                status_code=404, detail=f"Session {session_id} not found"
+                status_code=413,
+                detail=f"File size exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)}MB limit. Current size: {file.size} bytes",
             )
 
-        # Validate doc_id - must be from ALLOWED_DOCUMENT_TYPES
-        if doc_id not in ALLOWED_DOCUMENT_TYPES:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid doc_id: {doc_id}. Allowed types: {', '.join(ALLOWED_DOCUMENT_TYPES.keys())}",
-            )
-
-        # Get document info
-        doc_info = ALLOWED_DOCUMENT_TYPES[doc_id]
-        doc_name = doc_info["name"]
-
-        # Read file content
-        file_content = await file.read()
-        file_size = len(file_content)
-
-        # Validate file size (1MB = 1048576 bytes)
-        MAX_FILE_SIZE = 1048576
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File size exceeds 1MB limit. Current size: {file_size} bytes",
-            )
-
-        if file_size == 0:
+        if file.size == 0:
             raise HTTPException(status_code=400, detail="File is empty")
 
         # Create document
-        document = create_document(
-            session_id=session_id,
-            doc_id=doc_id,
-            doc_name=doc_name,
-            original_filename=file.filename or f"{doc_id}.pdf",
-            file_content=file_content,
-            file_size=file_size,
-        )
+        try:
+            document = await run_in_threadpool(
+                create_document,
+                session_id=session_id,
+                doc_id=doc_id,
+                doc_name=doc_name,
+                original_filename=file.filename or f"{doc_id}.pdf",
+                file_content=file.file,
+            )
+        except UploadTooLarge:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File size exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)}MB limit",
+            )
 
         logger.info(
-            f"[API] Document uploaded - Session: {session_id}, Doc ID: {doc_id}, Size: {file_size} bytes"
+            f"[API] Document uploaded - Session: {session_id}, Doc ID: {doc_id}, Size: {document['file_size']} bytes"
         )
 
+        # Start verifying now so the result is usually ready when it is asked for
+        verification_job_id = None
+        if AUTO_VERIFY_ON_UPLOAD:
+            verification_job_id = await run_in_threadpool(
+                enqueue_document_verification, str(document["_id"])
+            )
+
         return DocumentUploadResponse(
             success=True,
             doc_id=doc_id,
             document_id=str(document["_id"]),
             message=f"Document '{doc_name}' uploaded successfully",
+            verification_job_id=verification_job_id,
         )
 
     except HTTPException:
@@ -756,6 +1004,117 @@ async def upload_document(
         )
 
 
+@app.post("/upload/init", response_model=DirectUploadInitResponse)
+async def init_direct_upload(request: DirectUploadInitRequest):
+    """
+    Start a direct upload: returns a presigned URL to PUT the file to S3, so
+    its bytes never pass through the API. Call /upload/complete afterwards.
+
+    Needs USE_REMOTE_UPLOAD=1 and DIRECT_UPLOADS_ENABLED=true (501 otherwise -
+    use /upload); only enable it once the bucket has a CORS rule allowing PUT
+    from the widget's origin.
+
+    Request:
+    - session_id, doc_id: as for /upload
+    - filename: Original filename (its extension is kept)
+    - file_size: Exact size in bytes (signed into the URL)
+    - content_type, content_sha256: Optional, also signed when given
+
+    Response:
+    - upload_url, method, headers: The request to send with the file as body
+    - expires_in: Seconds the URL stays valid
+    - file_path: Object key the file is stored under
+    """
+    if not DIRECT_UPLOADS_ENABLED:
+        raise HTTPException(status_code=501, detail="Direct uploads are not enabled, use /upload")
+
+    await validate_upload_target(request.session_id, request.doc_id)
+
+    if request.file_size <= 0:
+        raise HTTPException(status_code=400, detail="File is empty")
+    if request.file_size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)}MB limit. Current size: {request.file_size} bytes",
+        )
+
+    try:
+        upload = await run_in_threadpool(
+            prepare_direct_upload,
+            session_id=request.session_id,
+            doc_id=request.doc_id,
+            original_filename=request.filename,
+            file_size=request.file_size,
+            content_type=request.content_type,
+            content_sha256=request.content_sha256,
+        )
+    except Exception as e:
+        logger.error(f"[API] Error preparing direct upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error preparing upload: {str(e)}")
+
+    logger.info(
+        f"[API] Direct upload started - Session: {request.session_id}, Doc ID: {request.doc_id}, Size: {request.file_size} bytes"
+    )
+    return DirectUploadInitResponse(
+        upload_url=upload["url"],
+        method=upload["method"],
+        headers=upload["headers"],
+        expires_in=upload["expires_in"],
+        file_path=upload["file_path"],
+    )
+
+
+@app.post("/upload/complete", response_model=DocumentUploadResponse)
+async def complete_direct_upload_endpoint(request: DirectUploadCompleteRequest):
+    """
+    Record a document uploaded through /upload/init once its PUT succeeded.
+
+    Response: as for /upload (verification is queued if verify is true, or
+    by default with AUTO_VERIFY_ON_UPLOAD).
+    """
+    if not DIRECT_UPLOADS_ENABLED:
+        raise HTTPException(status_code=501, detail="Direct uploads are not enabled, use /upload")
+
+    doc_name = await validate_upload_target(request.session_id, request.doc_id)
+
+    try:
+        document = await run_in_threadpool(
+            complete_direct_upload,
+            session_id=request.session_id,
+            doc_id=request.doc_id,
+            doc_name=doc_name,
+            original_filename=request.filename,
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=400, detail="File has not been uploaded")
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)}MB limit",
+        )
+    except Exception as e:
+        logger.error(f"[API] Error completing direct upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error completing upload: {str(e)}")
+
+    logger.info(
+        f"[API] Document uploaded directly - Session: {request.session_id}, Doc ID: {request.doc_id}, Size: {document['file_size']} bytes"
+    )
+
+    verification_job_id = None
+    if AUTO_VERIFY_ON_UPLOAD if request.verify is None else request.verify:
+        verification_job_id = await run_in_threadpool(
+            enqueue_document_verification, str(document["_id"])
+        )
+
+    return DocumentUploadResponse(
+        success=True,
+        doc_id=request.doc_id,
+        document_id=str(document["_id"]),
+        message=f"Document '{doc_name}' uploaded successfully",
+        verification_job_id=verification_job_id,
+    )
+
+
 @app.get("/documents/{session_id}", response_model=DocumentsResponse)
 async def get_session_documents(session_id: str):
     """
@@ -767,14 +1126,14 @@ async def get_session_documents(session_id: str):
     """
     try:
         # Validate session exists
-        session = get_session(session_id)
+        session = await run_in_threadpool(get_session, session_id)
         if not session:
             raise HTTPException(
                 status_code=404, detail=f"Session {session_id} not found"
             )
 
         # Get documents
-        documents = get_documents_by_session(session_id)
+        documents = await run_in_threadpool(get_documents_by_session, session_id)
 
         # Format documents for response
         formatted_docs = []
@@ -813,34 +1172,35 @@ async def get_session_documents(session_id: str):
         )
 
 
-@app.post("/documents/{session_id}/verify")
+@app.post("/documents/{session_id}/verify", status_code=202)
 async def verify_session_documents_endpoint(session_id: str):
     """
-    Verify all documents for a session using OpenAI.
+    Queue verification of all documents for a session using OpenAI.
 
-    This endpoint verifies all uploaded documents for a session and updates their verification status.
-
-    Response:
+    Returns immediately; poll GET /jobs/{job_id} until its status is
+    "succeeded" or "failed". The job's result has the verification response:
     - session_id: Session ID
     - all_verified: Whether all documents are verified
     - results: List of verification results for each document
     """
     try:
         # Validate session exists
-        session = get_session(session_id)
+        session = await run_in_threadpool(get_session, session_id)
         if not session:
             raise HTTPException(
                 status_code=404, detail=f"Session {session_id} not found"
             )
 
-        # Verify all documents
-        result = verify_session_documents(session_id)
+        job_id = await run_in_threadpool(enqueue_session_verification, session_id)
 
-        logger.info(
-            f"[API] Document verification completed - Session: {session_id}, All verified: {result.get('all_verified', False)}"
-        )
+        logger.info(f"[API] Document verification queued - Session: {session_id}, Job: {job_id}")
 
-        return result
+        return {
+            "success": True,
+            "session_id": session_id,
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}",
+        }
 
     except HTTPException:
         raise
@@ -854,31 +1214,32 @@ async def verify_session_documents_endpoint(session_id: str):
         )
 
 
-@app.post("/documents/verify/{document_id}")
+@app.post("/documents/verify/{document_id}", status_code=202)
 async def verify_single_document_endpoint(document_id: str):
     """
-    Verify a single document by its document ID.
+    Queue verification of a single document by its document ID.
 
-    Response:
+    Returns immediately; poll GET /jobs/{job_id} until its status is
+    "succeeded" or "failed". The job's result has the verification response:
     - success: Whether verification was successful
     - document_id: Document ID
     - verified: Whether document is verified
     - feedback: Verification feedback
     """
     try:
-        # Verify document
-        result = verify_document(document_id)
+        job_id = await run_in_threadpool(enqueue_document_verification, document_id)
 
-        if not result.get("success", False):
-            raise HTTPException(
-                status_code=404, detail=result.get("message", "Document not found")
-            )
+        if not job_id:
+            raise HTTPException(status_code=404, detail="Document not found")
 
-        logger.info(
-            f"[API] Document verification completed - Document: {document_id}, Verified: {result.get('verified', False)}"
-        )
+        logger.info(f"[API] Document verification queued - Document: {document_id}, Job: {job_id}")
 
-        return result
+        return {
+            "success": True,
+            "document_id": document_id,
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}",
+        }
 
     except HTTPException:
         raise
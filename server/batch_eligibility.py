@@ -0,0 +1,461 @@
+"""
+Batch Eligibility - Nightly eligibility scoring for campaign lists
+
+Scores every customer in users (joined with kycs) against the
+check_eligibility rules (credit score, 2x pre-approved limit, EMI <= 50% of
+salary) for a set of candidate amounts (multiples of the pre-approved
+limit), and upserts one document per customer into eligibility_scores:
+- users and kycs are read in _id-ordered chunks with a $lookup aggregation,
+  so memory stays bounded by --chunk-size however large the base is
+- rates (offer index + default rates), EMIs and rules are evaluated with
+  NumPy for the whole chunk
+- results are written with one unordered bulk_write per chunk
+
+Campaign lists are then a query on eligibility_scores by campaign
+("instant" / "conditional") and max_eligible_amount.
+
+Usage:
+    uv run batch_eligibility.py
+    uv run batch_eligibility.py --tenure 36 --multipliers 1,1.5,2 --chunk-size 20000
+    uv run batch_eligibility.py --dry-run --limit 100000
+    uv run batch_eligibility.py --prune
+    uv run batch_eligibility.py --benchmark 1000000
+
+The benchmark needs no database: it scores synthetic customers against a
+synthetic offer catalogue.
+"""
+
+import time
+import uuid
+import argparse
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from database import users_collection, eligibility_scores_collection
+from emi_engine import batch_emi
+from eligibility_engine import (
+    APPROVED,
+    EligibilityBatch,
+    MAX_EMI_TO_SALARY,
+    MAX_LIMIT_MULTIPLIER,
+    MIN_CREDIT_SCORE,
+    REASON_NAMES,
+    STATUS_NAMES,
+    evaluate_eligibility,
+)
+import offer_index
+from offer_index import get_index
+from services import DEFAULT_INTEREST_RATES, get_interest_rate
+from models import EligibilityScore, OfferTemplate
+
+DEFAULT_MULTIPLIERS = "0.5,1,1.5,2"
+DEFAULT_TENURE_MONTHS = 60
+DEFAULT_CHUNK_SIZE = 10000
+
+
+# ===== READ =====
+
+
+def _chunk_pipeline(after_id: Optional[ObjectId], chunk_size: int) -> List[Dict[str, Any]]:
+    match: Dict[str, Any] = {"phone": {"$nin": [None, ""]}}
+    if after_id is not None:
+        match["_id"] = {"$gt": after_id}
+    return [
+        {"$match": match},
+        {"$sort": {"_id": 1}},
+        {"$limit": chunk_size},
+        {
+            "$lookup": {
+                "from": "kycs",
+                "localField": "phone",
+                "foreignField": "phone",
+                "as": "kyc",
+            }
+        },
+        {
+            "$project": {
+                "phone": 1,
+                "name": 1,
+                "pre_approved_limit": 1,
+                "salary": 1,
+                "credit_score": {"$arrayElemAt": ["$kyc.credit_score", 0]},
+            }
+        },
+    ]
+
+
+def iter_customer_chunks(chunk_size: int, limit: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield users joined with their KYC credit score, chunk_size at a time, in _id order."""
+    after_id = None
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        rows = list(users_collection.aggregate(_chunk_pipeline(after_id, size)))
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1]["_id"]
+        if remaining is not None:
+            remaining -= len(rows)
+        if len(rows) < size:
+            return
+
+
+# ===== EVALUATE =====
+
+
+def _as_float(value: Any) -> float:
+    """Numeric field as float, NaN if missing or not a number."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+def _column(rows: List[Dict[str, Any]], field: str) -> np.ndarray:
+    """Float column of a field across rows; missing values are NaN."""
+    values = [row.get(field) for row in rows]
+    try:
+        return np.array(values, dtype=np.float64)  # None -> NaN
+    except (TypeError, ValueError):
+        return np.array([_as_float(value) for value in values])
+
+
+def interest_rates(credit_scores: np.ndarray, loan_amounts: np.ndarray) -> np.ndarray:
+    """
+    Vectorized services.get_interest_rate: best matching offer template rate,
+    else the default rate for the credit score category and amount.
+    """
+    rates = get_index().match_rates(credit_scores, loan_amounts)
+
+    scores, amounts = np.broadcast_arrays(credit_scores, loan_amounts)
+    categories = [scores >= 750, scores >= 700, scores >= 650]
+    names = ["excellent", "good", "fair"]
+    min_rates = np.select(categories, [DEFAULT_INTEREST_RATES[n]["min"] for n in names], DEFAULT_INTEREST_RATES["poor"]["min"])
+    max_rates = np.select(categories, [DEFAULT_INTEREST_RATES[n]["max"] for n in names], DEFAULT_INTEREST_RATES["poor"]["max"])
+    default_rates = np.where(
+        amounts >= 1000000,
+        min_rates,
+        np.where(amounts >= 500000, (min_rates + max_rates) / 2, max_rates),
+    )
+    return np.round(np.where(np.isnan(rates), default_rates, rates), 2)
+
+
+@dataclass
+class ChunkEvaluation:
+    """Rule outcome for a chunk, shape (customers, candidate amounts)."""
+
+    limits: np.ndarray
+    amounts: np.ndarray
+    rates: np.ndarray
+    emis: np.ndarray
+    eligibility: EligibilityBatch
+    has_offer: np.ndarray  # per customer
+    best: np.ndarray  # per customer, column of the largest eligible amount
+
+
+def evaluate_chunk(rows: List[Dict[str, Any]], multipliers: np.ndarray, tenure_months: int) -> ChunkEvaluation:
+    """Evaluate the eligibility rules for every customer x candidate amount in a chunk."""
+    credit_scores = np.nan_to_num(_column(rows, "credit_score"))
+    limits = np.nan_to_num(_column(rows, "pre_approved_limit"))
+    salaries = _column(rows, "salary")
+
+    amounts = limits[:, np.newaxis] * multipliers[np.newaxis, :]
+    rates = interest_rates(credit_scores[:, np.newaxis], amounts)
+    emis = np.round(batch_emi(amounts, tenure_months, rates).emi, 2)
+    eligibility = evaluate_eligibility(
+        credit_scores[:, np.newaxis], limits[:, np.newaxis], amounts, emis, salaries[:, np.newaxis]
+    )
+    # Customers without a pre-approved limit have nothing to offer
+    eligible = eligibility.eligible & (limits > 0)[:, np.newaxis]
+
+    # Largest eligible candidate (multipliers are ascending)
+    best = amounts.shape[1] - 1 - np.argmax(eligible[:, ::-1], axis=1)
+    return ChunkEvaluation(
+        limits=limits,
+        amounts=amounts,
+        rates=rates,
+        emis=emis,
+        eligibility=eligibility,
+        has_offer=eligible.any(axis=1),
+        best=best,
+    )
+
+
+def build_documents(
+    rows: List[Dict[str, Any]],
+    evaluation: ChunkEvaluation,
+    tenure_months: int,
+    run_id: str,
+    scored_at: datetime,
+) -> List[EligibilityScore]:
+    """Score documents for a chunk (plain Python values, ready for bulk_write)."""
+    best_status = evaluation.eligibility.status[np.arange(len(rows)), evaluation.best].tolist()
+    best = evaluation.best.tolist()
+    has_offer = evaluation.has_offer.tolist()
+    limit_values = evaluation.limits.tolist()
+    amount_rows = evaluation.amounts.tolist()
+    rate_rows = evaluation.rates.tolist()
+    emi_rows = np.nan_to_num(evaluation.emis).tolist()
+    status_rows = evaluation.eligibility.status.tolist()
+    reason_rows = evaluation.eligibility.reason.tolist()
+
+    documents = []
+    for i, row in enumerate(rows):
+        campaign = None
+        max_eligible_amount = None
+        if has_offer[i]:
+            max_eligible_amount = amount_rows[i][best[i]]
+            campaign = "instant" if best_status[i] == APPROVED else "conditional"
+        documents.append(
+            {
+                "customer_id": row["phone"],
+                "name": row.get("name"),
+                "credit_score": row.get("credit_score"),
+                "pre_approved_limit": limit_values[i],
+                "salary": row.get("salary"),
+                "tenure_months": tenure_months,
+                "options": [
+                    {
+                        "loan_amount": amount_rows[i][j],
+                        "interest_rate": rate_rows[i][j],
+                        "emi": emi_rows[i][j],
+                        "status": STATUS_NAMES[status_rows[i][j]],
+                        "reason": REASON_NAMES[reason_rows[i][j]],
+                    }
+                    for j in range(len(amount_rows[i]))
+                ],
+                "max_eligible_amount": max_eligible_amount,
+                "campaign": campaign,
+                "run_id": run_id,
+                "scored_at": scored_at,
+            }
+        )
+    return documents
+
+
+def score_chunk(
+    rows: List[Dict[str, Any]],
+    multipliers: np.ndarray,
+    tenure_months: int,
+    run_id: str,
+    scored_at: datetime,
+) -> List[EligibilityScore]:
+    """Evaluate a chunk of customers and build their score documents."""
+    return build_documents(rows, evaluate_chunk(rows, multipliers, tenure_months), tenure_months, run_id, scored_at)
+
+
+# ===== WRITE =====
+
+
+def write_scores(documents: List[EligibilityScore]) -> int:
+    """Upsert score documents by customer_id. Returns the number written."""
+    if not documents:
+        return 0
+    result = eligibility_scores_collection.bulk_write(
+        [UpdateOne({"customer_id": doc["customer_id"]}, {"$set": doc}, upsert=True) for doc in documents],
+        ordered=False,
+    )
+    return result.upserted_count + result.modified_count
+
+
+# ===== RUN =====
+
+
+def run(
+    multipliers: np.ndarray,
+    tenure_months: int,
+    chunk_size: int,
+    limit: Optional[int],
+    dry_run: bool,
+    prune: bool,
+) -> None:
+    run_id = str(uuid.uuid4())
+    scored_at = datetime.now(timezone.utc)
+    print(f"Run {run_id}: tenure {tenure_months} months, amounts {multipliers.tolist()} x pre-approved limit")
+
+    timings = {"read": 0.0, "evaluate": 0.0, "write": 0.0}
+    totals = {"customers": 0, "written": 0, "instant": 0, "conditional": 0}
+    started = time.perf_counter()
+    chunks = iter_customer_chunks(chunk_size, limit)
+    while True:
+        t0 = time.perf_counter()
+        rows = next(chunks, None)
+        t1 = time.perf_counter()
+        timings["read"] += t1 - t0
+        if rows is None:
+            break
+
+        documents = score_chunk(rows, multipliers, tenure_months, run_id, scored_at)
+        t2 = time.perf_counter()
+        timings["evaluate"] += t2 - t1
+
+        if not dry_run:
+            totals["written"] += write_scores(documents)
+        timings["write"] += time.perf_counter() - t2
+
+        totals["customers"] += len(rows)
+        for doc in documents:
+            if doc["campaign"]:
+                totals[doc["campaign"]] += 1
+        elapsed = time.perf_counter() - started
+        print(f"  {totals['customers']:>10,} customers  {totals['customers'] / elapsed:>10,.0f} rows/s")
+
+    # Only after scoring every customer: a score this run didn't write then
+    # belongs to a customer no longer in users
+    pruned = 0
+    if prune and limit is None and not dry_run and totals["customers"]:
+        pruned = eligibility_scores_collection.delete_many({"run_id": {"$ne": run_id}}).deleted_count
+
+    elapsed = time.perf_counter() - started
+    print(f"\nScored {totals['customers']:,} customers in {elapsed:.2f}s")
+    print(f"  Instant campaign:     {totals['instant']:,}")
+    print(f"  Conditional campaign: {totals['conditional']:,}")
+    print(f"  Written: {totals['written']:,}" + (" (dry run)" if dry_run else "") + (f", pruned: {pruned:,}" if prune else ""))
+    for phase, seconds in timings.items():
+        rate = totals["customers"] / seconds if seconds else 0
+        print(f"  {phase:8s} {seconds:8.2f}s  {rate:>12,.0f} rows/s")
+
+
+# ===== BENCHMARK =====
+
+
+def synthetic_rows(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Customers shaped like the aggregation output, without a database."""
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(550, 900, count).tolist()
+    limits = (rng.integers(0, 30, count) * 50000).tolist()
+    salaries = (rng.integers(15, 300, count) * 1000).tolist()
+    has_salary = (rng.random(count) > 0.2).tolist()
+    return [
+        {
+            "_id": i,
+            "phone": f"9{i:09d}",
+            "name": f"Customer {i}",
+            "credit_score": scores[i],
+            "pre_approved_limit": limits[i],
+            "salary": salaries[i] if has_salary[i] else None,
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_offer_templates() -> List[OfferTemplate]:
+    """Offer catalogue for the benchmark: rates by credit score band and amount band."""
+    templates: List[OfferTemplate] = []
+    score_bands = [(650, 699, 15.5), (700, 749, 13.0), (750, 799, 11.5), (800, 900, 10.99)]
+    amount_bands = [(50000, 500000, 0.5), (500001, 1500000, 0.0)]
+    for min_score, max_score, rate in score_bands:
+        for min_amount, max_amount, premium in amount_bands:
+            templates.append(
+                {
+                    "_id": None,
+                    "name": f"Benchmark {min_score}-{max_score}",
+                    "min_credit_score": min_score,
+                    "max_credit_score": max_score,
+                    "min_amount": min_amount,
+                    "max_amount": max_amount,
+                    "min_tenure_months": 12,
+                    "max_tenure_months": 60,
+                    "base_rate": rate + premium,
+                    "processing_fee_pct": 3.5,
+                    "active": True,
+                }
+            )
+    return templates
+
+
+def scalar_score_row(row: Dict[str, Any], multipliers: List[float], tenure_months: int) -> List[str]:
+    """One customer at a time, the way check_eligibility applies the rules."""
+    statuses = []
+    credit_score = row.get("credit_score") or 0
+    limit = row.get("pre_approved_limit") or 0
+    salary = row.get("salary")
+    for multiplier in multipliers:
+        amount = limit * multiplier
+        rate = get_interest_rate(credit_score, amount)
+        monthly_rate = rate / (12 * 100)
+        emi = amount * monthly_rate * (1 + monthly_rate) ** tenure_months / ((1 + monthly_rate) ** tenure_months - 1)
+        if credit_score < MIN_CREDIT_SCORE:
+            status = "rejected"
+        elif limit > 0 and amount > MAX_LIMIT_MULTIPLIER * limit:
+            status = "rejected"
+        elif amount <= limit:
+            status = "approved"
+        elif salary is not None and round(emi, 2) > MAX_EMI_TO_SALARY * salary:
+            status = "rejected"
+        else:
+            status = "conditionally_approved"
+        statuses.append(status)
+    return statuses
+
+
+def benchmark(count: int, multipliers: np.ndarray, tenure_months: int, chunk_size: int) -> None:
+    """
+    Evaluation throughput, vectorized vs per-customer. No database: synthetic
+    customers, and a synthetic catalogue pinned as the offer index.
+    """
+    offer_index.pin(synthetic_offer_templates())
+    rows = synthetic_rows(count)
+    scored_at = datetime.now(timezone.utc)
+    chunks = [rows[offset:offset + chunk_size] for offset in range(0, count, chunk_size)]
+    print(f"Benchmark: {count:,} synthetic customers, {len(multipliers)} amounts each, chunks of {chunk_size:,}")
+
+    started = time.perf_counter()
+    evaluations = [evaluate_chunk(chunk, multipliers, tenure_months) for chunk in chunks]
+    rules = time.perf_counter() - started
+
+    documents: List[EligibilityScore] = []
+    started = time.perf_counter()
+    for chunk, evaluation in zip(chunks, evaluations):
+        documents = build_documents(chunk, evaluation, tenure_months, "benchmark", scored_at)
+    building = time.perf_counter() - started
+
+    sample = rows[: min(count, 20000)]
+    started = time.perf_counter()
+    for row in sample:
+        scalar_score_row(row, multipliers.tolist(), tenure_months)
+    per_row = (time.perf_counter() - started) / len(sample)
+
+    print(f"  rules, vectorized (evaluate_chunk)   {count / rules:>12,.0f} rows/s  ({rules:.2f}s)")
+    print(f"  rules, per-customer scalar loop      {1 / per_row:>12,.0f} rows/s  (measured on {len(sample):,} rows)")
+    print(f"  Speedup: {per_row * count / rules:.1f}x")
+    print(f"  building score documents             {count / building:>12,.0f} rows/s  ({building:.2f}s)")
+    print(f"  rules + documents                    {count / (rules + building):>12,.0f} rows/s")
+
+    # Both paths agree on the last chunk
+    for doc, row in zip(documents, chunks[-1]):
+        assert [option["status"] for option in doc["options"]] == scalar_score_row(row, multipliers.tolist(), tenure_months)
+    print(f"  Results match the scalar rules on {len(documents):,} customers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the customer base for eligibility campaign lists")
+    parser.add_argument("--tenure", type=int, default=DEFAULT_TENURE_MONTHS, help=f"Tenure in months for the EMI rule (default: {DEFAULT_TENURE_MONTHS})")
+    parser.add_argument("--multipliers", default=DEFAULT_MULTIPLIERS, help=f"Candidate amounts as multiples of the pre-approved limit (default: {DEFAULT_MULTIPLIERS})")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"Customers per read / write batch (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--limit", type=int, help="Score at most this many customers")
+    parser.add_argument("--dry-run", action="store_true", help="Evaluate without writing results")
+    parser.add_argument("--prune", action="store_true", help="After a full run, delete scores it didn't write (customers no longer in users); not with --limit")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Benchmark evaluation on N synthetic customers and offers (no database)")
+    args = parser.parse_args()
+
+    multipliers = np.array(sorted({float(m) for m in args.multipliers.split(",")}))
+    if args.tenure <= 0 or args.chunk_size <= 0 or (multipliers <= 0).any():
+        parser.error("tenure, chunk size and multipliers must be positive")
+    if args.prune and args.limit is not None:
+        parser.error("--prune needs a full run; it would delete the scores of customers beyond --limit")
+
+    if args.benchmark:
+        benchmark(args.benchmark, multipliers, args.tenure, args.chunk_size)
+        return
+
+    run(multipliers, args.tenure, args.chunk_size, args.limit, args.dry_run, args.prune)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Microbenchmark for detect_document_requests
+
+Compares the precompiled single-pass detector in document_detection.py with
+the previous implementation (one re.search per pattern per reply) over a
+corpus of agent replies, and checks both return the same inputs.
+
+Usage:
+    uv run benchmark_document_detection.py
+    uv run benchmark_document_detection.py --iterations 20000
+"""
+
+import re
+import argparse
+import timeit
+from typing import Dict, List
+
+from document_detection import (
+    ALLOWED_DOCUMENT_TYPES,
+    UPLOAD_CONTEXT_PATTERNS,
+    detect_document_requests,
+)
+
+# Replies in the style the master agent produces across conversation stages
+CORPUS = [
+    "Namaste! I'm Vittam, your personal loan assistant from Tata Capital. How can I help you today?",
+    "Sure! To get started, could you please share your PAN number so I can verify your KYC details?",
+    "Thank you, Rahul. Your PAN has been verified successfully. How much loan amount are you looking for, and for what tenure?",
+    "Great news! You're pre-approved for up to ₹5,00,000 at 10.99% p.a. For ₹3,00,000 over 36 months your EMI would be ₹9,821.",
+    "I understand the interest rate is a concern. With a 48-month tenure your EMI drops to ₹7,755, and there are no prepayment charges after 12 months.",
+    "To proceed, please upload the following documents:\n1. identity_proof - Aadhaar Card / Voter ID / Passport / Driving License\n2. address_proof\n3. bank_statement for the last 3 months",
+    "Please upload your Identity Proof (Aadhaar, Voter ID, Passport or Driving License), Address Proof and your Bank Statement for the last 3 months.",
+    "Your requested amount is above your pre-approved limit, so we need your salary slip for the last 2 months. Please upload your salary_slip.",
+    "Thanks for uploading! I'm verifying your documents now. This usually takes a few seconds.",
+    "Your Identity Proof and Address Proof are verified. However, the bank statement you uploaded appears to be blurry. Could you please upload a clearer copy of your bank_statement?",
+    "We also need an employment certificate confirming at least 1 year of continuous employment. Kindly attach your employment_certificate.",
+    "All your documents have been verified successfully! Could you share your bank account number, IFSC code and account holder name for disbursement?",
+    "Congratulations! Your loan of ₹3,00,000 has been sanctioned. Your sanction letter ID is SL-2024-00123. The amount will be disbursed within 24 hours.",
+    "I've sent an OTP to your registered mobile number ending in 3210. Please enter the 6-digit OTP to continue.",
+    "No problem! Your EMI for ₹2,00,000 over 24 months at 11.49% would be ₹9,370. Would you like to go ahead?",
+    "Please provide your pay slip and a photo ID. A passport or driving licence works too.",
+    "We require the following document: salary account statement for the last 3 months.",
+    "Could you send me your Aadhar card as address proof? Also submit your job certificate if available.",
+    "Our personal loans have processing fees of 2% + GST, no collateral is needed, and you can choose a tenure between 12 and 60 months.",
+    "Unfortunately, based on your credit score of 640, we are unable to approve the loan at this time. You may reapply after 6 months.",
+]
+
+
+# ===== PREVIOUS IMPLEMENTATION =====
+
+
+def legacy_detect_document_requests(response: str) -> List[Dict[str, str]]:
+    """Previous implementation: one re.search per pattern, patterns built on every call."""
+    inputs = []
+    response_lower = response.lower()
+
+    has_upload_context = any(
+        re.search(pattern, response_lower) for pattern in UPLOAD_CONTEXT_PATTERNS
+    )
+
+    if not has_upload_context:
+        return inputs
+
+    detected_docs = set()
+    for doc_id, doc_info in ALLOWED_DOCUMENT_TYPES.items():
+        key_pattern = r"\b" + re.escape(doc_id) + r"\b"
+        if re.search(key_pattern, response_lower):
+            if doc_id not in detected_docs:
+                detected_docs.add(doc_id)
+                inputs.append(
+                    {
+                        "name": doc_info["name"],
+                        "description": doc_info["description"],
+                        "doc_id": doc_id,
+                    }
+                )
+                continue
+
+    for doc_id, doc_info in ALLOWED_DOCUMENT_TYPES.items():
+        if doc_id in detected_docs:
+            continue
+
+        for pattern in doc_info["patterns"]:
+            if re.search(pattern, response_lower):
+                if doc_id not in detected_docs:
+                    detected_docs.add(doc_id)
+                    inputs.append(
+                        {
+                            "name": doc_info["name"],
+                            "description": doc_info["description"],
+                            "doc_id": doc_id,
+                        }
+                    )
+                break
+
+    return inputs
+
+
+# ===== BENCHMARK =====
+
+
+def check_equivalence() -> int:
+    """Assert both implementations agree on every reply. Returns replies with inputs."""
+    with_inputs = 0
+    for reply in CORPUS:
+        expected = legacy_detect_document_requests(reply)
+        actual = detect_document_requests(reply)
+        assert actual == expected, f"Mismatch for reply: {reply!r}\n  legacy: {expected}\n  new:    {actual}"
+        with_inputs += bool(actual)
+    return with_inputs
+
+
+def run_corpus(detector) -> None:
+    for reply in CORPUS:
+        detector(reply)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detect_document_requests")
+    parser.add_argument("--iterations", type=int, default=5000, help="Passes over the corpus (default: 5000)")
+    args = parser.parse_args()
+
+    with_inputs = check_equivalence()
+    print(f"Corpus: {len(CORPUS)} replies ({with_inputs} requesting documents) - outputs identical")
+
+    replies = args.iterations * len(CORPUS)
+    results = {}
+    for label, detector in [
+        ("legacy (per-pattern re.search)", legacy_detect_document_requests),
+        ("precompiled single pass", detect_document_requests),
+    ]:
+        seconds = min(timeit.repeat(lambda: run_corpus(detector), number=args.iterations, repeat=3))
+        results[label] = seconds
+        print(f"{label:32s} {seconds * 1e6 / replies:8.2f} µs/reply")
+
+    legacy, new = results.values()
+    print(f"Speedup: {legacy / new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark for recording uploaded documents under concurrency
+
+Uploads every document type to one session at once (as the widget does)
+and checks the session's documents list afterwards, comparing:
+- legacy: find the document, upsert it, re-read the session, rebuild its
+  documents list in Python and write it back (read-modify-write)
+- atomic: _save_document - find_one_and_update upsert plus $addToSet on
+  the session, in a transaction where the deployment supports one
+Reports, per implementation, document ids missing from the session
+(lost updates), MongoDB round trips per upload and time per round.
+
+Only the database writes are exercised (no file storage). Runs against
+MONGO_URI in throwaway sessions, which are deleted afterwards.
+
+Usage:
+    uv run benchmark_document_uploads.py
+    uv run benchmark_document_uploads.py --rounds 50 --threads 10
+"""
+
+import time
+import uuid
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+
+from database import documents_collection, sessions_collection, start_round_trip_count
+from document_detection import ALLOWED_DOCUMENT_TYPES
+from document_service import _save_document
+from session_service import create_session, get_session, update_session
+
+
+# ===== PREVIOUS IMPLEMENTATION =====
+
+
+def legacy_save_document(session_id: str, doc_id: str, doc_name: str, file_path: str) -> ObjectId:
+    """Previous create_document database path (after the session check)."""
+    existing = documents_collection.find_one({"session_id": session_id, "doc_id": doc_id})
+    doc_id_obj = existing["_id"] if existing else ObjectId()
+    documents_collection.update_one(
+        {"session_id": session_id, "doc_id": doc_id},
+        {"$set": {
+            "_id": doc_id_obj,
+            "session_id": session_id,
+            "doc_id": doc_id,
+            "doc_name": doc_name,
+            "file_path": file_path,
+            "uploaded_at": datetime.now(timezone.utc),
+            "verification_status": "pending",
+        }},
+        upsert=True
+    )
+    session = get_session(session_id)
+    if session:
+        documents = [ObjectId(did) if isinstance(did, str) else did for did in session.get("documents", [])]
+        if not any(str(did) == str(doc_id_obj) for did in documents):
+            documents.append(doc_id_obj)
+            update_session(session_id, documents=documents)
+    return doc_id_obj
+
+
+def atomic_save_document(session_id: str, doc_id: str, doc_name: str, file_path: str) -> ObjectId:
+    document = _save_document(
+        session_id=session_id,
+        doc_id=doc_id,
+        doc_name=doc_name,
+        original_filename=file_path,
+        file_path=file_path,
+        file_size=0,
+        remote=False,
+        content_sha256=None,
+    )
+    return document["_id"]
+
+
+# ===== BENCHMARK =====
+
+
+def run_round(save: Callable[..., ObjectId], doc_ids: List[str], executor: ThreadPoolExecutor, barrier_size: int) -> Dict[str, float]:
+    """Upload every doc_id to a new session concurrently; returns lost ids, round trips and time."""
+    session_id = f"benchmark-{uuid.uuid4()}"
+    create_session(session_id)
+    barrier = threading.Barrier(barrier_size)
+
+    def upload(doc_id: str):
+        counter = start_round_trip_count()
+        barrier.wait()  # start all uploads together
+        document_id = save(session_id, doc_id, ALLOWED_DOCUMENT_TYPES[doc_id]["name"], f"{session_id}/{doc_id}.pdf")
+        return document_id, counter[0]
+
+    started = time.perf_counter()
+    results = list(executor.map(upload, doc_ids))
+    elapsed = time.perf_counter() - started
+
+    linked = {str(did) for did in get_session(session_id).get("documents", [])}
+    lost = sum(1 for document_id, _ in results if str(document_id) not in linked)
+    sessions_collection.delete_one({"session_id": session_id})
+    documents_collection.delete_many({"session_id": session_id})
+    return {"lost": lost, "round_trips": sum(trips for _, trips in results), "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent document uploads to one session")
+    parser.add_argument("--rounds", type=int, default=20, help="Sessions to upload to (default: 20)")
+    parser.add_argument("--threads", type=int, default=len(ALLOWED_DOCUMENT_TYPES), help="Concurrent uploads per session (default: one per document type)")
+    args = parser.parse_args()
+
+    doc_types = list(ALLOWED_DOCUMENT_TYPES)
+    doc_ids = [doc_types[i % len(doc_types)] for i in range(args.threads)]
+    print(f"{args.rounds} sessions, {len(doc_ids)} concurrent uploads each")
+    print()
+    print(f"{'implementation':16} {'lost ids':>9} {'sessions hit':>13} {'trips/upload':>13} {'ms/round':>9}")
+
+    with ThreadPoolExecutor(max_workers=len(doc_ids)) as executor:
+        for label, save in [("legacy", legacy_save_document), ("atomic", atomic_save_document)]:
+            rounds = [run_round(save, doc_ids, executor, len(doc_ids)) for _ in range(args.rounds)]
+            lost = sum(r["lost"] for r in rounds)
+            sessions_hit = sum(1 for r in rounds if r["lost"])
+            trips = sum(r["round_trips"] for r in rounds) / (args.rounds * len(doc_ids))
+            ms = sum(r["seconds"] for r in rounds) / args.rounds * 1000
+            print(f"{label:16} {lost:9d} {sessions_hit:13d} {trips:13.1f} {ms:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
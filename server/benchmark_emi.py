@@ -0,0 +1,142 @@
+"""
+Microbenchmark for the EMI engine
+
+Compares emi_engine.py with the previous scalar calculate_emi (one Python
+float calculation per loan) for:
+- a sales comparison table (amounts x tenures)
+- a large batch of loans (e.g. a portfolio re-price)
+- amortization schedules built month by month in a loop
+- the single-EMI calculate_emi path, which repeats the same inputs within a
+  chat turn (memoized emi_summary)
+and checks the vectorized results match the scalar ones to the paisa.
+
+Usage:
+    uv run benchmark_emi.py
+    uv run benchmark_emi.py --loans 100000 --iterations 20
+"""
+
+import argparse
+import timeit
+from typing import Dict, List
+
+import numpy as np
+
+from emi_engine import amortization_schedule, batch_emi, emi_summary, emi_table
+
+TABLE_AMOUNTS = [200000.0, 300000.0, 500000.0]
+TABLE_TENURES = [12, 24, 36, 48, 60]
+
+
+# ===== PREVIOUS IMPLEMENTATION =====
+
+
+def legacy_emi(loan_amount: float, tenure_months: int, interest_rate: float) -> Dict:
+    """Previous services.calculate_emi arithmetic (without logging)."""
+    monthly_rate = interest_rate / (12 * 100)
+    emi = (
+        loan_amount
+        * monthly_rate
+        * ((1 + monthly_rate) ** tenure_months)
+        / (((1 + monthly_rate) ** tenure_months) - 1)
+    )
+    total_amount = emi * tenure_months
+    return {"emi": emi, "total_amount": total_amount, "total_interest": total_amount - loan_amount}
+
+
+def legacy_schedule(loan_amount: float, tenure_months: int, interest_rate: float) -> List[Dict]:
+    """Month-by-month loop, as a schedule would be built on top of calculate_emi."""
+    monthly_rate = interest_rate / (12 * 100)
+    emi = legacy_emi(loan_amount, tenure_months, interest_rate)["emi"]
+    balance = loan_amount
+    rows = []
+    for month in range(1, tenure_months + 1):
+        interest = balance * monthly_rate
+        principal = emi - interest if month < tenure_months else balance
+        balance = balance - principal
+        rows.append({"month": month, "principal": principal, "interest": interest, "balance": balance})
+    return rows
+
+
+# ===== BENCHMARK =====
+
+
+def make_loans(count: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    amounts = rng.integers(50, 4000, count) * 1000.0
+    tenures = rng.choice([12, 24, 36, 48, 60], count)
+    rates = rng.uniform(10.5, 24.0, count).round(2)
+    return amounts, tenures, rates
+
+
+def check_equivalence(amounts, tenures, rates) -> None:
+    """Vectorized EMIs and schedules match the scalar arithmetic (rounded to paise)."""
+    batch = batch_emi(amounts, tenures, rates)
+    for i in range(len(amounts)):
+        expected = legacy_emi(float(amounts[i]), int(tenures[i]), float(rates[i]))
+        assert round(expected["emi"], 2) == round(float(batch.emi[i]), 2), f"EMI mismatch for loan {i}"
+        assert abs(expected["total_interest"] - float(batch.total_interest[i])) < 0.01, f"Interest mismatch for loan {i}"
+
+    for i in range(min(len(amounts), 50)):
+        expected = legacy_schedule(float(amounts[i]), int(tenures[i]), float(rates[i]))
+        schedule = amortization_schedule(amounts[i], tenures[i], rates[i])
+        assert np.allclose(schedule.principal, [row["principal"] for row in expected], atol=0.005)
+        assert np.allclose(schedule.interest, [row["interest"] for row in expected], atol=0.005)
+        assert np.allclose(schedule.balance, [row["balance"] for row in expected], atol=0.01)
+
+
+def report(label: str, legacy_seconds: float, new_seconds: float, unit: str, count: int) -> None:
+    print(f"{label}")
+    print(f"  legacy (scalar loop)   {legacy_seconds * 1e6 / count:10.3f} µs/{unit}")
+    print(f"  emi_engine (NumPy)     {new_seconds * 1e6 / count:10.3f} µs/{unit}")
+    print(f"  Speedup: {legacy_seconds / new_seconds:.2f}x")
+
+
+def best_of(fn, iterations: int) -> float:
+    return min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized EMI engine")
+    parser.add_argument("--loans", type=int, default=10000, help="Loans in the batch benchmark (default: 10000)")
+    parser.add_argument("--schedules", type=int, default=200, help="Loans in the schedule benchmark (default: 200)")
+    parser.add_argument("--iterations", type=int, default=10, help="Timed runs per measurement (default: 10)")
+    args = parser.parse_args()
+
+    amounts, tenures, rates = make_loans(args.loans)
+    check_equivalence(amounts, tenures, rates)
+    print(f"Checked {args.loans} EMIs and {min(args.loans, 50)} schedules - results match the scalar path")
+    print()
+
+    # Sales comparison table: amounts x tenures at one rate
+    cells = len(TABLE_AMOUNTS) * len(TABLE_TENURES)
+    legacy = best_of(lambda: [[legacy_emi(a, t, 11.5) for t in TABLE_TENURES] for a in TABLE_AMOUNTS], args.iterations * 100)
+    new = best_of(lambda: emi_table(TABLE_AMOUNTS, TABLE_TENURES, 11.5), args.iterations * 100)
+    report(f"EMI table ({len(TABLE_AMOUNTS)} amounts x {len(TABLE_TENURES)} tenures)", legacy, new, "table", 1)
+    print(f"  ({cells} EMIs per table)")
+    print()
+
+    # Batch of loans
+    loans = list(zip(amounts.tolist(), tenures.tolist(), rates.tolist()))
+    legacy = best_of(lambda: [legacy_emi(a, t, r) for a, t, r in loans], args.iterations)
+    new = best_of(lambda: batch_emi(amounts, tenures, rates), args.iterations)
+    report(f"Batch EMI ({args.loans} loans)", legacy, new, "loan", args.loans)
+    print()
+
+    # Amortization schedules
+    count = args.schedules
+    legacy = best_of(lambda: [legacy_schedule(a, t, r) for a, t, r in loans[:count]], args.iterations)
+    new = best_of(lambda: amortization_schedule(amounts[:count], tenures[:count], rates[:count]), args.iterations)
+    report(f"Amortization schedules ({count} loans)", legacy, new, "schedule", count)
+    print()
+
+    # calculate_emi: four calls with the same inputs per chat turn
+    emi_summary.cache_clear()
+    legacy = best_of(lambda: [legacy_emi(300000.0, 36, 11.5) for _ in range(4)], args.iterations * 100)
+    uncached = best_of(lambda: (emi_summary.cache_clear(), emi_summary(300000.0, 36, 11.5)), args.iterations * 100)
+    new = best_of(lambda: [emi_summary(300000.0, 36, 11.5) for _ in range(4)], args.iterations * 100)
+    report("calculate_emi, 4 calls with the same inputs", legacy, new, "turn", 1)
+    print(f"  (first, uncached emi_summary call: {uncached * 1e6:.3f} µs)")
+
+
+if __name__ == "__main__":
+    main()
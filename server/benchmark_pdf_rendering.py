@@ -0,0 +1,214 @@
+"""
+Benchmark for PDF page rendering in document verification
+
+Compares the previous rendering (first 3 pages at a fixed 2.0x zoom as PNG,
+pages 2-3 discarded for every document type but bank_statement) with
+render_pdf_pages (only the pages that are sent, scaled to a pixel budget,
+JPEG / PNG / JPEG only for scanned pages), reporting per sample set:
+- render time
+- bytes sent to the vision model (base64)
+- estimated image input tokens ("high" detail: 85 + 170 per 512 px tile
+  after the model's downscaling; 85 per image in "low")
+and, with --verify, verification accuracy of each setting against the
+expected verdicts (calls the vision model; needs OPENAI_API_KEY).
+
+Samples are read from --samples DIR laid out as
+    DIR/<doc_id>/<verified|rejected>/<file>.pdf
+Without --samples a synthetic set is generated: a document of each type
+(identity and address proofs with a scanned photo area), plus mismatched
+documents that should be rejected.
+
+Usage:
+    uv run benchmark_pdf_rendering.py
+    uv run benchmark_pdf_rendering.py --samples ./samples --verify
+"""
+
+import math
+import base64
+import argparse
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import fitz
+import numpy as np
+
+from document_verification_service import (
+    DOCUMENT_TYPE_EXPECTATIONS,
+    RENDER_SETTINGS,
+    ImageRenderSettings,
+    render_pdf_pages,
+    verify_document_with_langchain,
+)
+
+SINGLE_PAGE_TYPES = ["identity_proof", "address_proof", "salary_slip", "employment_certificate"]
+
+# Same images the previous implementation sent (detail was not set)
+LEGACY_SETTINGS = ImageRenderSettings(
+    max_pixels=10**9, max_zoom=2.0, image_format="png", quality=95, detail="auto"
+)
+
+SAMPLE_TEXT = {
+    "identity_proof": ["GOVERNMENT OF INDIA", "Aadhaar Card - SPECIMEN", "Name: Rahul Sharma", "DOB: 12/04/1990", "1234 5678 9012"],
+    "address_proof": ["ELECTION COMMISSION OF INDIA", "Voter ID - SPECIMEN", "Name: Rahul Sharma", "Address: 14 MG Road, Pune 411001", "ABC1234567"],
+    "bank_statement": ["HDFC BANK - Account Statement", "Account No: 50100123456789", "Period: 01/01/2024 - 31/03/2024", "Opening Balance: 1,20,000.00"],
+    "salary_slip": ["ACME Technologies Pvt Ltd", "Payslip for March 2024", "Employee: Rahul Sharma", "Gross: 95,000  Deductions: 12,400  Net: 82,600"],
+    "employment_certificate": ["ACME Technologies Pvt Ltd", "Employment Certificate", "This is to certify that Rahul Sharma", "has been employed as Senior Engineer since 01/06/2019"],
+}
+
+
+# ===== SAMPLES =====
+
+
+def make_sample_pdf(path: Path, doc_type: str, pages: int, seed: int, photo: bool) -> None:
+    """Write an A4 PDF with the document's text and optionally a noisy photo area (like a scan)."""
+    rng = np.random.default_rng(seed)
+    document = fitz.open()
+    for page_num in range(pages):
+        page = document.new_page(width=595, height=842)
+        y = 72
+        for line in SAMPLE_TEXT[doc_type]:
+            page.insert_text((72, y), line, fontsize=14)
+            y += 24
+        for row in range(30):
+            page.insert_text((72, y + 20 + row * 16), f"{page_num + 1:02d}/{row + 1:02d}  Transaction reference {rng.integers(10**8, 10**9)}  {rng.integers(100, 99999)}.00", fontsize=9)
+        if photo:
+            pixels = rng.integers(60, 200, size=(240, 320, 3), dtype=np.uint8)
+            pix = fitz.Pixmap(fitz.csRGB, 320, 240, pixels.tobytes(), False)
+            page.insert_image(fitz.Rect(380, 60, 540, 180), pixmap=pix)
+    document.save(path)
+    document.close()
+
+
+def synthetic_samples(directory: Path) -> List[Tuple[Path, str, bool]]:
+    """Correct documents (expected verified) and mismatched ones (expected rejected)."""
+    samples = []
+    for i, doc_type in enumerate(DOCUMENT_TYPE_EXPECTATIONS):
+        path = directory / f"{doc_type}.pdf"
+        # ID documents carry a photo; statements, slips and letters are text only
+        make_sample_pdf(path, doc_type, pages=3 if doc_type == "bank_statement" else 2, seed=i, photo=doc_type in ("identity_proof", "address_proof"))
+        samples.append((path, doc_type, True))
+    # A salary slip uploaded as identity proof, a bank statement as address proof
+    samples.append((directory / "salary_slip.pdf", "identity_proof", False))
+    samples.append((directory / "bank_statement.pdf", "address_proof", False))
+    return samples
+
+
+def load_samples(directory: Path) -> List[Tuple[Path, str, bool]]:
+    samples = []
+    for path in sorted(directory.glob("*/*/*.pdf")):
+        expected = path.parent.name
+        if expected in ("verified", "rejected"):
+            samples.append((path, path.parent.parent.name, expected == "verified"))
+    return samples
+
+
+# ===== PREVIOUS IMPLEMENTATION =====
+
+
+def legacy_render(path: Path, doc_id: str) -> List[bytes]:
+    """Previous path: render 3 pages at 2.0x to PNG, then keep the pages that are sent."""
+    document = fitz.open(path)
+    images = []
+    for page_num in range(min(len(document), 3)):
+        pix = document[page_num].get_pixmap(matrix=fitz.Matrix(2.0, 2.0))
+        images.append(pix.tobytes("png"))
+    document.close()
+    return images[:1] if doc_id in SINGLE_PAGE_TYPES else images
+
+
+# ===== BENCHMARK =====
+
+
+def image_tokens(image: bytes, detail: str) -> int:
+    """Vision input tokens for one image, per OpenAI's published tiling rules."""
+    if detail == "low":
+        return 85
+    pix = fitz.Pixmap(image)
+    width, height = pix.width, pix.height
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def measure(samples, render, iterations: int, detail: str) -> Dict[str, float]:
+    """Best-of-iterations render time, base64 bytes and image tokens sent for the whole set."""
+    best = float("inf")
+    for _ in range(iterations):
+        started = time.perf_counter()
+        images = [render(path, doc_id) for path, doc_id, _ in samples]
+        best = min(best, time.perf_counter() - started)
+    pages = [image for sample_images in images for image in sample_images]
+    return {
+        "seconds": best,
+        "bytes": sum(len(base64.b64encode(image)) for image in pages),
+        "tokens": sum(image_tokens(image, detail) for image in pages),
+    }
+
+
+def accuracy(samples, settings: ImageRenderSettings) -> Tuple[int, int]:
+    """Verdicts matching the expected ones, calling the vision model per sample."""
+    correct = 0
+    for path, doc_id, expected in samples:
+        doc_name = doc_id.replace("_", " ").title()
+        result = verify_document_with_langchain(path, doc_id, doc_name, settings=settings)
+        correct += result["verified"] == expected
+    return correct, len(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF page rendering for document verification")
+    parser.add_argument("--samples", type=Path, help="Sample directory (<doc_id>/<verified|rejected>/*.pdf)")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed runs per setting (default: 5)")
+    parser.add_argument("--verify", action="store_true", help="Also measure verification accuracy (calls the vision model)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        samples = load_samples(args.samples) if args.samples else synthetic_samples(Path(tmp))
+        if not samples:
+            parser.error(f"No samples found in {args.samples}")
+        print(f"{len(samples)} samples, best of {args.iterations} runs")
+        print()
+
+        def render_with(settings: ImageRenderSettings):
+            def render(path: Path, doc_id: str) -> List[bytes]:
+                pages = 1 if doc_id in SINGLE_PAGE_TYPES else 3
+                return [image for image, _ in render_pdf_pages(path, max_pages=pages, settings=settings)]
+            return render
+
+        settings = {
+            "legacy (3 pages, 2.0x PNG)": None,
+            "lazy pages, 2.0x PNG": LEGACY_SETTINGS,
+            f"budget {RENDER_SETTINGS.max_pixels} px, PNG": replace(RENDER_SETTINGS, image_format="png"),
+            f"budget {RENDER_SETTINGS.max_pixels} px, JPEG q{RENDER_SETTINGS.quality}": replace(RENDER_SETTINGS, image_format="jpeg"),
+            f"budget {RENDER_SETTINGS.max_pixels} px, auto": replace(RENDER_SETTINGS, image_format="auto"),
+            f"budget {RENDER_SETTINGS.max_pixels} px, auto, detail low": replace(RENDER_SETTINGS, image_format="auto", detail="low"),
+        }
+
+        baseline = measure(samples, legacy_render, args.iterations, "auto")
+        print(f"{'setting':40} {'render ms':>10} {'KB sent':>10} {'vs legacy':>10} {'tokens':>8}")
+        for label, setting in settings.items():
+            result = baseline if setting is None else measure(samples, render_with(setting), args.iterations, setting.detail)
+            print(
+                f"{label:40} {result['seconds'] * 1000:10.1f} {result['bytes'] / 1024:10.1f} "
+                f"{baseline['bytes'] / result['bytes']:9.2f}x {result['tokens']:8d}"
+            )
+
+        if args.verify:
+            print()
+            print("Verification accuracy")
+            for label, setting in [
+                ("legacy images", LEGACY_SETTINGS),
+                (f"configured ({RENDER_SETTINGS.image_format}, detail {RENDER_SETTINGS.detail})", RENDER_SETTINGS),
+                ("configured, detail low", replace(RENDER_SETTINGS, detail="low")),
+            ]:
+                correct, total = accuracy(samples, setting)
+                print(f"  {label:40} {correct}/{total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark for process startup (module import) time
+
+Imports each module in a fresh interpreter, as a worker process, CLI
+script or test run would, and reports the best wall time of --runs:
+- database: MongoDB client and collections
+- services, main: tools and agents (import database)
+- app: the FastAPI application
+Failures are reported too (e.g. when importing needs a reachable MongoDB).
+
+Runs against MONGO_URI from the environment / .env; pass --mongo-uri to
+try another, e.g. an unreachable server to see whether importing blocks:
+    uv run benchmark_startup.py --mongo-uri "mongodb://10.255.255.1/vittam?serverSelectionTimeoutMS=5000"
+
+Usage:
+    uv run benchmark_startup.py
+    uv run benchmark_startup.py --runs 5 --modules database app
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Optional, Tuple
+
+DEFAULT_MODULES = ["database", "services", "main", "app"]
+
+
+def time_import(module: str, env: dict) -> Tuple[float, Optional[str]]:
+    """Wall time to start an interpreter and import module, and the error if it failed."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=Path(__file__).parent,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return elapsed, lines[-1] if lines else f"exit code {result.returncode}"
+    return elapsed, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark module import (startup) time")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help=f"Modules to import (default: {' '.join(DEFAULT_MODULES)})")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per module, best is reported (default: 3)")
+    parser.add_argument("--mongo-uri", help="MONGO_URI to use instead of the configured one")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.mongo_uri:
+        env["MONGO_URI"] = args.mongo_uri
+
+    baseline, _ = min(time_import("sys", env) for _ in range(args.runs))
+    print(f"Interpreter startup: {baseline * 1000:.0f} ms (subtracted below)")
+    print()
+    print(f"{'module':12} {'import ms':>10}  result")
+    for module in args.modules:
+        elapsed, error = min(time_import(module, env) for _ in range(args.runs))
+        print(f"{module:12} {(elapsed - baseline) * 1000:10.0f}  {(error or 'ok')[:100]}")
+
+
+if __name__ == "__main__":
+    main()
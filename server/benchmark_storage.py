@@ -0,0 +1,121 @@
+"""
+Benchmark for document storage backends
+
+Measures LocalStorage and S3Storage (against S3_ENDPOINT_URL, or an
+in-process stub_s3_server with --start-stub) on document-sized files:
+- put: sequential, and concurrent through aput
+- get: sequential, and concurrent through aget
+- get_range: first 64 KB (e.g. a PDF header), sequential
+Reported as files/s and MB/s per operation.
+
+The concurrent runs show the S3 client's connection pool at work: with
+S3_MAX_POOL_CONNECTIONS at least --concurrency, requests reuse warm
+keep-alive connections instead of queuing for one.
+
+Usage:
+    uv run benchmark_storage.py --start-stub --latency 0.02
+    uv run benchmark_storage.py --files 50 --size-kb 2048 --concurrency 16
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import boto3
+from botocore.config import Config
+
+from config import s3_config
+from storage import LocalStorage, S3Storage, StorageBackend
+from stub_s3_server import make_server
+
+RANGE_BYTES = 64 * 1024
+
+
+def timed(operation: Callable[[], None]) -> float:
+    started = time.perf_counter()
+    operation()
+    return time.perf_counter() - started
+
+
+def run_backend(backend: StorageBackend, payloads: List[bytes], concurrency: int) -> Dict[str, float]:
+    """Seconds taken by each operation over all payloads."""
+    keys = [f"benchmark/{i}.pdf" for i in range(len(payloads))]
+
+    async def gather(make_call):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(i):
+            async with semaphore:
+                await make_call(i)
+
+        await asyncio.gather(*(limited(i) for i in range(len(keys))))
+
+    results = {
+        "put": timed(lambda: [backend.put_bytes(key, data) for key, data in zip(keys, payloads)]),
+        "get": timed(lambda: [backend.get(key) for key in keys]),
+        "get_range": timed(lambda: [backend.get_range(key, 0, RANGE_BYTES) for key in keys]),
+        "aput": timed(lambda: asyncio.run(gather(lambda i: backend.aput(keys[i], payloads[i])))),
+        "aget": timed(lambda: asyncio.run(gather(lambda i: backend.aget(keys[i])))),
+    }
+    for key in keys:
+        backend.delete(key)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document storage backends")
+    parser.add_argument("--files", type=int, default=40, help="Files per operation (default: 40)")
+    parser.add_argument("--size-kb", type=int, default=1024, help="File size in KB (default: 1024)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests for aput/aget (default: 8)")
+    parser.add_argument("--endpoint", default=os.getenv("S3_ENDPOINT_URL"), help="S3-compatible endpoint (default: S3_ENDPOINT_URL)")
+    parser.add_argument("--bucket", default=os.getenv("BUCKET_NAME") or "benchmark")
+    parser.add_argument("--start-stub", action="store_true", help="Run stub_s3_server in-process and use it as the endpoint")
+    parser.add_argument("--latency", type=float, default=0.0, help="Per-request latency of the stub server (default: 0)")
+    parser.add_argument("--skip-s3", action="store_true", help="Only benchmark local storage")
+    args = parser.parse_args()
+
+    if args.start_stub:
+        server = make_server(port=0, latency=args.latency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "stub")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "stub")
+        print(f"Stub S3 server on {args.endpoint} (latency {args.latency}s)")
+
+    payloads = [os.urandom(args.size_kb * 1024) for _ in range(args.files)]
+    total_mb = args.files * args.size_kb / 1024
+    print(f"{args.files} files of {args.size_kb} KB, concurrency {args.concurrency}")
+    print()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {"local": LocalStorage(Path(tmp))}
+        if not args.skip_s3:
+            if not args.endpoint and not os.getenv("AWS_ACCESS_KEY_ID"):
+                parser.error("S3 needs --endpoint, --start-stub or AWS credentials (or pass --skip-s3)")
+            client = boto3.client(
+                "s3",
+                endpoint_url=args.endpoint,
+                region_name=os.getenv("AWS_REGION") or "us-east-1",
+                # Same pool, timeouts and retries as the app's client
+                config=s3_config.merge(Config(
+                    s3={"addressing_style": "path"} if args.endpoint else None,
+                    request_checksum_calculation="when_required" if args.endpoint else None,
+                    response_checksum_validation="when_required" if args.endpoint else None,
+                )),
+            )
+            backends["s3"] = S3Storage(args.bucket, client)
+
+        print(f"{'backend':8} {'operation':10} {'seconds':>8} {'files/s':>9} {'MB/s':>9}")
+        for name, backend in backends.items():
+            for operation, seconds in run_backend(backend, payloads, args.concurrency).items():
+                megabytes = args.files * RANGE_BYTES / 2**20 if operation == "get_range" else total_mb
+                print(f"{name:8} {operation:10} {seconds:8.3f} {args.files / seconds:9.1f} {megabytes / seconds:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
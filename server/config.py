@@ -1,11 +1,36 @@
 import boto3
 import os
+from botocore.config import Config
+
+# Set S3_ENDPOINT_URL to use an S3-compatible store instead of AWS (MinIO,
+# or stub_s3_server.py for local testing and benchmarks)
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+
+# Connection pool shared by all threads using the client (boto3's default is
+# 10, fewer than the threads that verify and upload documents at once)
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50"))
+
+s3_config = Config(
+    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+    connect_timeout=float(os.getenv("S3_CONNECT_TIMEOUT_SECONDS", "5")),
+    read_timeout=float(os.getenv("S3_READ_TIMEOUT_SECONDS", "30")),
+    retries={"mode": "standard", "max_attempts": int(os.getenv("S3_MAX_ATTEMPTS", "3"))},
+    tcp_keepalive=True,
+    # SigV4 presigned URLs sign Content-Length and checksum headers too
+    signature_version="s3v4",
+    # S3-compatible stand-ins expect path-style URLs and plain (un-chunked) bodies
+    s3={"addressing_style": "path"} if S3_ENDPOINT_URL else None,
+    request_checksum_calculation="when_required" if S3_ENDPOINT_URL else None,
+    response_checksum_validation="when_required" if S3_ENDPOINT_URL else None,
+)
 
 s3 = boto3.client(
     "s3",
     aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
     aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
     region_name=os.getenv("AWS_REGION"),
+    endpoint_url=S3_ENDPOINT_URL,
+    config=s3_config,
 )
 
 BUCKET_NAME = os.getenv("BUCKET_NAME")
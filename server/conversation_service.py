@@ -2,6 +2,7 @@
 
 from datetime import datetime, timezone
 from typing import Optional, List
+from bson import ObjectId
 from database import conversations_collection
 from models import Conversation
 
@@ -23,3 +24,33 @@ def create_conversation(session_id: str, role: str, content: str, agent_type: Op
 def get_conversations(session_id: str, limit: int = 100) -> List[Conversation]:
     """Get all conversations for a session"""
     return list(conversations_collection.find({"session_id": session_id}).sort("created_at", 1).limit(limit))  # type: ignore
+
+
+def get_conversations_since(
+    session_id: str,
+    since: Optional[datetime] = None,
+    limit: int = 100,
+    since_id: Optional[ObjectId] = None,
+    latest: bool = False
+) -> List[Conversation]:
+    """
+    Get conversations for a session after the (since, since_id) cursor (all if
+    since is None), oldest first. Messages share a created_at (same millisecond)
+    so _id breaks ties. With latest, the newest `limit` are returned instead of
+    the oldest.
+    """
+    query = {"session_id": session_id}
+    if since and since_id:
+        query["$or"] = [  # type: ignore
+            {"created_at": {"$gt": since}},
+            {"created_at": since, "_id": {"$gt": since_id}}
+        ]
+    elif since:
+        query["created_at"] = {"$gt": since}  # type: ignore
+    order = -1 if latest else 1
+    conversations = list(
+        conversations_collection.find(query).sort([("created_at", order), ("_id", order)]).limit(limit)
+    )
+    if latest:
+        conversations.reverse()
+    return conversations  # type: ignore
@@ -10,9 +10,19 @@ Collections:
 - users: User documents
 - kycs: KYC documents
 - offer_template: Offer template documents
+- documents: Uploaded document entries
+- sanctions: Sanction letters
+- eligibility_scores: Batch eligibility results (batch_eligibility.py)
+- notification_outbox: Outgoing WhatsApp notifications (notification_outbox.py)
+- verification_jobs: Document verification job queue (verification_jobs.py)
+- verification_cache: Verdicts for identical uploads (verification_cache.py)
 
 The script only creates collections/indexes if they don't exist,
 and verifies that existing indexes match the required configuration.
+It is the only place indexes are created (database.py no longer does on
+import); runner.py runs it once before starting the server workers, or run
+it as a deploy step:
+    uv run create_tables.py
 """
 
 import os
@@ -27,9 +37,6 @@ load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 
-if not MONGO_URI:
-    raise ValueError("MONGO_URI not set in environment variables")
-
 
 def normalize_index_key(key_spec: Any) -> Dict[str, int]:
     """Normalize index key specification to a dict format."""
@@ -68,6 +75,13 @@ def index_matches(required: Dict[str, Any], existing: Dict[str, Any]) -> bool:
     if required_unique != existing_unique or required_sparse != existing_sparse:
         return False
     
+    # TTL indexes must have the same expiry
+    if required.get("expireAfterSeconds") != existing.get("expireAfterSeconds"):
+        return False
+    
+    if required.get("partialFilterExpression") != existing.get("partialFilterExpression"):
+        return False
+    
     return True
 
 
@@ -177,6 +191,9 @@ def setup_collection(
 def create_collections_and_indexes():
     """Create all collections and indexes for the application."""
     
+    if not MONGO_URI:
+        raise ValueError("MONGO_URI not set in environment variables")
+    
     # Connect to MongoDB
     print("Connecting to MongoDB...")
     client = MongoClient(MONGO_URI)
@@ -197,7 +214,8 @@ def create_collections_and_indexes():
         {"key": "session_id", "name": "session_id_1"},
         {"key": "created_at", "name": "created_at_1"},
         {"key": "agent_type", "name": "agent_type_1"},
-        {"key": [("session_id", 1), ("created_at", 1)], "name": "session_id_1_created_at_1"},
+        # History reads sort on (created_at, _id) within a session
+        {"key": [("session_id", 1), ("created_at", 1), ("_id", 1)], "name": "session_id_1_created_at_1__id_1"},
     ]
     
     users_indexes = [
@@ -220,6 +238,45 @@ def create_collections_and_indexes():
         {"key": [("min_amount", 1), ("max_amount", 1)], "name": "min_amount_1_max_amount_1"},
     ]
     
+    documents_indexes = [
+        {"key": "session_id", "name": "session_id_1"},
+        {"key": [("session_id", 1), ("doc_id", 1)], "unique": True, "name": "session_id_1_doc_id_1"},
+    ]
+    
+    sanctions_indexes = [
+        {"key": "customer_id", "name": "customer_id_1"},
+        {"key": "session_id", "name": "session_id_1"},
+        {"key": "created_at", "name": "created_at_1"},
+    ]
+    
+    eligibility_scores_indexes = [
+        {"key": "customer_id", "unique": True, "name": "customer_id_1"},
+        {"key": [("campaign", 1), ("max_eligible_amount", -1)], "name": "campaign_1_max_eligible_amount_-1"},
+        {"key": "run_id", "name": "run_id_1"},
+    ]
+    
+    notification_outbox_indexes = [
+        {"key": [("status", 1), ("next_attempt_at", 1)], "name": "status_1_next_attempt_at_1"},
+        {"key": "sanction_id", "name": "sanction_id_1"},
+    ]
+    
+    verification_jobs_indexes = [
+        {"key": [("status", 1), ("created_at", 1)], "name": "status_1_created_at_1"},
+        {"key": [("session_id", 1), ("status", 1)], "name": "session_id_1_status_1"},
+        # One queued job per piece of work (verification_jobs._enqueue)
+        {
+            "key": "dedupe_key",
+            "unique": True,
+            "partialFilterExpression": {"dedupe_key": {"$exists": True}},
+            "name": "dedupe_key_1",
+        },
+        {"key": "finished_at", "expireAfterSeconds": 7 * 24 * 3600, "name": "finished_at_1"},
+    ]
+    
+    verification_cache_indexes = [
+        {"key": "created_at", "expireAfterSeconds": 30 * 24 * 3600, "name": "created_at_1"},
+    ]
+    
     # Setup all collections
     results = []
     results.append(setup_collection(db, "sessions", sessions_indexes))
@@ -227,6 +284,12 @@ def create_collections_and_indexes():
     results.append(setup_collection(db, "users", users_indexes))
     results.append(setup_collection(db, "kycs", kycs_indexes))
     results.append(setup_collection(db, "offer_template", offer_template_indexes))
+    results.append(setup_collection(db, "documents", documents_indexes))
+    results.append(setup_collection(db, "sanctions", sanctions_indexes))
+    results.append(setup_collection(db, "eligibility_scores", eligibility_scores_indexes))
+    results.append(setup_collection(db, "notification_outbox", notification_outbox_indexes))
+    results.append(setup_collection(db, "verification_jobs", verification_jobs_indexes))
+    results.append(setup_collection(db, "verification_cache", verification_cache_indexes))
     
     # Print summary
     print("\n" + "="*60)
@@ -0,0 +1,108 @@
+"""
+Customer Cache - Cached customer profiles for services.py
+
+A customer profile is the merged users + kycs record built by
+_build_customer_data. One chat turn asks for the same profile many times
+(offers, eligibility, credit score, pre-approved limit, sanction), and
+every lookup is two find_one calls. Profiles are cached at two levels:
+- a per-request memo, started for each chat turn, so a turn sees one
+  consistent profile and never queries the same customer twice
+- a process-wide TTL/LRU cache shared across requests
+
+Only customers that exist are cached. Call invalidate_customer() after
+changing a customer's users or kycs document; otherwise entries expire
+after CUSTOMER_CACHE_TTL_SECONDS.
+
+The process cache is per process: invalidating only clears the worker that
+handles the call, and other API / worker processes serve the old profile
+until it expires. Keep CUSTOMER_CACHE_TTL_SECONDS as short as stale profiles
+may be served in multi-worker deployments (default 60 s).
+"""
+
+import os
+import copy
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+from ttl_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Also the longest other processes may serve a profile after invalidate_customer()
+CUSTOMER_CACHE_TTL_SECONDS = float(os.getenv("CUSTOMER_CACHE_TTL_SECONDS", "60"))
+CUSTOMER_CACHE_MAX_ENTRIES = int(os.getenv("CUSTOMER_CACHE_MAX_ENTRIES", "10000"))
+
+# ("phone", normalized_phone) or ("pan", PAN)
+CacheKey = Tuple[str, str]
+
+_customer_cache: TTLLRUCache[Dict[str, Any]] = TTLLRUCache(
+    maxsize=CUSTOMER_CACHE_MAX_ENTRIES, ttl_seconds=CUSTOMER_CACHE_TTL_SECONDS
+)
+
+# Per-request memo. A mutable dict bound to the request's context, so worker
+# threads started by the request share it (as with database round-trip counting).
+_request_memo: ContextVar[Optional[Dict[CacheKey, Dict[str, Any]]]] = ContextVar(
+    "customer_request_memo", default=None
+)
+
+
+def start_customer_memo() -> None:
+    """Start a fresh per-request memo for the current request / CLI turn."""
+    _request_memo.set({})
+
+
+def get_cached_customer(key: CacheKey) -> Optional[Dict[str, Any]]:
+    """Copy of a cached customer profile (request memo first, then process cache), or None."""
+    memo = _request_memo.get()
+    if memo is not None and key in memo:
+        return copy.deepcopy(memo[key])
+
+    customer = _customer_cache.get(key)
+    if customer is None:
+        return None
+    if memo is not None:
+        memo[key] = customer
+    return copy.deepcopy(customer)
+
+
+def cache_customer(key: CacheKey, customer: Dict[str, Any]) -> None:
+    """Store a customer profile loaded from the database."""
+    customer = copy.deepcopy(customer)
+    _customer_cache.set(key, customer)
+    memo = _request_memo.get()
+    if memo is not None:
+        memo[key] = customer
+
+
+def invalidate_customer(phone: Optional[str] = None, pans: Iterable[str] = ()) -> None:
+    """
+    Drop a customer's cached profile, under every key, after their users /
+    kycs data changed (services.invalidate_customer_profile resolves these).
+
+    Args:
+        phone: normalized 10-digit phone (the customer_id)
+        pans: the customer's PANs; the PAN of the cached profile is added
+    """
+    keys = {("pan", pan.upper().strip()) for pan in pans if pan}
+    if phone:
+        keys.add(("phone", phone))
+    # Peek, so invalidating doesn't count as cache lookups
+    for key in list(keys):
+        cached = _customer_cache.peek(key)
+        if cached and cached.get("pan"):
+            keys.add(("pan", cached["pan"].upper()))
+
+    memo = _request_memo.get()
+    for key in keys:
+        _customer_cache.delete(key)
+        if memo is not None:
+            memo.pop(key, None)
+    logger.info(f"[CACHE] Invalidated customer profile - keys: {sorted(keys)}")
+
+
+def get_customer_cache_stats() -> Dict[str, Any]:
+    """Process-wide customer cache counters."""
+    return _customer_cache.stats()
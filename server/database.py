@@ -5,11 +5,22 @@ This module provides:
 - MongoDB client connection
 - Database instance
 - Collection references for sessions and conversations
+- Per-request round-trip counting
+- Transactions where the deployment supports them
+
+Nothing connects at import: the client is created on first use, so worker
+processes, CLI scripts and tests can import services without a reachable
+database. Indexes are set up by the create_tables.py migration (run once
+by runner.py before starting the server), not on import.
 """
 
 import os
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional, TypeVar, cast
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
+from pymongo.client_session import ClientSession
 from pymongo.collection import Collection
 from pymongo.database import Database
 
@@ -17,56 +28,124 @@ from pymongo.database import Database
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
+# Group related writes in transactions on replica sets / sharded clusters
+MONGO_TRANSACTIONS_ENABLED = os.getenv("MONGO_TRANSACTIONS_ENABLED", "true").lower() == "true"
 
 
-if not MONGO_URI:
-    raise ValueError("MONGO_URI not set in environment variables")
+# ===== ROUND-TRIP COUNTING =====
 
-# Create MongoDB client/db object
-client = MongoClient(MONGO_URI)
-db: Database = client.get_default_database()
+# Mutable counter bound to the current request. Worker threads started with
+# run_in_threadpool / run_in_executor copy the context, so they increment the
+# same list as the request that started them.
+_round_trip_counter: ContextVar[Optional[List[int]]] = ContextVar("db_round_trip_counter", default=None)
 
-# Collection references
-sessions_collection: Collection = db["sessions"]
-conversations_collection: Collection = db["conversations"]
-users_collection: Collection = db["users"]
-kycs_collection: Collection = db["kycs"]
-offer_template_collection: Collection = db["offer_template"]
-documents_collection: Collection = db["documents"]
-sanctions_collection: Collection = db["sanctions"]
+
+class RoundTripCounter(monitoring.CommandListener):
+    """Counts commands sent to MongoDB for the request bound in the current context."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        counter = _round_trip_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
+
+def start_round_trip_count() -> List[int]:
+    """Start counting MongoDB round-trips for the current request. Returns the counter."""
+    counter = [0]
+    _round_trip_counter.set(counter)
+    return counter
 
 
-# Create indexes for better query performance
-def create_indexes():
-    """Create database indexes for optimal query performance"""
-    # Index on session_id for conversations (most common query)
-    conversations_collection.create_index("session_id")
+# ===== CLIENT =====
 
-    # Index on session_id for sessions (for lookups)
-    sessions_collection.create_index("session_id", unique=True)
+_client: Optional[MongoClient] = None
+_client_lock = threading.Lock()
 
-    # Index on created_at for both collections (for sorting)
-    sessions_collection.create_index("created_at")
-    conversations_collection.create_index("created_at")
 
-    # Index on is_active for sessions (for filtering active sessions)
-    sessions_collection.create_index("is_active")
+def get_client() -> MongoClient:
+    """The process-wide MongoDB client, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not MONGO_URI:
+                    raise ValueError("MONGO_URI not set in environment variables")
+                _client = MongoClient(MONGO_URI, event_listeners=[RoundTripCounter()])
+    return _client
 
-    # Index on session_id for documents (for lookups)
-    documents_collection.create_index("session_id")
 
-    # Index on doc_id and session_id combination (for unique document per session)
-    documents_collection.create_index([("session_id", 1), ("doc_id", 1)], unique=True)
+def get_db() -> Database:
+    """The database named in MONGO_URI."""
+    return get_client().get_default_database()
 
-    # Index on customer_id for sanctions (for customer history)
-    sanctions_collection.create_index("customer_id")
 
-    # Index on session_id for sanctions (for session lookups)
-    sanctions_collection.create_index("session_id")
+class LazyCollection:
+    """Collection reference that resolves (creating the client) on first use."""
 
-    # Index on created_at for sanctions (for sorting)
-    sanctions_collection.create_index("created_at")
+    def __init__(self, name: str):
+        self._name = name
+        self._collection: Optional[Collection] = None
 
+    def _resolve(self) -> Collection:
+        if self._collection is None:
+            self._collection = get_db()[self._name]
+        return self._collection
 
-# Initialize indexes on import
-create_indexes()
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __getitem__(self, name: str) -> Collection:
+        return self._resolve()[name]
+
+    def __repr__(self) -> str:
+        return f"LazyCollection({self._name!r})"
+
+
+def _collection(name: str) -> Collection:
+    return cast(Collection, LazyCollection(name))
+
+
+# Collection references
+sessions_collection: Collection = _collection("sessions")
+conversations_collection: Collection = _collection("conversations")
+users_collection: Collection = _collection("users")
+kycs_collection: Collection = _collection("kycs")
+offer_template_collection: Collection = _collection("offer_template")
+documents_collection: Collection = _collection("documents")
+sanctions_collection: Collection = _collection("sanctions")
+eligibility_scores_collection: Collection = _collection("eligibility_scores")
+notification_outbox_collection: Collection = _collection("notification_outbox")
+verification_jobs_collection: Collection = _collection("verification_jobs")
+verification_cache_collection: Collection = _collection("verification_cache")
+
+
+# ===== TRANSACTIONS =====
+
+T = TypeVar("T")
+
+# Topologies with multi-document transactions (not standalone servers)
+TRANSACTION_TOPOLOGIES = ("ReplicaSetWithPrimary", "Sharded", "LoadBalanced")
+
+
+def run_in_transaction(callback: Callable[[Optional[ClientSession]], T]) -> T:
+    """
+    Run callback(session) in a transaction (retried on transient errors) where
+    the deployment supports one, otherwise callback(None) - so each write in
+    callback must be safe on its own as well.
+    """
+    if not MONGO_TRANSACTIONS_ENABLED:
+        return callback(None)
+    client = get_client()
+    if client.topology_description.topology_type_name == "Unknown":
+        # Nothing sent yet on this (lazily created) client; a ping discovers the deployment
+        client.admin.command("ping")
+    if client.topology_description.topology_type_name not in TRANSACTION_TOPOLOGIES:
+        return callback(None)
+    with client.start_session() as session:
+        return session.with_transaction(callback)
@@ -0,0 +1,225 @@
+"""
+Document Detection - Document types and upload request detection
+
+Defines the ONLY document types customers can upload and detects, from an
+agent reply, which of them the agent is asking for. All detection patterns
+are compiled once at import into a single alternation, so each reply is
+scanned once however many document types are configured.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# DOCUMENT TYPES - These are the ONLY document types allowed
+ALLOWED_DOCUMENT_TYPES = {
+    "identity_proof": {
+        "name": "Identity Proof",
+        "description": "Aadhaar Card / Voter ID / Passport / Driving License",
+        "mandatory": True,  # Always required
+        "key": "identity_proof",
+        "patterns": [
+            r"identity\s*proof",
+            r"id\s*proof",
+            r"photo\s*id",
+            r"aadhaar",
+            r"aadhar",
+            r"voter\s*id",
+            r"passport",
+            r"driving\s*licen[sc]e",
+        ],
+    },
+    "address_proof": {
+        "name": "Address Proof",
+        "description": "Aadhaar Card / Voter ID / Passport / Driving License",
+        "mandatory": True,  # Always required
+        "key": "address_proof",
+        "patterns": [
+            r"address\s*proof",
+        ],
+    },
+    "bank_statement": {
+        "name": "Bank Statement",
+        "description": "Primary bank statement (salary account) for last 3 months",
+        "mandatory": True,  # Always required
+        "key": "bank_statement",  # Standardized key for AI to use
+        "patterns": [
+            r"bank\s*statement",
+            r"salary\s*account\s*statement",
+        ],
+    },
+    "salary_slip": {
+        "name": "Salary Slips",
+        "description": "Salary slips for last 2 months",
+        "mandatory": False,  # Sometimes required (only for conditional approvals)
+        "key": "salary_slip",  # Standardized key for AI to use
+        "patterns": [
+            r"salary\s*slip",
+            r"pay\s*slip",
+            r"salary\s*certificate",
+        ],
+    },
+    "employment_certificate": {
+        "name": "Employment Certificate",
+        "description": "Certificate confirming at least 1 year of continuous employment",
+        "mandatory": False,  # Sometimes required (only for conditional approvals)
+        "key": "employment_certificate",  # Standardized key for AI to use
+        "patterns": [
+            r"employment\s*certificate",
+            r"employment\s*proof",
+            r"job\s*certificate",
+        ],
+    },
+}
+
+# Document keys list for AI prompts (standardized format)
+DOCUMENT_TYPE_KEYS = {
+    "identity_proof": "identity_proof",
+    "address_proof": "address_proof",
+    "bank_statement": "bank_statement",
+    "salary_slip": "salary_slip",
+    "employment_certificate": "employment_certificate",
+}
+
+# Legacy DOCUMENT_PATTERNS for backward compatibility (uses ALLOWED_DOCUMENT_TYPES)
+DOCUMENT_PATTERNS = {
+    doc_id: {
+        "name": doc_info["name"],
+        "description": doc_info["description"],
+        "patterns": doc_info["patterns"],
+    }
+    for doc_id, doc_info in ALLOWED_DOCUMENT_TYPES.items()
+}
+
+# Patterns that indicate document upload request context
+UPLOAD_CONTEXT_PATTERNS = [
+    r"upload",
+    r"share",
+    r"provide",
+    r"submit",
+    r"send\s*(me|us)?",
+    r"attach",
+    r"need.*document",
+    r"require.*document",
+    r"please.*document",
+]
+
+
+# ===== COMPILED DETECTOR =====
+#
+# All document keys and patterns are joined into one alternation, compiled at
+# import and scanned once per reply. The alternation has no capturing groups,
+# which lets the regex engine skip quickly to offsets starting with a
+# possible first character. At the few offsets that match, the alternatives
+# that can start with the character there are tried in order to find which
+# one the alternation took.
+# Keys come first so that, at a given offset, a key match wins over a pattern.
+#
+# Upload context is a separate precompiled search: its greedy patterns
+# ("need.*document") would otherwise consume the document mentions they span.
+
+_DOC_IDS: List[str] = list(ALLOWED_DOCUMENT_TYPES.keys())
+
+
+def _first_char(pattern: str) -> Optional[str]:
+    """Literal first character a pattern can match, or None if it is not fixed."""
+    if pattern.startswith(r"\b"):
+        pattern = pattern[2:]
+    return pattern[0] if pattern[:1].isalnum() else None
+
+
+def _build_detector() -> Tuple["re.Pattern[str]", Dict[Optional[str], List[Tuple["re.Pattern[str]", str, bool]]]]:
+    """
+    Compile the combined document regex.
+
+    Returns:
+        (combined_regex, alternatives_by_first_char) - alternatives are
+        (regex, doc_id, is_key) in the order they appear in the combined regex;
+        the None bucket holds those without a fixed first character
+    """
+    alternatives: List[Tuple[str, str, bool]] = []
+    for doc_id in _DOC_IDS:
+        alternatives.append((r"\b" + re.escape(doc_id) + r"\b", doc_id, True))
+    for doc_id in _DOC_IDS:
+        for pattern in ALLOWED_DOCUMENT_TYPES[doc_id]["patterns"]:
+            alternatives.append((pattern, doc_id, False))
+
+    combined = re.compile("|".join(f"(?:{pattern})" for pattern, _, _ in alternatives))
+    first_chars = {_first_char(pattern) for pattern, _, _ in alternatives}
+    by_first_char: Dict[Optional[str], List[Tuple["re.Pattern[str]", str, bool]]] = {
+        char: [
+            (re.compile(pattern), doc_id, is_key)
+            for pattern, doc_id, is_key in alternatives
+            if _first_char(pattern) in (char, None)
+        ]
+        for char in first_chars
+    }
+    by_first_char.setdefault(None, [])
+    return combined, by_first_char
+
+
+_DOCUMENT_RE, _DOCUMENT_ALTERNATIVES = _build_detector()
+_UPLOAD_CONTEXT_RE = re.compile("|".join(f"(?:{pattern})" for pattern in UPLOAD_CONTEXT_PATTERNS))
+
+
+def detect_document_requests(response: str) -> List[Dict[str, str]]:
+    """
+    Detect if the agent is asking for document uploads.
+    Returns list of input specifications for documents needed.
+
+    IMPORTANT: Only detects documents from ALLOWED_DOCUMENT_TYPES.
+    The AI must ONLY request these specific document types:
+    - identity_proof (always mandatory)
+    - address_proof (always mandatory)
+    - bank_statement (always mandatory)
+    - salary_slip (sometimes required)
+    - employment_certificate (sometimes required)
+
+    Documents referenced by their standardized key are listed first, then
+    documents matched by natural-language patterns, each in
+    ALLOWED_DOCUMENT_TYPES order.
+
+    Note: PAN is NOT included as agent asks for PAN number directly (not upload)
+    """
+    response_lower = response.lower()
+
+    # Check if response contains upload context
+    if not _UPLOAD_CONTEXT_RE.search(response_lower):
+        return []
+
+    key_matches = set()
+    pattern_matches = set()
+
+    # Single scan over the reply for all document types
+    for match in _DOCUMENT_RE.finditer(response_lower):
+        start = match.start()
+        candidates = _DOCUMENT_ALTERNATIVES.get(response_lower[start], _DOCUMENT_ALTERNATIVES[None])
+        for regex, doc_id, is_key in candidates:
+            if regex.match(response_lower, start):
+                (key_matches if is_key else pattern_matches).add(doc_id)
+                break
+
+    detected = [doc_id for doc_id in _DOC_IDS if doc_id in key_matches]
+    detected += [
+        doc_id for doc_id in _DOC_IDS
+        if doc_id in pattern_matches and doc_id not in key_matches
+    ]
+
+    return [
+        {
+            "name": ALLOWED_DOCUMENT_TYPES[doc_id]["name"],
+            "description": ALLOWED_DOCUMENT_TYPES[doc_id]["description"],
+            "doc_id": doc_id,  # Always include doc_id
+        }
+        for doc_id in detected
+    ]
+
+
+def get_doc_id_from_name(doc_name: str) -> Optional[str]:
+    """
+    Map document display name to doc_id.
+    Returns None if not found.
+    """
+    for doc_key, doc_info in DOCUMENT_PATTERNS.items():
+        if doc_info["name"] == doc_name:
+            return doc_key
+    return None
@@ -2,18 +2,61 @@
 
 import os
 import io
+import hashlib
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, BinaryIO, Dict, Optional, List, Union
 from bson import ObjectId
-from database import documents_collection
+from pymongo import ReturnDocument
+from pymongo.client_session import ClientSession
+from pymongo.errors import DuplicateKeyError
+from database import documents_collection, run_in_transaction
 from models import Document
-from session_service import get_session, update_session
-from config import s3, BUCKET_NAME, BUCKET_PREFIX
+from session_service import add_session_document, get_session
+from config import BUCKET_PREFIX
+from storage import STORE_DIR, STORAGE_CHUNK_BYTES, USE_REMOTE_UPLOAD, get_storage, s3_storage
 
 
-STORE_DIR = Path(__file__).parent / "store"
-USE_REMOTE_UPLOAD = bool(int(os.getenv("USE_REMOTE_UPLOAD", "0")))
+# Largest accepted upload (multi-page bank statements run to several MB)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Presigned direct-to-S3 uploads (/upload/init). Opt-in: the bucket needs a CORS
+# rule allowing PUT from the widget's origin, or the browser's PUT fails
+DIRECT_UPLOADS_ENABLED = USE_REMOTE_UPLOAD and os.getenv("DIRECT_UPLOADS_ENABLED", "false").lower() == "true"
+# How long a presigned direct-upload URL stays valid
+DIRECT_UPLOAD_EXPIRES_SECONDS = int(os.getenv("DIRECT_UPLOAD_EXPIRES_SECONDS", "900"))
+
+
+class UploadTooLarge(ValueError):
+    """The upload exceeds MAX_UPLOAD_BYTES."""
+
+
+class _CountingReader(io.RawIOBase):
+    """
+    Reads a file object through, hashing what passes and failing with
+    UploadTooLarge as soon as more than max_bytes have been read.
+    """
+
+    def __init__(self, source: BinaryIO, max_bytes: int):
+        self._source = source
+        self._max_bytes = max_bytes
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._source.read(STORAGE_CHUNK_BYTES if size is None or size < 0 else size)
+        self.size += len(chunk)
+        if self.size > self._max_bytes:
+            raise UploadTooLarge(f"File size exceeds {self._max_bytes} bytes")
+        self.sha256.update(chunk)
+        return chunk
+
+    def readinto(self, buffer) -> int:
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
 
 
 def ensure_store_directory(session_id: str) -> Path:
@@ -28,19 +71,21 @@ def create_document(
     doc_id: str,
     doc_name: str,
     original_filename: str,
-    file_content: bytes,
-    file_size: int
+    file_content: Union[bytes, BinaryIO]
 ) -> Document:
     """
     Create a new document entry in database and save file to disk.
     
+    The file is copied to storage in chunks (S3 uses multipart upload for
+    large files). Raises UploadTooLarge, leaving any stored copy untouched,
+    once more than MAX_UPLOAD_BYTES have been read.
+    
     Args:
         session_id: Session ID
         doc_id: Document ID (e.g., "identity_proof", "bank_statement")
         doc_name: Document display name (e.g., "Identity Proof")
         original_filename: Original filename from upload
-        file_content: File content as bytes
-        file_size: File size in bytes
+        file_content: File content as bytes or a binary file object
     
     Returns:
         Document object
@@ -50,67 +95,170 @@ def create_document(
     if not session:
         raise ValueError(f"Session {session_id} not found")
     
-    # Check if document already exists for this session and doc_id
-    existing = documents_collection.find_one({
-        "session_id": session_id,
-        "doc_id": doc_id
-    })
+    source = io.BytesIO(file_content) if isinstance(file_content, bytes) else file_content
+    reader = _CountingReader(source, MAX_UPLOAD_BYTES)
     
-    if existing:
-        # Update existing document
-        doc_id_obj = existing["_id"]
-    else:
-        # Create new document
-        doc_id_obj = ObjectId()
+    file_path = _document_file_path(session_id, doc_id, original_filename, USE_REMOTE_UPLOAD)
+    # The stored file / object is only replaced once the whole upload is read
+    get_storage(USE_REMOTE_UPLOAD).put(file_path, reader)
     
-    # Get file extension from original filename
-    file_ext = Path(original_filename).suffix or ""
+    return _save_document(
+        session_id=session_id,
+        doc_id=doc_id,
+        doc_name=doc_name,
+        original_filename=original_filename,
+        file_path=file_path,
+        file_size=reader.size,
+        remote=USE_REMOTE_UPLOAD,
+        content_sha256=reader.sha256.hexdigest(),
+    )
+
+
+def prepare_direct_upload(
+    session_id: str,
+    doc_id: str,
+    original_filename: str,
+    file_size: int,
+    content_type: Optional[str] = None,
+    content_sha256: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Presign a PUT for the client to upload a document straight to S3.
+    
+    The URL is only valid for a body of exactly file_size bytes (and, if
+    content_sha256 is given, with that SHA-256). Call complete_direct_upload
+    once the PUT succeeds to record the document.
+    
+    Args:
+        session_id: Session ID
+        doc_id: Document ID (e.g., "identity_proof", "bank_statement")
+        original_filename: Original filename (its extension is kept)
+        file_size: Size of the file in bytes
+        content_type: MIME type the client will send, if any
+        content_sha256: Hex SHA-256 of the file, if the client computed it
+    
+    Returns:
+        Dict with url, method, headers (to send with the PUT), expires_in and file_path
+    """
+    if not USE_REMOTE_UPLOAD:
+        raise RuntimeError("Direct uploads need remote storage (USE_REMOTE_UPLOAD=1)")
+    if not get_session(session_id):
+        raise ValueError(f"Session {session_id} not found")
+    if file_size > MAX_UPLOAD_BYTES:
+        raise UploadTooLarge(f"File size exceeds {MAX_UPLOAD_BYTES} bytes")
+    
+    file_path = _document_file_path(session_id, doc_id, original_filename, remote=True)
+    # The PUT replaces the stored object before the upload is completed, so
+    # the current verdict no longer applies to what is stored
+    documents_collection.update_one(
+        {"session_id": session_id, "doc_id": doc_id, "file_path": file_path},
+        {"$set": {
+            "verification_status": "pending",
+            "verification_feedback": None,
+            "verified_at": None,
+            "content_sha256": None
+        }}
+    )
     
-    if USE_REMOTE_UPLOAD:
-        file_path = f"{BUCKET_PREFIX}/{session_id}/{doc_id}{file_ext}"
-        s3.upload_fileobj(io.BytesIO(file_content), BUCKET_NAME, file_path)
-    else:
-        file_path = f"{session_id}/{doc_id}{file_ext}"
-        session_dir = ensure_store_directory(session_id)
-        
-        file_path_full = session_dir / f"{doc_id}{file_ext}"
-        with open(file_path_full, "wb") as f:
-            f.write(file_content)
+    upload = s3_storage.presign_put(
+        file_path, file_size, content_type, content_sha256, DIRECT_UPLOAD_EXPIRES_SECONDS
+    )
+    return {**upload, "file_path": file_path}
+
+
+def complete_direct_upload(
+    session_id: str,
+    doc_id: str,
+    doc_name: str,
+    original_filename: str
+) -> Document:
+    """
+    Record a document uploaded with a prepare_direct_upload URL.
     
+    Size and SHA-256 are read from the stored object. Raises FileNotFoundError
+    if nothing was uploaded, and UploadTooLarge (deleting the object) if it
+    exceeds MAX_UPLOAD_BYTES.
+    """
+    if not USE_REMOTE_UPLOAD:
+        raise RuntimeError("Direct uploads need remote storage (USE_REMOTE_UPLOAD=1)")
+    if not get_session(session_id):
+        raise ValueError(f"Session {session_id} not found")
+    
+    file_path = _document_file_path(session_id, doc_id, original_filename, remote=True)
+    stored = s3_storage.head(file_path)
+    if stored["size"] > MAX_UPLOAD_BYTES:
+        s3_storage.delete(file_path)
+        raise UploadTooLarge(f"File size exceeds {MAX_UPLOAD_BYTES} bytes")
+    
+    return _save_document(
+        session_id=session_id,
+        doc_id=doc_id,
+        doc_name=doc_name,
+        original_filename=original_filename,
+        file_path=file_path,
+        file_size=stored["size"],
+        remote=True,
+        content_sha256=stored["sha256"],
+    )
+
+
+def _document_file_path(session_id: str, doc_id: str, original_filename: str, remote: bool) -> str:
+    """Storage key of a session's document (relative to STORE_DIR when local)."""
+    file_ext = Path(original_filename).suffix or ""
+    if remote:
+        return f"{BUCKET_PREFIX}/{session_id}/{doc_id}{file_ext}"
+    return f"{session_id}/{doc_id}{file_ext}"
+
+
+def _save_document(
+    session_id: str,
+    doc_id: str,
+    doc_name: str,
+    original_filename: str,
+    file_path: str,
+    file_size: int,
+    remote: bool,
+    content_sha256: Optional[str]
+) -> Document:
+    """
+    Upsert the document entry for a stored file (verification pending) and
+    link it to the session: two atomic writes, in one transaction where the
+    deployment supports it. Concurrent uploads to a session can't drop each
+    other's document from the session's list.
+    """
     now = datetime.now(timezone.utc)
-    doc = {
-        "_id": doc_id_obj,
+    fields = {
         "session_id": session_id,
         "doc_id": doc_id,
         "doc_name": doc_name,
         "original_filename": original_filename,
         "file_path": file_path,
         "file_size": file_size,
-        "remote": USE_REMOTE_UPLOAD,
+        "remote": remote,
+        "content_sha256": content_sha256,
         "uploaded_at": now,
         "verification_status": "pending",
         "verification_feedback": None,
         "verified_at": None
     }
     
-    documents_collection.update_one(
-        {"session_id": session_id, "doc_id": doc_id},
-        {"$set": doc},
-        upsert=True
-    )
+    def save(mongo_session: Optional[ClientSession]) -> Document:
+        # Same _id when re-uploading a document type, a new one otherwise
+        doc = documents_collection.find_one_and_update(
+            {"session_id": session_id, "doc_id": doc_id},
+            {"$set": fields},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            session=mongo_session
+        )
+        add_session_document(session_id, doc["_id"], mongo_session)
+        return doc  # type: ignore
     
-    # Update session's documents array
-    session = get_session(session_id)
-    if session:
-        documents = session.get("documents", [])
-        # Convert existing ObjectIds to ObjectId type if they're strings
-        documents = [ObjectId(did) if isinstance(did, str) else did for did in documents]
-        # Check if this document_id is already in the list (by comparing ObjectIds)
-        if not any(str(did) == str(doc_id_obj) for did in documents):
-            documents.append(doc_id_obj)
-            update_session(session_id, documents=documents)
-    
-    return doc  # type: ignore
+    try:
+        return run_in_transaction(save)
+    except DuplicateKeyError:
+        # A concurrent first upload of this doc_id inserted it; update that one
+        return run_in_transaction(save)
 
 
 def get_documents_by_session(session_id: str) -> List[Document]:
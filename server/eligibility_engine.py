@@ -0,0 +1,94 @@
+"""
+Eligibility Engine - Vectorized loan eligibility rules
+
+The rules of services.check_eligibility, evaluated for arrays of
+(credit score, pre-approved limit, requested amount, EMI, salary) at once,
+for offer grids and bulk scoring. Rules, in check_eligibility's order:
+1. Rejected if credit score < MIN_CREDIT_SCORE
+2. Rejected if amount > MAX_LIMIT_MULTIPLIER x pre-approved limit (when a limit exists)
+3. Approved (instant) if amount <= pre-approved limit
+4. Otherwise conditionally approved, requiring a salary slip, unless the
+   salary is known and EMI > MAX_EMI_TO_SALARY x salary (rejected)
+"""
+
+from dataclasses import dataclass
+import numpy as np
+from numpy.typing import ArrayLike
+
+MIN_CREDIT_SCORE = 700
+MAX_LIMIT_MULTIPLIER = 2
+MAX_EMI_TO_SALARY = 0.5
+
+# Status codes
+APPROVED = 0
+CONDITIONALLY_APPROVED = 1
+REJECTED = 2
+STATUS_NAMES = ("approved", "conditionally_approved", "rejected")
+
+# Reason codes
+REASON_NONE = 0
+REASON_LOW_CREDIT_SCORE = 1
+REASON_OVER_LIMIT = 2
+REASON_EMI_OVER_SALARY = 3
+REASON_NAMES = (None, "low_credit_score", "over_limit", "emi_over_salary")
+
+
+@dataclass
+class EligibilityBatch:
+    """Rule outcome per (broadcast) application."""
+
+    status: np.ndarray  # int8 status codes
+    reason: np.ndarray  # int8 reason codes (rejections only)
+    requires_salary_slip: np.ndarray  # bool
+
+    @property
+    def eligible(self) -> np.ndarray:
+        return self.status != REJECTED
+
+
+def evaluate_eligibility(
+    credit_score: ArrayLike,
+    pre_approved_limit: ArrayLike,
+    requested_amount: ArrayLike,
+    emi: ArrayLike,
+    salary: ArrayLike,
+) -> EligibilityBatch:
+    """
+    Apply the eligibility rules to broadcast arrays of applications.
+
+    Args:
+        credit_score: credit score (out of 900)
+        pre_approved_limit: pre-approved limit, 0 if none
+        requested_amount: loan amount
+        emi: EMI for the amount at the applicable rate and tenure
+        salary: monthly salary, NaN if unknown
+    """
+    score, limit, amount, emi, salary = np.broadcast_arrays(
+        np.asarray(credit_score, dtype=np.float64),
+        np.asarray(pre_approved_limit, dtype=np.float64),
+        np.asarray(requested_amount, dtype=np.float64),
+        np.asarray(emi, dtype=np.float64),
+        np.asarray(salary, dtype=np.float64),
+    )
+
+    low_score = score < MIN_CREDIT_SCORE
+    over_limit = ~low_score & (limit > 0) & (amount > MAX_LIMIT_MULTIPLIER * limit)
+    instant = ~low_score & ~over_limit & (amount <= limit)
+    conditional = ~low_score & ~over_limit & ~instant
+    has_salary = ~np.isnan(salary)
+    emi_over_salary = conditional & has_salary & (emi > MAX_EMI_TO_SALARY * salary)
+
+    status = np.full(score.shape, CONDITIONALLY_APPROVED, dtype=np.int8)
+    status[instant] = APPROVED
+    status[low_score | over_limit | emi_over_salary] = REJECTED
+
+    reason = np.zeros(score.shape, dtype=np.int8)
+    reason[low_score] = REASON_LOW_CREDIT_SCORE
+    reason[over_limit] = REASON_OVER_LIMIT
+    reason[emi_over_salary] = REASON_EMI_OVER_SALARY
+
+    return EligibilityBatch(
+        status=status,
+        reason=reason,
+        requires_salary_slip=conditional & ~emi_over_salary,
+    )
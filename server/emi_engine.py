@@ -0,0 +1,163 @@
+"""
+EMI Engine - Vectorized EMI and amortization calculations
+
+All functions take scalars or arrays of loan amount, tenure (months) and
+annual interest rate (%), broadcast them NumPy-style, and compute every loan
+in one pass:
+- batch_emi: EMI, total amount and total interest per loan
+- emi_table: EMI grid for amounts x tenures at one rate (sales comparison tables)
+- amortization_schedule: per-month principal / interest / balance for one or
+  many loans
+
+emi_summary is the scalar entry point used by services.calculate_emi. It is
+memoized, since one chat turn computes the same EMI in generate_offer,
+check_eligibility, create_sanction and generate_sanction_letter.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import numpy as np
+from numpy.typing import ArrayLike
+
+
+@dataclass
+class EMIBatch:
+    """EMI results, one element per (broadcast) loan. Invalid loans are NaN."""
+
+    loan_amount: np.ndarray
+    tenure_months: np.ndarray
+    interest_rate: np.ndarray
+    emi: np.ndarray
+    total_amount: np.ndarray
+    total_interest: np.ndarray
+
+
+@dataclass
+class AmortizationSchedule:
+    """
+    Month-by-month schedule, shape (*loans, max_tenure).
+
+    Month m (1-based) is column m - 1. Columns past a loan's tenure are 0.
+    """
+
+    month: np.ndarray  # 1..max_tenure
+    emi: np.ndarray  # per loan
+    principal: np.ndarray
+    interest: np.ndarray
+    balance: np.ndarray  # outstanding after the month's payment
+
+    def to_rows(self) -> List[Dict]:
+        """Rows for a single loan's schedule, rounded to paise."""
+        if self.principal.ndim != 1:
+            raise ValueError("to_rows() needs a single-loan schedule")
+        emi = round(float(self.emi), 2)
+        return [
+            {
+                "month": int(month),
+                "emi": emi,
+                "principal": round(float(principal), 2),
+                "interest": round(float(interest), 2),
+                "balance": round(float(balance), 2),
+            }
+            for month, principal, interest, balance in zip(
+                self.month, self.principal, self.interest, self.balance
+            )
+            if principal or interest
+        ]
+
+
+def _monthly_rate(interest_rate: np.ndarray) -> np.ndarray:
+    return interest_rate / (12 * 100)
+
+
+def batch_emi(loan_amount: ArrayLike, tenure_months: ArrayLike, interest_rate: ArrayLike) -> EMIBatch:
+    """
+    EMI for every (broadcast) combination of loan amount, tenure and annual rate.
+
+    Standard reducing-balance EMI, P x r x (1+r)^n / ((1+r)^n - 1), or P / n
+    at a 0% rate. Loans with a non-positive amount or tenure, or a negative
+    rate, are NaN.
+    """
+    amount, tenure, rate = np.broadcast_arrays(
+        np.asarray(loan_amount, dtype=np.float64),
+        np.asarray(tenure_months, dtype=np.float64),
+        np.asarray(interest_rate, dtype=np.float64),
+    )
+    valid = (amount > 0) & (tenure > 0) & (rate >= 0)
+    safe_tenure = np.where(valid, tenure, 1.0)
+    monthly_rate = _monthly_rate(rate)
+    growth = (1 + monthly_rate) ** safe_tenure
+    emi = np.divide(
+        amount * monthly_rate * growth,
+        growth - 1,
+        out=np.asarray(amount / safe_tenure),
+        where=monthly_rate > 0,
+    )
+    emi = np.where(valid, emi, np.nan)
+    total_amount = emi * tenure
+    return EMIBatch(
+        loan_amount=amount,
+        tenure_months=tenure,
+        interest_rate=rate,
+        emi=emi,
+        total_amount=total_amount,
+        total_interest=total_amount - amount,
+    )
+
+
+def emi_table(loan_amounts: ArrayLike, tenures: ArrayLike, interest_rate: float) -> np.ndarray:
+    """EMI grid of shape (len(loan_amounts), len(tenures)) at one annual rate."""
+    amounts = np.asarray(loan_amounts, dtype=np.float64)[:, np.newaxis]
+    months = np.asarray(tenures, dtype=np.float64)[np.newaxis, :]
+    return batch_emi(amounts, months, interest_rate).emi
+
+
+def amortization_schedule(
+    loan_amount: ArrayLike, tenure_months: ArrayLike, interest_rate: ArrayLike
+) -> AmortizationSchedule:
+    """
+    Reducing-balance schedule for one or many loans.
+
+    Uses the closed form for the balance after k payments,
+    B_k = P(1+r)^k - EMI((1+r)^k - 1)/r, so all months are computed at once.
+    """
+    emis = batch_emi(loan_amount, tenure_months, interest_rate)
+    if not np.all(np.isfinite(emis.emi)):
+        raise ValueError("Invalid loan parameters in amortization schedule")
+
+    amount = emis.loan_amount[..., np.newaxis]
+    tenure = emis.tenure_months[..., np.newaxis]
+    emi = emis.emi[..., np.newaxis]
+    rate = _monthly_rate(emis.interest_rate)[..., np.newaxis]
+
+    max_tenure = int(emis.tenure_months.max()) if emis.tenure_months.size else 0
+    months = np.arange(0, max_tenure + 1, dtype=np.float64)  # 0 = disbursement
+
+    growth = (1 + rate) ** months
+    paid_growth = np.divide(growth - 1, rate, out=np.broadcast_to(months, growth.shape).copy(), where=rate > 0)
+    balance = amount * growth - emi * paid_growth
+    # Exactly zero from each loan's final month on (drops floating-point residue)
+    balance = np.where(months < tenure, np.clip(balance, 0.0, None), 0.0)
+
+    opening = balance[..., :-1]
+    interest = opening * rate
+    principal = opening - balance[..., 1:]
+    in_tenure = months[1:] <= tenure
+    interest = np.where(in_tenure, interest, 0.0)
+    principal = np.where(in_tenure, principal, 0.0)
+
+    return AmortizationSchedule(
+        month=months[1:].astype(np.int64),
+        emi=emis.emi,
+        principal=principal,
+        interest=interest,
+        balance=balance[..., 1:],
+    )
+
+
+@lru_cache(maxsize=4096)
+def emi_summary(loan_amount: float, tenure_months: int, interest_rate: float) -> Tuple[float, float, float]:
+    """(emi, total_amount, total_interest) for one loan, unrounded."""
+    result = batch_emi(loan_amount, tenure_months, interest_rate)
+    return float(result.emi), float(result.total_amount), float(result.total_interest)
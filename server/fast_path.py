@@ -0,0 +1,182 @@
+"""
+Fast Path - Deterministic pre-router in front of the master agent
+
+Many customer messages are an obvious intent: a bare PAN, a 10-digit phone
+number, an OTP, or a short "yes / proceed". Routing those through the master
+agent costs a master LLM call plus a worker LLM call before the same tool
+runs. The fast path recognizes them with regexes and stage rules and:
+- PAN / phone / OTP: calls the existing verification tools directly and
+  replies from a template (no LLM call)
+- affirmations: hands the message straight to the worker agent for the
+  current stage, which phrases the reply (one LLM round instead of three)
+
+Anything else, or any doubt, falls through to the master agent.
+Disable with FAST_PATH_ENABLED=false.
+"""
+
+import os
+import re
+import json
+import logging
+from typing import Optional, Dict, Any
+from dotenv import load_dotenv
+from langchain.messages import AIMessage
+from session_context import get_session_context
+from main import (
+    verify_customer_pan,
+    verify_customer_phone,
+    verify_customer_otp,
+    route_to_sales_agent,
+    route_to_underwriting_agent,
+)
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+
+# Matched against the message with spaces and hyphens removed
+PAN_PATTERN = re.compile(r"[A-Z]{5}[0-9]{4}[A-Z]")
+PHONE_PATTERN = re.compile(r"(?:\+?91|0)?[6-9][0-9]{9}")
+OTP_PATTERN = re.compile(r"[0-9]{6}")
+
+# Matched against the whole message, case-insensitive
+AFFIRMATION_PATTERN = re.compile(
+    r"(yes|yeah|yep|yup|sure|ok|okay|proceed|go ahead|continue|haan|haan ji|ji haan)"
+    r"(,?\s*(please|sure|go ahead|proceed|let'?s do it))?[\s.!]*",
+    re.IGNORECASE,
+)
+
+# Worker agent that takes an affirmation at each stage. Stages not listed
+# (e.g. sanction) always go through the master agent.
+AFFIRMATION_ROUTES = {
+    "initial": route_to_sales_agent,
+    "needs_analysis": route_to_sales_agent,
+    "verification": route_to_underwriting_agent,  # PAN verified, next step is underwriting
+    "underwriting": route_to_underwriting_agent,
+}
+
+# ===== REPLY TEMPLATES =====
+
+PAN_VERIFIED_TEMPLATE = (
+    "Thank you{name}! Your PAN is verified and I've fetched your details. "
+    "How much would you like to borrow, and over how many months?"
+)
+PAN_VERIFIED_WITH_AMOUNT_TEMPLATE = (
+    "Thank you{name}! Your PAN is verified and I've fetched your details. "
+    "Shall I check your eligibility for ₹{loan_amount:,.0f}{tenure}?"
+)
+PAN_FAILED_TEMPLATE = (
+    "I couldn't verify that PAN: {message}. "
+    "Please check and share your 10-character PAN (for example, ABCDE1234F)."
+)
+PHONE_VERIFIED_TEMPLATE = "{message}. Please enter the 6-digit OTP to continue."
+PHONE_FAILED_TEMPLATE = "{message}. Could you share your PAN instead so I can find your details?"
+OTP_VERIFIED_TEMPLATE = "Your mobile number is verified{name}! Shall I check your loan eligibility now?"
+OTP_FAILED_TEMPLATE = "{message}"
+
+
+def _customer_name_suffix(session_state: Dict[str, Any]) -> str:
+    """', Name' for templates, or '' if the customer's name is unknown."""
+    name = (session_state.get("customer_data") or {}).get("name")
+    return f", {name.split()[0]}" if name else ""
+
+
+def _last_assistant_message(session_state: Dict[str, Any]) -> str:
+    """Content of the most recent assistant message in the turn's history."""
+    for msg in reversed(session_state.get("conversation_history", [])):
+        if isinstance(msg, AIMessage):
+            return str(msg.content)
+    return ""
+
+
+# ===== HANDLERS =====
+
+
+async def _handle_pan(pan: str, session_state: Dict[str, Any]) -> str:
+    result = json.loads(await verify_customer_pan.ainvoke({"pan": pan}))
+    if not result.get("verified"):
+        return PAN_FAILED_TEMPLATE.format(message=result.get("message", "PAN not found"))
+
+    name = _customer_name_suffix(session_state)
+    loan_amount = session_state.get("loan_amount")
+    if loan_amount:
+        tenure_months = session_state.get("tenure_months")
+        tenure = f" over {tenure_months} months" if tenure_months else ""
+        return PAN_VERIFIED_WITH_AMOUNT_TEMPLATE.format(name=name, loan_amount=loan_amount, tenure=tenure)
+    return PAN_VERIFIED_TEMPLATE.format(name=name)
+
+
+async def _handle_phone(phone: str, session_state: Dict[str, Any]) -> str:
+    result = json.loads(await verify_customer_phone.ainvoke({"phone": phone}))
+    template = PHONE_VERIFIED_TEMPLATE if result.get("verified") else PHONE_FAILED_TEMPLATE
+    return template.format(message=result.get("message", "").rstrip("."))
+
+
+async def _handle_otp(phone: str, otp: str, session_state: Dict[str, Any]) -> str:
+    result = json.loads(await verify_customer_otp.ainvoke({"phone": phone, "otp": otp}))
+    if result.get("verified"):
+        return OTP_VERIFIED_TEMPLATE.format(name=_customer_name_suffix(session_state))
+    return OTP_FAILED_TEMPLATE.format(message=result.get("message", "Invalid OTP"))
+
+
+async def _handle_affirmation(route_tool, message: str) -> Optional[str]:
+    query = f'Customer replied "{message}" to your last question. Continue with the step they agreed to.'
+    reply = await route_tool.ainvoke({"query": query})
+    if not reply or reply.startswith("Error in ") or reply.startswith("Cannot proceed"):
+        return None
+    return reply
+
+
+# ===== ROUTER =====
+
+
+async def try_fast_path(message: str) -> Optional[str]:
+    """
+    Handle an obvious intent without the master agent.
+
+    Uses the session context bound for the current request.
+
+    Returns:
+        The reply for the customer, or None to fall through to the master agent
+    """
+    if not FAST_PATH_ENABLED:
+        return None
+
+    session_state = get_session_context().state
+    stage = session_state.get("conversation_stage") or "initial"
+    text = message.strip()
+    compact = re.sub(r"[\s\-]", "", text).strip(".!")
+
+    if PAN_PATTERN.fullmatch(compact.upper()) and not session_state.get("customer_id"):
+        logger.info(f"[FAST_PATH] PAN detected - Stage: {stage}")
+        return await _handle_pan(compact.upper(), session_state)
+
+    if PHONE_PATTERN.fullmatch(compact) and not session_state.get("customer_id"):
+        logger.info(f"[FAST_PATH] Phone number detected - Stage: {stage}")
+        return await _handle_phone(compact, session_state)
+
+    # A bare 6-digit number is only an OTP right after we asked for one
+    # (otherwise it is likely an amount, e.g. 500000)
+    phone = (session_state.get("customer_data") or {}).get("phone")
+    if (
+        OTP_PATTERN.fullmatch(compact)
+        and phone
+        and "otp" in _last_assistant_message(session_state).lower()
+    ):
+        logger.info(f"[FAST_PATH] OTP detected - Stage: {stage}")
+        return await _handle_otp(phone, compact, session_state)
+
+    # "yes" only has a clear meaning as the answer to a question
+    route_tool = AFFIRMATION_ROUTES.get(stage)
+    if (
+        route_tool is not None
+        and AFFIRMATION_PATTERN.fullmatch(text)
+        and _last_assistant_message(session_state).rstrip().endswith("?")
+        and (stage in ("initial", "needs_analysis") or session_state.get("customer_id"))
+    ):
+        logger.info(f"[FAST_PATH] Affirmation detected - Stage: {stage}, Agent: {route_tool.name}")
+        return await _handle_affirmation(route_tool, text)
+
+    return None
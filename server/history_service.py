@@ -0,0 +1,170 @@
+"""
+History Service - Bounded conversation context for the master agent
+
+Instead of sending every stored message on every turn, the agent sees:
+- a rolling summary of older turns, persisted on the session document
+- the most recent turns verbatim, trimmed to a token budget
+
+After each turn, messages that fell out of the recent window are folded into
+the summary incrementally, so each turn only summarizes what is new.
+"""
+
+import os
+import logging
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+from langchain.messages import HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from database import sessions_collection
+from conversation_service import get_conversations_since
+from models import Conversation
+from session_service import get_session
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Token budget for verbatim history sent to the agent (summary not included)
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "3000"))
+# Number of most recent turns (user + assistant message pairs) kept verbatim
+HISTORY_RECENT_TURNS = int(os.getenv("HISTORY_RECENT_TURNS", "6"))
+
+SUMMARY_MODEL_NAME = os.getenv("SUMMARY_MODEL", os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+BASE_URL = os.getenv("OPENAI_API_BASE")
+
+summary_model = ChatOpenAI(
+    model=SUMMARY_MODEL_NAME,
+    base_url=BASE_URL if BASE_URL else None,
+    temperature=0,
+    max_completion_tokens=500,
+    timeout=30,
+)
+
+
+def to_langchain_messages(conversations: List[Conversation]) -> List[BaseMessage]:
+    """Convert stored conversation documents to HumanMessage / AIMessage objects."""
+    messages: List[BaseMessage] = []
+    for conv in conversations:
+        msg_data = conv.get("message", {})
+        role = msg_data.get("role", "")
+        content = msg_data.get("content", "")
+
+        if role == "user":
+            messages.append(HumanMessage(content=content))
+        elif role == "assistant":
+            messages.append(AIMessage(content=content))
+    return messages
+
+
+def trim_to_budget(messages: List[BaseMessage], max_tokens: int = HISTORY_MAX_TOKENS) -> List[BaseMessage]:
+    """Keep the most recent messages that fit in the token budget, starting on a user turn."""
+    trimmed = trim_messages(
+        messages,
+        max_tokens=max_tokens,
+        token_counter=count_tokens_approximately,
+        strategy="last",
+        start_on="human",
+    )
+    # Never drop the current user message, however long it is
+    if not trimmed and messages:
+        trimmed = messages[-1:]
+    return trimmed
+
+
+def load_agent_history(session_id: str) -> Tuple[Optional[str], List[BaseMessage]]:
+    """
+    Load the agent context for a session.
+
+    Returns:
+        (history_summary, recent_messages) - summary is None until older turns
+        have been folded; recent_messages are the unsummarized turns trimmed to
+        HISTORY_MAX_TOKENS.
+    """
+    session = get_session(session_id) or {}
+    summary = session.get("history_summary")
+    conversations = get_conversations_since(
+        session_id,
+        session.get("history_summarized_until"),
+        since_id=session.get("history_summarized_until_id"),
+        latest=True,
+    )
+    messages = trim_to_budget(to_langchain_messages(conversations))
+    return summary, messages
+
+
+def _format_transcript(conversations: List[Conversation]) -> str:
+    """Render conversation documents as a plain-text transcript for the summarizer."""
+    lines = []
+    for conv in conversations:
+        msg_data = conv.get("message", {})
+        speaker = "Customer" if msg_data.get("role") == "user" else "Vittam"
+        lines.append(f"{speaker}: {msg_data.get('content', '')}")
+    return "\n".join(lines)
+
+
+def summarize_turns(previous_summary: Optional[str], conversations: List[Conversation]) -> str:
+    """Fold a batch of older turns into the running summary."""
+    prompt = f"""You maintain a running summary of a personal loan sales conversation between a customer and Vittam, Tata Capital's loan assistant.
+
+Update the summary with the new transcript below. Keep every fact the assistant will need later: customer name, PAN/phone given, loan amount, tenure, purpose, offers and rates quoted, eligibility decisions, documents requested/uploaded/verified, bank details collected, objections raised and open questions. Drop greetings and small talk. Respond with the updated summary only, as short bullet points.
+
+CURRENT SUMMARY:
+{previous_summary or "(none yet)"}
+
+NEW TRANSCRIPT:
+{_format_transcript(conversations)}"""
+    response = summary_model.invoke([HumanMessage(content=prompt)])
+    return str(response.content).strip()
+
+
+def update_history_summary(session_id: str) -> bool:
+    """
+    Fold turns that fell out of the recent window into the session's rolling summary.
+
+    Called after each turn. Only unsummarized messages are read, and only the
+    ones beyond the recent window (or over the token budget) are summarized.
+
+    Returns:
+        True if the summary was updated
+    """
+    try:
+        session = get_session(session_id)
+        if not session:
+            return False
+
+        # Oldest first: a backlog longer than one read is folded over several turns
+        conversations = get_conversations_since(
+            session_id,
+            session.get("history_summarized_until"),
+            since_id=session.get("history_summarized_until_id"),
+        )
+        keep = HISTORY_RECENT_TURNS * 2
+        fold_count = max(0, len(conversations) - keep)
+
+        # Fold more if the recent window alone exceeds the token budget
+        while fold_count < len(conversations) - 2 and count_tokens_approximately(
+            to_langchain_messages(conversations[fold_count:])
+        ) > HISTORY_MAX_TOKENS:
+            fold_count += 2
+
+        if fold_count == 0:
+            return False
+
+        to_fold = conversations[:fold_count]
+        summary = summarize_turns(session.get("history_summary"), to_fold)
+        sessions_collection.update_one(
+            {"session_id": session_id},
+            {"$set": {
+                "history_summary": summary,
+                "history_summarized_until": to_fold[-1]["created_at"],
+                "history_summarized_until_id": to_fold[-1]["_id"],
+            }},
+        )
+        logger.info(f"[HISTORY] Folded {fold_count} messages into summary for session: {session_id}")
+        return True
+    except Exception as e:
+        # Summary is an optimization; the next turn retries with a larger backlog
+        logger.error(f"[HISTORY] Error updating summary for session {session_id}: {str(e)}")
+        return False
@@ -14,27 +14,36 @@ Requirements:
 
 import os
 import json
+import asyncio
 import logging
 import uuid
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from dotenv import load_dotenv
 from langchain.agents import create_agent
+from langchain.agents.middleware import dynamic_prompt, ModelRequest
 from langchain.tools import tool
 from langchain.messages import HumanMessage, AIMessage
+from langchain_core.callbacks import get_usage_metadata_callback
 from langchain_openai import ChatOpenAI
 from services import (
     verify_kyc_details, verify_pan, verify_phone, verify_otp,
     fetch_credit_score, get_pre_approved_limit, calculate_emi,
+    calculate_emi_options, get_amortization_schedule, get_offer_grid,
     check_eligibility, verify_salary_slip, generate_sanction_letter,
     get_customer_by_id, get_customer_by_phone, get_customer_by_pan,
     get_interest_rate, get_offers_for_credit_score, get_loan_charges_info,
     get_required_documents
 )
+from customer_cache import start_customer_memo
 from document_verification_service import verify_session_documents
+from verification_jobs import enqueue_session_verification, get_job, session_verification_pending
 from document_service import get_documents_by_session
 from session_service import create_session, get_session, update_session
 from conversation_service import create_conversation
 from models import SessionMetadata
+from session_context import (
+    SessionContext, get_session_context, set_session_context, new_session_state
+)
 
 # Import ALLOWED_DOCUMENT_TYPES - use lazy import to avoid circular dependency
 ALLOWED_DOCUMENT_TYPES = None
@@ -44,7 +53,7 @@ def _get_allowed_document_types():
     global ALLOWED_DOCUMENT_TYPES
     if ALLOWED_DOCUMENT_TYPES is None:
         try:
-            from app import ALLOWED_DOCUMENT_TYPES as doc_types
+            from document_detection import ALLOWED_DOCUMENT_TYPES as doc_types
             ALLOWED_DOCUMENT_TYPES = doc_types
         except ImportError:
             # Fallback if import fails
@@ -81,19 +90,13 @@ model = ChatOpenAI(
     timeout=30,
 )
 
-# Session state to maintain conversation context
-session_state = {
-    "customer_id": None,
-    "loan_amount": None,
-    "tenure_months": None,
-    "conversation_stage": "initial",  # initial, needs_analysis, verification, underwriting, sanction
-    "customer_data": None,
-    "conversation_history": []
-}
+# Context sent to worker agents: "compact" (structured session state + last
+# SUB_AGENT_RECENT_TURNS turns) or "full" (entire conversation history)
+SUB_AGENT_CONTEXT_MODE = os.getenv("SUB_AGENT_CONTEXT_MODE", "compact").lower()
+SUB_AGENT_RECENT_TURNS = int(os.getenv("SUB_AGENT_RECENT_TURNS", "2"))
 
-# Current session ID
-current_session_id: Optional[str] = None
-verified_documents: Dict[str, bool] = {}  # Document verification status: {doc_id: is_verified}
+# Session state, session ID and verified documents are request-scoped and
+# read through get_session_context() (see session_context.py)
 
 
 # ==================== SALES AGENT TOOLS ====================
@@ -426,6 +429,7 @@ def verify_customer_kyc(name: str, dob: str, address: str, pan: str) -> str:
     Returns: Verification result with customer_id if verified
     """
     logger.info(f"[TOOL] verify_customer_kyc called - name: {name}, pan: {pan}")
+    session_state = get_session_context().state
     result = verify_kyc_details(name, dob, address, pan)
     if result["verified"]:
         session_state["customer_id"] = result["customer_id"]
@@ -448,6 +452,7 @@ def verify_customer_pan(pan: str) -> str:
     Returns: Verification result with customer_id if found
     """
     logger.info(f"[TOOL] verify_customer_pan called - PAN: {pan}")
+    session_state = get_session_context().state
     result = verify_pan(pan)
     if result["verified"]:
         customer = get_customer_by_pan(pan)
@@ -472,6 +477,7 @@ def verify_customer_phone(phone: str) -> str:
     Returns: OTP sent confirmation (OTP is 123456 for testing)
     """
     logger.info(f"[TOOL] verify_customer_phone called - phone: {phone}")
+    session_state = get_session_context().state
     result = verify_phone(phone)
     if result["verified"]:
         session_state["customer_id"] = result["customer_id"]
@@ -496,6 +502,7 @@ def verify_customer_otp(phone: str, otp: str) -> str:
     Returns: Verification result
     """
     logger.info(f"[TOOL] verify_customer_otp called - phone: {phone}, OTP: {otp}")
+    session_state = get_session_context().state
     result = verify_otp(phone, otp)
     if result["verified"]:
         session_state["conversation_stage"] = "underwriting"
@@ -551,6 +558,7 @@ def check_loan_eligibility(customer_id: str, requested_amount: float, tenure_mon
     Input: customer_id, requested_amount, tenure_months (default 60)
     """
     logger.info(f"[TOOL] check_loan_eligibility called - customer_id: {customer_id}, amount: ₹{requested_amount:,.0f}, tenure: {tenure_months} months")
+    session_state = get_session_context().state
     result = check_eligibility(customer_id, requested_amount, tenure_months)
     if result["eligible"]:
         session_state["loan_amount"] = requested_amount
@@ -583,6 +591,48 @@ def calculate_loan_emi(loan_amount: float, tenure_months: int, interest_rate: fl
     return json.dumps(result, indent=2)
 
 
+@tool
+def compare_emi_options(loan_amounts: List[float], tenures: List[int], interest_rate: float) -> str:
+    """
+    Compare EMIs for several loan amounts and tenures at one interest rate.
+    
+    Input: loan_amounts (e.g. [200000, 300000, 500000]), tenures in months (e.g. [12, 24, 36, 48, 60]), interest_rate (annual %)
+    Returns: EMI and total interest for every amount / tenure combination
+    """
+    logger.info(f"[TOOL] compare_emi_options called - amounts: {loan_amounts}, tenures: {tenures}, rate: {interest_rate}%")
+    result = calculate_emi_options(loan_amounts, tenures, interest_rate)
+    return json.dumps(result, indent=2)
+
+
+@tool
+def get_repayment_schedule(loan_amount: float, tenure_months: int, interest_rate: float) -> str:
+    """
+    Get the month-by-month repayment (amortization) schedule for a loan.
+    
+    Input: loan_amount, tenure_months, interest_rate (annual %)
+    Returns: EMI, totals and principal / interest / outstanding balance for each month
+    """
+    logger.info(f"[TOOL] get_repayment_schedule called - amount: ₹{loan_amount:,.0f}, tenure: {tenure_months} months, rate: {interest_rate}%")
+    result = get_amortization_schedule(loan_amount, tenure_months, interest_rate)
+    return json.dumps(result, indent=2)
+
+@tool
+def get_customer_offer_grid(customer_id: str) -> str:
+    """
+    Get the full offer grid for a customer in one call: loan amounts up to 2x the
+    pre-approved limit x tenures 12-60 months, each with interest rate, EMI, total
+    interest and eligibility. Use this instead of repeated generate_offer /
+    calculate_loan_emi calls when the customer compares amounts or tenures.
+    
+    Input: customer_id
+    Returns: Offer grid with eligibility status for every amount / tenure option
+    """
+    logger.info(f"[TOOL] get_customer_offer_grid called - customer_id: {customer_id}")
+    result = get_offer_grid(customer_id)
+    if result.get("success"):
+        logger.info(f"[TOOL] get_customer_offer_grid completed - {len(result['grid'])} amounts")
+    return json.dumps(result, indent=2)
+
 @tool
 def verify_salary_slip_upload(customer_id: str, uploaded: bool = True) -> str:
     """
@@ -592,6 +642,7 @@ def verify_salary_slip_upload(customer_id: str, uploaded: bool = True) -> str:
     Returns: Verification result
     """
     logger.info(f"[TOOL] verify_salary_slip_upload called - customer_id: {customer_id}, uploaded: {uploaded}")
+    session_state = get_session_context().state
     result = verify_salary_slip(customer_id, uploaded)
     if result["verified"]:
         logger.info(f"[TOOL] verify_salary_slip_upload - Salary slip verified for customer: {customer_id}")
@@ -629,12 +680,29 @@ def verify_uploaded_documents(session_id: str) -> str:
     - Only call this after documents have been uploaded
     - If documents are rejected, inform customer to reupload only the rejected documents
     - Do NOT ask for documents multiple times - only ask to resubmit if verification fails
+    - If verification is still in progress, tell the customer and call this again on their next message
     """
     logger.info(f"[TOOL] verify_uploaded_documents called - session_id: {session_id}")
     
     try:
-        # Verify all documents
-        result = verify_session_documents(session_id)
+        # Documents are verified by the job workers (queued at upload); don't
+        # hold the turn while they run, report the job instead
+        if session_verification_pending(session_id):
+            job_id = enqueue_session_verification(session_id)
+            job = get_job(job_id)
+            logger.info(f"[TOOL] verify_uploaded_documents - Session: {session_id}, verification job {job_id} pending")
+            return json.dumps({
+                "success": True,
+                "status": job["status"] if job else "queued",
+                "job_id": job_id,
+                "message": "Documents are still being verified. Let the customer know it takes a minute and check again on their next message."
+            }, indent=2)
+        
+        # Every document has a verdict, so this only reads the stored results
+        result = verify_session_documents(session_id, reverify_rejected=False)
+        turn = get_session_context().turn
+        if turn:
+            turn.documents_dirty = True
         
         # Format response for agent
         if result.get("all_verified", False):
@@ -674,6 +742,7 @@ def _check_document_verification_status_internal(session_id: Optional[str] = Non
     Internal helper function to check document verification status.
     Returns a dict instead of JSON string for internal use.
     """
+    current_session_id = get_session_context().session_id
     # Use current_session_id if session_id not provided or if it looks invalid (not a UUID format)
     if not session_id or len(session_id) < 30 or session_id.count('-') < 4:
         if current_session_id:
@@ -808,6 +877,9 @@ def generate_loan_sanction_letter(customer_id: str, loan_amount: float,
     Note: This is the LAST step in the loan process. Never call this before all verifications are complete.
     """
     logger.info(f"[TOOL] generate_loan_sanction_letter called - customer_id: {customer_id}, amount: ₹{loan_amount:,.0f}, tenure: {tenure_months} months, rate: {interest_rate}%")
+    context = get_session_context()
+    session_state = context.state
+    current_session_id = context.session_id
     logger.info(f"[TOOL] generate_loan_sanction_letter - Current session_id: {current_session_id}, conversation_stage: {session_state.get('conversation_stage')}")
     
     # Verify customer exists and is verified
@@ -885,6 +957,9 @@ def generate_loan_sanction_letter(customer_id: str, loan_amount: float,
         
         if result.get("success"):
             session_state["conversation_stage"] = "sanction"
+            turn = get_session_context().turn
+            if turn:
+                turn.created_sanction_id = result.get("sanction_id")
             # Update session in database
             sync_session_to_db()
             logger.info(f"[TOOL] generate_loan_sanction_letter - Sanction letter generated successfully for customer: {customer_id}, sanction_id: {result.get('sanction_id')}")
@@ -1004,6 +1079,9 @@ sales_agent_tools = [
     generate_offer,
     detect_intent,
     get_available_offers,
+    get_customer_offer_grid,
+    compare_emi_options,
+    get_repayment_schedule,
     get_document_requirements,
     get_charges_and_fees
 ]
@@ -1083,6 +1161,8 @@ YOUR APPROACH:
 2. UNDERSTAND deeply - ask about loan purpose, amount needed, timeline, concerns
 3. EXCITE with personalized offers - use the generate_offer tool to create compelling proposals
 4. HANDLE objections with empathy - use handle_objection tool, address concerns genuinely
+   - If EMI is the concern or the customer compares amounts / tenures, call get_customer_offer_grid ONCE (verified customers) and answer follow-ups from the grid instead of calling generate_offer again
+   - For customers not yet verified, use compare_emi_options; use get_repayment_schedule for a month-by-month breakdown
 5. GUIDE toward action - always have a clear next step (verify PAN, check eligibility, etc.)
 
 CONVERSATION STYLE:
@@ -1171,6 +1251,9 @@ underwriting_agent_tools = [
     get_customer_preapproved_limit,
     check_loan_eligibility,
     calculate_loan_emi,
+    get_customer_offer_grid,
+    compare_emi_options,
+    get_repayment_schedule,
     verify_salary_slip_upload,
     get_available_offers,
     get_charges_and_fees,
@@ -1239,6 +1322,7 @@ ELIGIBILITY RULES (CRITICAL - FOLLOW STRICTLY):
 EMI CALCULATION:
 Use the formula: EMI = P × r × (1+r)^n / ((1+r)^n - 1)
 Where: P = Principal, r = monthly rate, n = tenure in months
+- Use calculate_loan_emi for a single EMI, get_customer_offer_grid when the customer compares amounts / tenures (one call covers every option with eligibility), and get_repayment_schedule when the customer asks for a month-by-month schedule
 
 OFFERS FROM DATABASE:
 - Use get_available_offers tool to fetch offers matching customer's credit score
@@ -1384,6 +1468,7 @@ Remember: Sanction letter is ONLY generated after ALL verifications, document up
 
 def get_conversation_summary() -> str:
     """Get a summary of conversation context for worker agents."""
+    session_state = get_session_context().state
     summary_parts = []
     if session_state.get("customer_id"):
         summary_parts.append(f"Customer ID: {session_state['customer_id']}")
@@ -1407,158 +1492,111 @@ def get_conversation_summary() -> str:
     return "\n".join(summary_parts) if summary_parts else "No previous context"
 
 
-def call_sales_agent(query: str, conversation_context: list = None) -> str:
-    """Call Sales Agent to handle sales-related queries."""
-    logger.info(f"[AGENT] Sales Agent called with query: {query[:100]}...")
-    try:
-        # Include conversation context if available
-        messages = conversation_context.copy() if conversation_context else []
-        
-        # Add context summary to help agent remember
-        context_summary = get_conversation_summary()
-        if context_summary and context_summary != "No previous context":
-            enhanced_query = f"[Conversation Context: {context_summary}]\n\nUser's current message: {query}"
-        else:
-            enhanced_query = query
-        
-        messages.append(HumanMessage(content=enhanced_query))
-        
-        result = sales_agent.invoke({"messages": messages})
-        if isinstance(result, dict) and "messages" in result:
-            response = result["messages"][-1].content
-            logger.info(f"[AGENT] Sales Agent completed successfully")
-            return response
-        elif isinstance(result, list):
-            response = result[-1].content if hasattr(result[-1], 'content') else str(result[-1])
-            logger.info(f"[AGENT] Sales Agent completed successfully")
-            return response
-        logger.info(f"[AGENT] Sales Agent completed successfully")
-        return str(result)
-    except Exception as e:
-        logger.error(f"[AGENT] Sales Agent error: {str(e)}")
-        return f"Error in Sales Agent: {str(e)}"
+def build_sub_agent_messages(query: str) -> list:
+    """
+    Build the input messages for a worker agent call.
 
+    compact: one message with the structured session state and the last
+    SUB_AGENT_RECENT_TURNS turns, so the cost of a call does not grow with
+    the conversation.
+    full: the whole conversation history plus the context summary.
+    """
+    session_state = get_session_context().state
+    history = session_state.get("conversation_history", [])
 
-def call_verification_agent(query: str, conversation_context: list = None) -> str:
-    """Call Verification Agent to handle verification tasks."""
-    logger.info(f"[AGENT] Verification Agent called with query: {query[:100]}...")
-    try:
-        # Include conversation context if available
-        messages = conversation_context.copy() if conversation_context else []
-        
-        # Add context summary
+    if SUB_AGENT_CONTEXT_MODE == "full":
+        messages = list(history)
         context_summary = get_conversation_summary()
         if context_summary and context_summary != "No previous context":
             enhanced_query = f"[Conversation Context: {context_summary}]\n\nUser's current message: {query}"
         else:
             enhanced_query = query
-        
         messages.append(HumanMessage(content=enhanced_query))
-        
-        result = verification_agent.invoke({"messages": messages})
-        if isinstance(result, dict) and "messages" in result:
-            response = result["messages"][-1].content
-            logger.info(f"[AGENT] Verification Agent completed successfully")
-            return response
-        elif isinstance(result, list):
-            response = result[-1].content if hasattr(result[-1], 'content') else str(result[-1])
-            logger.info(f"[AGENT] Verification Agent completed successfully")
-            return response
-        logger.info(f"[AGENT] Verification Agent completed successfully")
-        return str(result)
-    except Exception as e:
-        logger.error(f"[AGENT] Verification Agent error: {str(e)}")
-        return f"Error in Verification Agent: {str(e)}"
-
-
-def call_underwriting_agent(query: str, conversation_context: list = None) -> str:
-    """Call Underwriting Agent to handle underwriting tasks."""
-    logger.info(f"[AGENT] Underwriting Agent called with query: {query[:100]}...")
+        return messages
+
+    state_lines = [
+        f"{key}: {session_state.get(key)}"
+        for key in ["customer_id", "loan_amount", "tenure_months", "conversation_stage"]
+        if session_state.get(key) is not None
+    ]
+    recent_messages = history[-SUB_AGENT_RECENT_TURNS * 2:] if SUB_AGENT_RECENT_TURNS > 0 else []
+    recent_lines = [
+        f"{'User' if isinstance(msg, HumanMessage) else 'Assistant'}: {msg.content}"
+        for msg in recent_messages if getattr(msg, "content", None)
+    ]
+
+    parts = []
+    if state_lines:
+        parts.append("[Session State]\n" + "\n".join(state_lines))
+    if recent_lines:
+        parts.append("[Recent Conversation]\n" + "\n".join(recent_lines))
+    parts.append(f"User's current message: {query}")
+    return [HumanMessage(content="\n\n".join(parts))]
+
+
+def _record_sub_agent_usage(agent_name: str, usage_by_model: Dict) -> None:
+    """Log a worker agent call's token usage and add it to the request's totals."""
+    input_tokens = sum(usage.get("input_tokens", 0) for usage in usage_by_model.values())
+    output_tokens = sum(usage.get("output_tokens", 0) for usage in usage_by_model.values())
+    get_session_context().sub_agent_usage.append({
+        "agent": agent_name,
+        "context_mode": SUB_AGENT_CONTEXT_MODE,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+    })
+    logger.info(
+        f"[AGENT] {agent_name} tokens - Mode: {SUB_AGENT_CONTEXT_MODE}, "
+        f"Input: {input_tokens}, Output: {output_tokens}"
+    )
+
+
+async def call_worker_agent(agent, agent_name: str, query: str) -> str:
+    """Call a compiled worker agent with the configured context and return its reply."""
+    logger.info(f"[AGENT] {agent_name} called with query: {query[:100]}...")
     try:
-        # Include conversation context if available
-        messages = conversation_context.copy() if conversation_context else []
-        
-        # Add context summary
-        context_summary = get_conversation_summary()
-        if context_summary and context_summary != "No previous context":
-            enhanced_query = f"[Conversation Context: {context_summary}]\n\nUser's current message: {query}"
-        else:
-            enhanced_query = query
-        
-        messages.append(HumanMessage(content=enhanced_query))
-        
-        result = underwriting_agent.invoke({"messages": messages})
-        if isinstance(result, dict) and "messages" in result:
-            response = result["messages"][-1].content
-            logger.info(f"[AGENT] Underwriting Agent completed successfully")
-            return response
-        elif isinstance(result, list):
-            response = result[-1].content if hasattr(result[-1], 'content') else str(result[-1])
-            logger.info(f"[AGENT] Underwriting Agent completed successfully")
-            return response
-        logger.info(f"[AGENT] Underwriting Agent completed successfully")
-        return str(result)
-    except Exception as e:
-        logger.error(f"[AGENT] Underwriting Agent error: {str(e)}")
-        return f"Error in Underwriting Agent: {str(e)}"
+        messages = build_sub_agent_messages(query)
 
+        with get_usage_metadata_callback() as usage_callback:
+            result = await agent.ainvoke({"messages": messages})
+        _record_sub_agent_usage(agent_name, usage_callback.usage_metadata)
 
-def call_sanction_agent(query: str, conversation_context: list = None) -> str:
-    """Call Sanction Letter Agent to handle sanction letter generation."""
-    logger.info(f"[AGENT] Sanction Letter Agent called with query: {query[:100]}...")
-    try:
-        # Include conversation context if available
-        messages = conversation_context.copy() if conversation_context else []
-        
-        # Add context summary
-        context_summary = get_conversation_summary()
-        if context_summary and context_summary != "No previous context":
-            enhanced_query = f"[Conversation Context: {context_summary}]\n\nUser's current message: {query}"
-        else:
-            enhanced_query = query
-        
-        messages.append(HumanMessage(content=enhanced_query))
-        
-        result = sanction_agent.invoke({"messages": messages})
         if isinstance(result, dict) and "messages" in result:
             response = result["messages"][-1].content
-            logger.info(f"[AGENT] Sanction Letter Agent completed successfully")
+            logger.info(f"[AGENT] {agent_name} completed successfully")
             return response
         elif isinstance(result, list):
             response = result[-1].content if hasattr(result[-1], 'content') else str(result[-1])
-            logger.info(f"[AGENT] Sanction Letter Agent completed successfully")
+            logger.info(f"[AGENT] {agent_name} completed successfully")
             return response
-        logger.info(f"[AGENT] Sanction Letter Agent completed successfully")
+        logger.info(f"[AGENT] {agent_name} completed successfully")
         return str(result)
     except Exception as e:
-        logger.error(f"[AGENT] Sanction Letter Agent error: {str(e)}")
-        return f"Error in Sanction Letter Agent: {str(e)}"
+        logger.error(f"[AGENT] {agent_name} error: {str(e)}")
+        return f"Error in {agent_name}: {str(e)}"
 
 
 # Master Agent tools (worker agents as tools)
 @tool
-def route_to_sales_agent(query: str) -> str:
+async def route_to_sales_agent(query: str) -> str:
     """Route to Sales Agent for: needs analysis, objection handling, offer generation, intent detection, initial sales conversations."""
-    # Pass conversation history to maintain context
-    return call_sales_agent(query, session_state.get("conversation_history", []))
+    return await call_worker_agent(sales_agent, "Sales Agent", query)
 
 
 @tool
-def route_to_verification_agent(query: str) -> str:
+async def route_to_verification_agent(query: str) -> str:
     """Route to Verification Agent for: KYC verification, PAN verification, phone verification, OTP verification."""
-    # Pass conversation history to maintain context
-    return call_verification_agent(query, session_state.get("conversation_history", []))
+    return await call_worker_agent(verification_agent, "Verification Agent", query)
 
 
 @tool
-def route_to_underwriting_agent(query: str) -> str:
+async def route_to_underwriting_agent(query: str) -> str:
     """Route to Underwriting Agent for: credit score checks, eligibility checks, pre-approved limits, EMI calculations, risk assessment."""
-    # Pass conversation history to maintain context
-    return call_underwriting_agent(query, session_state.get("conversation_history", []))
+    return await call_worker_agent(underwriting_agent, "Underwriting Agent", query)
 
 
 @tool
-def route_to_sanction_agent(query: str) -> str:
+async def route_to_sanction_agent(query: str) -> str:
     """
     Route to Sanction Letter Agent for: generating sanction letters, terms and conditions, disbursement information.
     
@@ -1571,14 +1609,14 @@ def route_to_sanction_agent(query: str) -> str:
     Never route to sanction agent just after knowing requirements or before verifications are complete.
     """
     # Verify prerequisites before routing
+    session_state = get_session_context().state
     if not session_state.get("customer_id"):
         return "Cannot proceed to sanction letter: KYC verification is required first. Please verify your PAN number."
     
     if session_state.get("conversation_stage") not in ["underwriting", "sanction"]:
         return "Cannot proceed to sanction letter: Loan approval is required first. Please complete the underwriting process."
     
-    # Pass conversation history to maintain context
-    return call_sanction_agent(query, session_state.get("conversation_history", []))
+    return await call_worker_agent(sanction_agent, "Sanction Letter Agent", query)
 
 
 master_agent_tools = [
@@ -1592,8 +1630,11 @@ master_agent_tools = [
 # We'll create a function to get the system prompt with current state
 def get_master_agent_prompt() -> str:
     """Get Master Agent system prompt with current session state."""
+    context = get_session_context()
+    session_state = context.state
+
     # Get verified document status
-    verified_docs = verified_documents if verified_documents else {}
+    verified_docs = context.verified_documents or {}
     
     # Get ALLOWED_DOCUMENT_TYPES (lazy import)
     doc_types = _get_allowed_document_types()
@@ -1626,6 +1667,13 @@ def get_master_agent_prompt() -> str:
 """
     
     document_status_section = verified_docs_section + unverified_docs_section if (verified_docs_section or unverified_docs_section) else ""
+
+    history_summary_section = ""
+    if context.history_summary:
+        history_summary_section = f"""
+EARLIER CONVERSATION SUMMARY (older turns not included in messages - treat as already discussed):
+{context.history_summary}
+"""
     
     return f"""You are VITTAM (विट्टम) - the AI-powered Personal Loan Sales Assistant for Tata Capital. Your name means "wealth" in Sanskrit, and your mission is to help customers achieve their financial goals through personal loans.
 
@@ -1795,25 +1843,40 @@ CHARGES TO BE TRANSPARENT ABOUT:
 - Penal charges: 3% per month on default
 - Prepayment: Allowed after 12 months
 
+{history_summary_section}
 Current conversation stage: {session_state["conversation_stage"]}
 Current customer ID: {session_state["customer_id"] or "Not identified yet"}
 
 Remember: You're simulating a human-like, full sales journey. Higher conversion and faster loan journeys mean happy customers and successful business. Be the relationship manager everyone wishes they had!"""
 
-# Create master agent (will be recreated with updated prompt when needed)
+
+@dynamic_prompt
+def master_agent_prompt(request: ModelRequest) -> str:
+    """Render the Master Agent prompt from the current request's session context."""
+    return get_master_agent_prompt()
+
+
+# Master agent is compiled once; the prompt is rendered per model call by the
+# middleware above, so the session state never requires rebuilding the graph
 master_agent = create_agent(
     model=model,
     tools=master_agent_tools,
-    system_prompt=get_master_agent_prompt()
+    middleware=[master_agent_prompt],
 )
 
 
 # ==================== DATABASE INTEGRATION ====================
 
 def sync_session_to_db():
-    """Sync session_state to database"""
+    """Sync the current request's session state to database"""
+    context = get_session_context()
+    session_state = context.state
+    current_session_id = context.session_id
     if not current_session_id:
         return
+    if context.turn:
+        # API turn: state is written once when the turn is flushed
+        return
     metadata: SessionMetadata = {
         "customer_id": session_state.get("customer_id"),
         "loan_amount": session_state.get("loan_amount"),
@@ -1826,16 +1889,17 @@ def sync_session_to_db():
 
 def initialize_session(session_id: Optional[str] = None) -> str:
     """Initialize or resume session"""
-    global current_session_id, session_state
+    context = get_session_context()
     if session_id and (s := get_session(session_id)):
-        current_session_id = session_id
+        context.session_id = session_id
         m = s.get("metadata", {})
-        session_state.update({k: m.get(k) for k in ["customer_id", "loan_amount", "tenure_months", "conversation_stage", "customer_data"]})
-        session_state.setdefault("conversation_stage", "initial")
+        context.state.update({k: m.get(k) for k in ["customer_id", "loan_amount", "tenure_months", "conversation_stage", "customer_data"]})
+        if not context.state.get("conversation_stage"):
+            context.state["conversation_stage"] = "initial"
         return session_id
     new_id = session_id or str(uuid.uuid4())
     create_session(new_id, {"conversation_stage": "initial"}, True)
-    current_session_id = new_id
+    context.session_id = new_id
     return new_id
 
 
@@ -1843,30 +1907,13 @@ def initialize_session(session_id: Optional[str] = None) -> str:
 
 def reset_session():
     """Reset session state for new conversation."""
-    global session_state, current_session_id
-    session_state = {
-        "customer_id": None,
-        "loan_amount": None,
-        "tenure_months": None,
-        "conversation_stage": "initial",
-        "customer_data": None,
-        "conversation_history": []
-    }
+    set_session_context(SessionContext(state=new_session_state()))
     # Create a new session in database
-    current_session_id = initialize_session()
+    initialize_session()
 
 
-def update_master_agent_prompt():
-    """Update Master Agent system prompt with current session state."""
-    # Note: In LangChain, we'd need to recreate the agent to update the prompt
-    # For now, the agent will use tools that have access to session_state
-    pass
-
-
-def main():
+async def async_main():
     """Interactive CLI for loan sales system."""
-    global master_agent
-    
     print("=" * 80)
     print("   TATA CAPITAL PERSONAL LOANS")
     print("   Powered by VITTAM - Your AI Loan Assistant")
@@ -1884,7 +1931,7 @@ def main():
     
     # Initialize session (creates new session in database)
     reset_session()
-    print(f"[New session started: {current_session_id}]\n")
+    print(f"[New session started: {get_session_context().session_id}]\n")
     
     while True:
         try:
@@ -1899,37 +1946,28 @@ def main():
             
             if user_input.lower() == 'reset':
                 reset_session()
-                # Recreate master agent with fresh prompt
-                master_agent = create_agent(
-                    model=model,
-                    tools=master_agent_tools,
-                    system_prompt=get_master_agent_prompt()
-                )
                 print("\n[Session reset. Starting fresh conversation.]\n")
                 continue
             
-            if not current_session_id:
+            context = get_session_context()
+            session_state = context.state
+            if not context.session_id:
                 initialize_session()
+            current_session_id = context.session_id
             create_conversation(current_session_id, "user", user_input)
             
             # Add user message to conversation history
             user_message = HumanMessage(content=user_input)
             session_state["conversation_history"].append(user_message)
             
-            # Recreate master agent with updated prompt to reflect current state
-            master_agent = create_agent(
-                model=model,
-                tools=master_agent_tools,
-                system_prompt=get_master_agent_prompt()
-            )
-            
             print("\n[Processing...]")
+            start_customer_memo()
             logger.info(f"[AGENT] Master Agent called - User input: {user_input[:100]}...")
             logger.info(f"[AGENT] Master Agent - Conversation history length: {len(session_state['conversation_history'])} messages")
             logger.info(f"[AGENT] Master Agent - Session ID: {current_session_id}")
             
             # Invoke master agent with FULL conversation history
-            result = master_agent.invoke({"messages": session_state["conversation_history"]})
+            result = await master_agent.ainvoke({"messages": session_state["conversation_history"]})
             
             # Extract response - find the last AI message (skip tool calls)
             response = None
@@ -1992,5 +2030,10 @@ def main():
             traceback.print_exc()
 
 
+def main():
+    """Run the CLI session in a single event loop (agents and their clients stay bound to it)."""
+    asyncio.run(async_main())
+
+
 if __name__ == "__main__":
     main()
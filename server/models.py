@@ -26,6 +26,9 @@ class Session(TypedDict, total=False):
     metadata: SessionMetadata
     is_active: bool
     documents: List[ObjectId]
+    history_summary: Optional[str]  # Rolling summary of turns folded out of the agent context
+    history_summarized_until: Optional[datetime]  # created_at of the last folded message
+    history_summarized_until_id: Optional[ObjectId]  # _id of the last folded message (ties on created_at)
 
 
 class Conversation(TypedDict, total=False):
@@ -100,6 +103,7 @@ class Document(TypedDict, total=False):
     file_path: str  # e.g., "<SESSION_ID>/identity_proof"
     file_size: int  # Size in bytes
     remote: bool
+    content_sha256: Optional[str]  # SHA-256 of the file, for the verification cache
     uploaded_at: datetime
     verification_status: Optional[
         str
@@ -137,3 +141,88 @@ class Sanction(TypedDict, total=False):
     status: Optional[str]  # "pending", "active", "expired", "disbursed"
     created_at: datetime
     updated_at: datetime
+
+
+class EligibilityOption(TypedDict, total=False):
+    """Eligibility of one candidate loan amount in a batch eligibility run"""
+
+    loan_amount: float
+    interest_rate: float
+    emi: float
+    status: str  # "approved", "conditionally_approved", "rejected"
+    reason: Optional[str]  # "low_credit_score", "over_limit", "emi_over_salary"
+
+
+class EligibilityScore(TypedDict, total=False):
+    """Eligibility score document for the eligibility_scores collection"""
+
+    _id: Optional[ObjectId]
+    customer_id: str  # normalized 10-digit phone
+    name: Optional[str]
+    credit_score: Optional[int]
+    pre_approved_limit: float
+    salary: Optional[float]
+    tenure_months: int
+    options: List[EligibilityOption]
+    max_eligible_amount: Optional[float]  # largest eligible candidate amount
+    campaign: Optional[str]  # "instant", "conditional", or None if not eligible
+    run_id: str
+    scored_at: datetime
+
+
+class OutboxNotification(TypedDict, total=False):
+    """Notification document for the notification_outbox collection"""
+
+    _id: Optional[ObjectId]
+    channel: str  # "whatsapp"
+    sanction_id: Optional[str]
+    payload: Dict[str, Any]  # provider request body
+    status: str  # "pending", "sending", "sent", "failed"
+    attempts: int
+    next_attempt_at: datetime
+    locked_until: Optional[datetime]  # lease while a dispatcher is sending
+    last_error: Optional[str]
+    provider_response: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    sent_at: Optional[datetime]
+
+
+class ClaimedOutboxNotification(TypedDict):
+    """A stored outbox notification as claimed by the dispatcher (fields it reads)"""
+
+    _id: ObjectId
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class VerificationJob(TypedDict, total=False):
+    """Job document for the verification_jobs collection"""
+
+    _id: Optional[ObjectId]
+    dedupe_key: str  # "kind:session_id:document_id", only while queued
+    kind: str  # "session" or "document"
+    session_id: str
+    document_id: Optional[str]  # document jobs only
+    status: str  # "queued", "running", "succeeded", "failed"
+    attempts: int
+    result: Optional[Dict[str, Any]]  # verify_session_documents / verify_document response
+    error: Optional[str]
+    delivered: bool  # pushed to the session's chat stream
+    locked_until: Optional[datetime]  # lease while a worker runs the job
+    run_after: Optional[datetime]  # not claimed before this (a requeued session job)
+    created_at: datetime
+    updated_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+
+class ClaimedVerificationJob(TypedDict):
+    """A stored verification job as claimed by a worker (fields the worker reads)"""
+
+    _id: ObjectId
+    kind: str
+    session_id: str
+    document_id: Optional[str]
+    attempts: int
+    created_at: datetime
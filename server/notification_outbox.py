@@ -0,0 +1,333 @@
+"""
+Notification Outbox - Durable WhatsApp notifications with a background dispatcher
+
+create_sanction used to post to the Waplify API inline (no timeout), between
+writing the sanction and setting its sanction_id. Notifications are now
+written to the notification_outbox collection and sent by a dispatcher:
+- enqueue_* inserts a pending message and returns immediately; pass a
+  mongo_session to write it in the same transaction as the record it is
+  about (create_sanction does), then wake the dispatcher after commit
+- the dispatcher claims due messages atomically (so several API processes or
+  a separate worker can run it), sends them over a pooled httpx client and
+  records per-message status: pending -> sending -> sent / failed
+- failures are retried with exponential backoff and jitter up to
+  NOTIFICATION_MAX_ATTEMPTS; 4xx responses other than 408/429 fail at once
+- a message stuck in "sending" (dispatcher crashed) is reclaimed when its
+  lease expires
+
+The dispatcher runs in the API's event loop (app.py lifespan) unless
+NOTIFICATION_DISPATCHER_ENABLED=false; run this module to dispatch from a
+separate worker instead:
+    uv run notification_outbox.py
+
+Point WAPLIFY_API_URL at stub_waplify_server.py to test without the provider.
+"""
+
+import os
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import httpx
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.client_session import ClientSession
+from dotenv import load_dotenv
+from database import notification_outbox_collection
+from models import ClaimedOutboxNotification, OutboxNotification
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+WAPLIFY_API_URL = os.getenv("WAPLIFY_API_URL", "https://app.waplify.io/api/whatsapp/send-message")
+SANCTION_LETTER_BASE_URL = os.getenv("SANCTION_LETTER_BASE_URL", "https://vittam.growsoc.com/letters")
+
+NOTIFICATION_DISPATCHER_ENABLED = os.getenv("NOTIFICATION_DISPATCHER_ENABLED", "true").lower() == "true"
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "6"))
+# Retry delay: base * 2^(attempt - 1), capped, with jitter
+NOTIFICATION_RETRY_BASE_SECONDS = float(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", "2"))
+NOTIFICATION_RETRY_MAX_SECONDS = float(os.getenv("NOTIFICATION_RETRY_MAX_SECONDS", "300"))
+# How often the dispatcher checks for due messages when not woken by an enqueue
+NOTIFICATION_POLL_SECONDS = float(os.getenv("NOTIFICATION_POLL_SECONDS", "5"))
+NOTIFICATION_HTTP_TIMEOUT_SECONDS = float(os.getenv("NOTIFICATION_HTTP_TIMEOUT_SECONDS", "10"))
+# Messages sent in parallel (and pooled connections to the provider)
+NOTIFICATION_CONCURRENCY = int(os.getenv("NOTIFICATION_CONCURRENCY", "10"))
+# How long a claimed message is reserved for the dispatcher sending it
+NOTIFICATION_LEASE_SECONDS = float(os.getenv("NOTIFICATION_LEASE_SECONDS", "60"))
+
+RETRYABLE_STATUS_CODES = {408, 429}
+
+
+# ===== OUTBOX =====
+
+
+def enqueue_whatsapp_message(
+    message: str, sanction_id: Optional[str] = None, mongo_session: Optional[ClientSession] = None
+) -> str:
+    """
+    Queue a WhatsApp text message for the dispatcher.
+
+    With mongo_session the insert joins that transaction, and the dispatcher
+    is not woken (it would not see the message before commit); call
+    dispatcher.wake() once committed.
+
+    Returns:
+        notification_id
+    """
+    now = datetime.now()
+    notification: OutboxNotification = {
+        "channel": "whatsapp",
+        "sanction_id": sanction_id,
+        "payload": {
+            "waba_phone_id": os.getenv("WABA_PHONE_ID"),
+            "to": os.getenv("WHATSAPP_TO_NUMBER"),
+            "message": message,
+            "message_type": "text",
+        },
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "locked_until": None,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    result = notification_outbox_collection.insert_one(notification, session=mongo_session)
+    notification_id = str(result.inserted_id)
+    logger.info(f"[OUTBOX] Queued WhatsApp message {notification_id} (sanction: {sanction_id})")
+    if mongo_session is None:
+        dispatcher.wake()
+    return notification_id
+
+
+def enqueue_sanction_notification(sanction_id: str, mongo_session: Optional[ClientSession] = None) -> str:
+    """Queue the 'loan sanctioned' WhatsApp message with the sanction letter link."""
+    message = (
+        "Your loan has been sanctioned. Your sanction letter is available at "
+        f"{SANCTION_LETTER_BASE_URL}/{sanction_id}"
+    )
+    return enqueue_whatsapp_message(message, sanction_id=sanction_id, mongo_session=mongo_session)
+
+
+def _serialize(notification: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "notification_id": str(notification["_id"]),
+        "channel": notification.get("channel"),
+        "sanction_id": notification.get("sanction_id"),
+        "status": notification.get("status"),
+        "attempts": notification.get("attempts", 0),
+        "next_attempt_at": notification.get("next_attempt_at"),
+        "last_error": notification.get("last_error"),
+        "created_at": notification.get("created_at"),
+        "sent_at": notification.get("sent_at"),
+    }
+
+
+def get_notification(notification_id: str) -> Optional[Dict[str, Any]]:
+    """Delivery status of one notification, or None if not found."""
+    try:
+        notification = notification_outbox_collection.find_one({"_id": ObjectId(notification_id)})
+    except InvalidId:
+        return None
+    return _serialize(notification) if notification else None
+
+
+def get_sanction_notifications(sanction_id: str) -> List[Dict[str, Any]]:
+    """Delivery status of every notification for a sanction, oldest first."""
+    return [
+        _serialize(notification)
+        for notification in notification_outbox_collection.find({"sanction_id": sanction_id}).sort("created_at", 1)
+    ]
+
+
+def claim_due_notifications(limit: int) -> List[ClaimedOutboxNotification]:
+    """Atomically reserve up to limit due messages (pending, or sending with an expired lease)."""
+    claimed: List[ClaimedOutboxNotification] = []
+    for _ in range(limit):
+        now = datetime.now()
+        notification = notification_outbox_collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "pending", "next_attempt_at": {"$lte": now}},
+                    {"status": "sending", "locked_until": {"$lte": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": "sending",
+                    "locked_until": now + timedelta(seconds=NOTIFICATION_LEASE_SECONDS),
+                    "updated_at": now,
+                }
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if notification is None:
+            break
+        claimed.append(notification)
+    return claimed
+
+
+def mark_sent(notification: ClaimedOutboxNotification, provider_response: str) -> None:
+    now = datetime.now()
+    notification_outbox_collection.update_one(
+        {"_id": notification["_id"]},
+        {
+            "$set": {
+                "status": "sent",
+                "sent_at": now,
+                "updated_at": now,
+                "locked_until": None,
+                "last_error": None,
+                "provider_response": provider_response[:1000],
+            },
+            "$inc": {"attempts": 1},
+        },
+    )
+    logger.info(f"[OUTBOX] Sent WhatsApp message {notification['_id']}")
+
+
+def mark_failed(notification: ClaimedOutboxNotification, error: str, retryable: bool = True) -> None:
+    """Record a failed attempt; schedule a retry with backoff or give up."""
+    now = datetime.now()
+    attempts = notification["attempts"] + 1
+    update: Dict[str, Any] = {
+        "attempts": attempts,
+        "updated_at": now,
+        "locked_until": None,
+        "last_error": error[:1000],
+    }
+    if retryable and attempts < NOTIFICATION_MAX_ATTEMPTS:
+        delay = min(NOTIFICATION_RETRY_MAX_SECONDS, NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        update["status"] = "pending"
+        update["next_attempt_at"] = now + timedelta(seconds=delay)
+        logger.warning(
+            f"[OUTBOX] WhatsApp message {notification['_id']} failed (attempt {attempts}), retrying in {delay:.1f}s: {error[:200]}"
+        )
+    else:
+        update["status"] = "failed"
+        logger.error(f"[OUTBOX] WhatsApp message {notification['_id']} failed after {attempts} attempts: {error[:200]}")
+    notification_outbox_collection.update_one({"_id": notification["_id"]}, {"$set": update})
+
+
+# ===== DISPATCHER =====
+
+
+class NotificationDispatcher:
+    """Sends due outbox messages from an asyncio task, over one pooled HTTP client."""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake_event: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start dispatching in the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = wake_event = asyncio.Event()
+        self._client = httpx.AsyncClient(
+            timeout=NOTIFICATION_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=NOTIFICATION_CONCURRENCY,
+                max_keepalive_connections=NOTIFICATION_CONCURRENCY,
+            ),
+        )
+        self._task = asyncio.create_task(self._run(wake_event), name="notification-dispatcher")
+        logger.info(f"[OUTBOX] Dispatcher started - provider: {WAPLIFY_API_URL}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        logger.info("[OUTBOX] Dispatcher stopped")
+
+    def wake(self) -> None:
+        """Check for due messages now (callable from any thread)."""
+        if self.running and self._loop is not None and self._wake_event is not None:
+            self._loop.call_soon_threadsafe(self._wake_event.set)
+
+    async def dispatch_once(self) -> int:
+        """Send one batch of due messages. Returns the number claimed."""
+        client = self._client
+        if client is None:
+            raise RuntimeError("Notification dispatcher is not started")
+        notifications = await asyncio.to_thread(claim_due_notifications, NOTIFICATION_CONCURRENCY)
+        if notifications:
+            await asyncio.gather(*(self._send(client, notification) for notification in notifications))
+        return len(notifications)
+
+    async def _send(self, client: httpx.AsyncClient, notification: ClaimedOutboxNotification) -> None:
+        headers = {
+            "authorization": f"Bearer {os.getenv('WAPLIFY_AUTH_TOKEN')}",
+            "content-type": "application/json",
+        }
+        try:
+            response = await client.post(WAPLIFY_API_URL, headers=headers, json=notification["payload"])
+        except httpx.HTTPError as e:
+            await asyncio.to_thread(mark_failed, notification, f"{type(e).__name__}: {e}")
+            return
+
+        if response.is_success:
+            await asyncio.to_thread(mark_sent, notification, response.text)
+        else:
+            retryable = response.status_code >= 500 or response.status_code in RETRYABLE_STATUS_CODES
+            await asyncio.to_thread(
+                mark_failed, notification, f"HTTP {response.status_code}: {response.text}", retryable
+            )
+
+    async def _run(self, wake_event: asyncio.Event) -> None:
+        while True:
+            # Cleared before claiming, so an enqueue during the batch is not missed
+            wake_event.clear()
+            try:
+                claimed = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[OUTBOX] Dispatcher error: {str(e)}")
+                claimed = 0
+
+            # A full batch means more may be due; otherwise sleep until woken or polled
+            if claimed < NOTIFICATION_CONCURRENCY:
+                try:
+                    await asyncio.wait_for(wake_event.wait(), timeout=NOTIFICATION_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+
+dispatcher = NotificationDispatcher()
+
+
+async def run_worker() -> None:
+    """Run the dispatcher until interrupted (standalone worker process)."""
+    await dispatcher.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await dispatcher.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass
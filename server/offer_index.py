@@ -0,0 +1,215 @@
+"""
+Offer Index - In-memory index over the offer_template catalogue
+
+The offer catalogue is small and rarely changes, but get_interest_rate and
+get_offers_for_credit_score queried it on every offer and eligibility
+check. The index loads all active templates once and answers the same
+range queries (min_credit_score <= score <= max_credit_score, and
+optionally min_amount <= amount <= max_amount) from memory:
+- templates are pre-sorted by base_rate, with Mongo's sort order (missing
+  rates first)
+- a sorted list of credit score breakpoints maps a score, by bisection, to
+  the templates covering it, so a lookup is one bisect plus an amount
+  filter over a handful of templates
+
+The index is loaded at startup and reloaded (one query) on the first lookup
+after it is older than OFFER_INDEX_REFRESH_SECONDS; call load() to pick up
+edited templates immediately. pin() serves a given catalogue instead, never
+reloaded (benchmarks without a database).
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple, TypeGuard
+import numpy as np
+from dotenv import load_dotenv
+from database import offer_template_collection
+from models import OfferTemplate
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+OFFER_INDEX_REFRESH_SECONDS = float(os.getenv("OFFER_INDEX_REFRESH_SECONDS", "60"))
+
+
+# Bounds of a range with a missing end: a Mongo range query never matches it
+EMPTY_RANGE = (math.inf, -math.inf)
+
+
+def _is_number(value) -> TypeGuard[float]:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _rate_sort_key(offer: OfferTemplate) -> Tuple[int, float]:
+    """Mongo ascending sort on base_rate: missing / null rates sort first."""
+    rate = offer.get("base_rate")
+    return (1, float(rate)) if _is_number(rate) else (0, 0.0)
+
+
+def _range(offer: OfferTemplate, low_field: str, high_field: str) -> Tuple[float, float]:
+    """(low, high) bounds of a template range as floats, EMPTY_RANGE if either is missing."""
+    low, high = offer.get(low_field), offer.get(high_field)
+    if _is_number(low) and _is_number(high):
+        return (float(low), float(high))
+    return EMPTY_RANGE
+
+
+class OfferIndexSnapshot:
+    """Immutable index over one load of the catalogue."""
+
+    def __init__(self, offers: List[OfferTemplate]):
+        # Only templates a Mongo range query on credit score could match, with
+        # their (credit score range, amount range) bounds as floats
+        entries = [
+            (offer, _range(offer, "min_credit_score", "max_credit_score"), _range(offer, "min_amount", "max_amount"))
+            for offer in offers
+        ]
+        ranged = sorted(
+            (entry for entry in entries if entry[1] != EMPTY_RANGE),
+            key=lambda entry: _rate_sort_key(entry[0]),
+        )
+        self.offers: List[OfferTemplate] = [offer for offer, _, _ in ranged]
+
+        # Templates covering a score only change at a min_credit_score (enter)
+        # or just above a max_credit_score (leave). Between consecutive
+        # breakpoints the covering set is constant.
+        breakpoints = set()
+        for _, (score_low, score_high), _ in ranged:
+            breakpoints.add(score_low)
+            breakpoints.add(math.nextafter(score_high, math.inf))
+        self.breakpoints: List[float] = sorted(breakpoints)
+        covering_ranged = [
+            [entry for entry in ranged if entry[1][0] <= point <= entry[1][1]]
+            for point in self.breakpoints
+        ]
+        self.covering: List[Tuple[OfferTemplate, ...]] = [
+            tuple(offer for offer, _, _ in entries) for entries in covering_ranged
+        ]
+        self._covering_amounts: List[Tuple[Tuple[float, float], ...]] = [
+            tuple(amount_range for _, _, amount_range in entries) for entries in covering_ranged
+        ]
+
+        # Column arrays for vectorized rate matching (templates with a rate,
+        # best rate first; a missing amount bound is an empty range)
+        rated = [entry for entry in ranged if _is_number(entry[0].get("base_rate"))]
+        self._rate_columns = {
+            "min_credit_score": np.array([score_range[0] for _, score_range, _ in rated], dtype=np.float64),
+            "max_credit_score": np.array([score_range[1] for _, score_range, _ in rated], dtype=np.float64),
+            "min_amount": np.array([amount_range[0] for _, _, amount_range in rated], dtype=np.float64),
+            "max_amount": np.array([amount_range[1] for _, _, amount_range in rated], dtype=np.float64),
+            "base_rate": np.array([offer["base_rate"] for offer, _, _ in rated], dtype=np.float64),
+        }
+        self.loaded_at = time.monotonic()
+
+    def _position(self, credit_score: float) -> int:
+        return bisect_right(self.breakpoints, credit_score) - 1
+
+    def for_credit_score(self, credit_score: float) -> Tuple[OfferTemplate, ...]:
+        """Templates whose credit score range contains credit_score, best rate first."""
+        position = self._position(credit_score)
+        if position < 0:
+            return ()
+        return self.covering[position]
+
+    def match(self, credit_score: float, loan_amount: Optional[float] = None) -> List[OfferTemplate]:
+        """Templates matching credit score and, if given, loan amount, best rate first."""
+        position = self._position(credit_score)
+        if position < 0:
+            return []
+        if loan_amount is None:
+            return list(self.covering[position])
+        return [
+            offer
+            for offer, (amount_low, amount_high) in zip(self.covering[position], self._covering_amounts[position])
+            if amount_low <= loan_amount <= amount_high
+        ]
+
+    def match_rates(self, credit_scores: np.ndarray, loan_amounts: np.ndarray) -> np.ndarray:
+        """
+        Best matching base_rate for each (credit score, loan amount) pair, NaN if
+        no template matches. Vectorized equivalent of the first rated match().
+        """
+        columns = self._rate_columns
+        scores = np.asarray(credit_scores, dtype=np.float64)[..., np.newaxis]
+        amounts = np.asarray(loan_amounts, dtype=np.float64)[..., np.newaxis]
+        matches = (
+            (columns["min_credit_score"] <= scores)
+            & (scores <= columns["max_credit_score"])
+            & (columns["min_amount"] <= amounts)
+            & (amounts <= columns["max_amount"])
+        )
+        if not matches.shape[-1]:
+            return np.full(matches.shape[:-1], np.nan)
+        first = matches.argmax(axis=-1)
+        return np.where(matches.any(axis=-1), columns["base_rate"][first], np.nan)
+
+
+_snapshot: Optional[OfferIndexSnapshot] = None
+_pinned = False
+_load_lock = threading.Lock()
+
+
+def load() -> OfferIndexSnapshot:
+    """Load the active catalogue from the database and swap in a new index."""
+    global _snapshot, _pinned
+    offers = list(offer_template_collection.find({"active": True}))
+    snapshot = OfferIndexSnapshot(offers)
+    _snapshot = snapshot
+    _pinned = False
+    logger.info(
+        f"[OFFER_INDEX] Loaded {len(snapshot.offers)} offer templates, "
+        f"{len(snapshot.breakpoints)} credit score breakpoints"
+    )
+    return snapshot
+
+
+def pin(offers: List[OfferTemplate]) -> OfferIndexSnapshot:
+    """Serve lookups from the given templates, without reloading, until load() is called."""
+    global _snapshot, _pinned
+    _snapshot = OfferIndexSnapshot(offers)
+    _pinned = True
+    return _snapshot
+
+
+def get_index() -> OfferIndexSnapshot:
+    """Current index, reloading it first if it is missing or stale."""
+    snapshot = _snapshot
+    if snapshot is not None and (_pinned or time.monotonic() - snapshot.loaded_at < OFFER_INDEX_REFRESH_SECONDS):
+        return snapshot
+    # One thread reloads; others keep using the stale index meanwhile
+    if not _load_lock.acquire(blocking=snapshot is None):
+        return snapshot  # type: ignore[return-value]
+    try:
+        current = _snapshot
+        if current is not None and current is not snapshot:
+            return current  # Reloaded by another thread while we waited
+        return load()
+    finally:
+        _load_lock.release()
+
+
+def match_offers(credit_score: float, loan_amount: Optional[float] = None) -> List[OfferTemplate]:
+    """
+    Active offer templates for a credit score (and loan amount), best rate first.
+
+    Same result as querying offer_template with the range filters sorted by base_rate.
+    """
+    return get_index().match(credit_score, loan_amount)
+
+
+def get_offer_index_stats() -> Dict:
+    snapshot = _snapshot
+    if snapshot is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "offers": len(snapshot.offers),
+        "breakpoints": len(snapshot.breakpoints),
+        "age_seconds": round(time.monotonic() - snapshot.loaded_at, 1),
+        "refresh_seconds": OFFER_INDEX_REFRESH_SECONDS,
+    }
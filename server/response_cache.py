@@ -0,0 +1,282 @@
+"""
+Response Cache - Semantic cache for stateless informational questions
+
+Questions like "what are the charges?" or "which documents do I need?" get
+near-identical answers for every customer at the same conversation stage,
+yet each goes through the master and a worker agent. For FAQ questions on a
+product topic (is_cacheable_question), this cache:
+- returns a stored reply for the same normalized question (no API call)
+- otherwise embeds the question and returns the stored reply of the most
+  similar question asked in the same scope, above a cosine threshold
+
+Replies are only shared between customers before identification. Once the
+session has a customer_id, entries are scoped to that customer, so a reply
+built from their profile, offers or documents is never served to anyone
+else. Questions about the customer themselves ("what's my EMI?", "am I
+eligible?"), carrying figures, or referring back to earlier turns ("how much
+will the EMI be then?", "what about the other option?") are not cached at
+all, nor is anything once the session has a loan amount or tenure (replies
+then quote the customer's offer).
+
+Entries expire after RESPONSE_CACHE_TTL_SECONDS and are evicted LRU beyond
+RESPONSE_CACHE_MAX_ENTRIES. Replies that changed session state or mention
+the customer are never stored. Hit ratio and latency saved are reported by
+get_cache_stats().
+"""
+
+import os
+import re
+import time
+import uuid
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings
+from ttl_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+# Minimum cosine similarity for a semantic hit
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+
+# Product topics answered the same way for every customer (FAQ / offer terms)
+INFO_TOPIC_PATTERN = re.compile(
+    r"\b(documents?|papers|interest rates?|rates? of interest|roi|charges|fees?|"
+    r"tenure|prepay\w*|pre-?closure|foreclos\w*|part[- ]?payment|eligibility criteria|"
+    r"disburs\w*|processing time|how long|age limit|minimum (salary|income)|collateral|guarantor)\b"
+)
+# Questions about the customer's own application, profile or figures
+PERSONAL_PATTERN = re.compile(r"\b(my|mine|me|myself|am i|i am|i'm|i have|i've|i earn)\b|\d")
+# Follow-ups whose answer depends on earlier turns
+REFERENCE_PATTERN = re.compile(
+    r"\b(then|that|those|this|these|it|its|other|same|previous|earlier|above|instead|what if|what about|how about)\b"
+)
+# Session fields that make replies quote the customer's own offer
+OFFER_STATE_FIELDS = ("loan_amount", "tenure_months")
+
+SHARED_SCOPE = "anonymous"
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+BASE_URL = os.getenv("OPENAI_API_BASE")
+
+embeddings = OpenAIEmbeddings(
+    model=EMBEDDING_MODEL,
+    base_url=BASE_URL if BASE_URL else None,
+    timeout=10,
+)
+
+
+@dataclass
+class CachedResponse:
+    """A stored reply and the question embedding it is matched on."""
+
+    scope: str  # SHARED_SCOPE before identification, else the customer_id
+    stage: str
+    question: str
+    embedding: np.ndarray  # unit-normalized
+    response: str
+    latency_ms: float  # time the uncached turn took to produce the reply
+
+
+@dataclass
+class CacheLookup:
+    """Result of a cache lookup; pass it back to store() on a miss."""
+
+    scope: str
+    stage: str
+    question: str
+    cacheable: bool
+    response: Optional[str] = None
+    embedding: Optional[np.ndarray] = None
+    started_at: float = 0.0
+
+
+_entries: TTLLRUCache[CachedResponse] = TTLLRUCache(
+    maxsize=RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS
+)
+# (scope, stage, normalized question) -> entry id, for exact repeats without an embedding call
+_exact_keys: TTLLRUCache[str] = TTLLRUCache(
+    maxsize=RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS
+)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "lookups": 0,
+    "exact_hits": 0,
+    "semantic_hits": 0,
+    "misses": 0,
+    "stored": 0,
+    "latency_saved_ms": 0.0,
+}
+
+
+def _count(field: str, amount: float = 1) -> None:
+    with _stats_lock:
+        _stats[field] += amount
+
+
+def normalize_question(message: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", message.lower()).strip(" ?!.")
+
+
+def has_offer_state(session_state: Optional[Dict[str, Any]]) -> bool:
+    """True once the session has a loan amount or tenure."""
+    return any((session_state or {}).get(field) for field in OFFER_STATE_FIELDS)
+
+
+def is_cacheable_question(message: str, session_state: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    True for FAQ questions on a product topic (documents, rates, charges,
+    tenure...) that don't depend on the conversation: not about the
+    customer's own case or figures, not a follow-up to earlier turns, and
+    asked before the session has a loan amount or tenure.
+    """
+    normalized = normalize_question(message)
+    if PERSONAL_PATTERN.search(normalized) or REFERENCE_PATTERN.search(normalized):
+        return False
+    if has_offer_state(session_state):
+        return False
+    return bool(INFO_TOPIC_PATTERN.search(normalized))
+
+
+def cache_scope(customer_id: Optional[str]) -> str:
+    """Entries are shared only while no customer is identified."""
+    return str(customer_id) if customer_id else SHARED_SCOPE
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+def _find_similar(scope: str, stage: str, embedding: np.ndarray) -> Optional[CachedResponse]:
+    """Most similar live entry for the scope and stage above the similarity threshold."""
+    candidates = [entry for _, entry in _entries.items() if entry.scope == scope and entry.stage == stage]
+    if not candidates:
+        return None
+    matrix = np.stack([entry.embedding for entry in candidates])
+    similarities = matrix @ embedding
+    best = int(np.argmax(similarities))
+    if similarities[best] < RESPONSE_CACHE_SIMILARITY:
+        return None
+    logger.info(f"[CACHE] Semantic match {similarities[best]:.3f}: {candidates[best].question[:80]}")
+    return candidates[best]
+
+
+async def lookup(message: str, stage: str, session_state: Optional[Dict[str, Any]] = None) -> CacheLookup:
+    """
+    Look up a cached reply for a customer message at a conversation stage.
+
+    Args:
+        session_state: The session's state; its customer_id, if any, scopes the entries
+
+    Returns:
+        CacheLookup - response is set on a hit; cacheable is False for
+        messages that are not FAQ product questions (skip store())
+    """
+    started_at = time.perf_counter()
+    question = normalize_question(message)
+    scope = cache_scope((session_state or {}).get("customer_id"))
+    result = CacheLookup(scope=scope, stage=stage, question=question, cacheable=False, started_at=started_at)
+
+    if not RESPONSE_CACHE_ENABLED or not question or not is_cacheable_question(message, session_state):
+        return result
+    result.cacheable = True
+    _count("lookups")
+
+    entry_id = _exact_keys.get((scope, stage, question))
+    entry = _entries.get(entry_id) if entry_id else None
+    if entry:
+        _count("exact_hits")
+    else:
+        try:
+            result.embedding = _unit(await embeddings.aembed_query(question))
+        except Exception as e:
+            logger.error(f"[CACHE] Error embedding question: {str(e)}")
+            result.cacheable = False
+            _count("misses")
+            return result
+        entry = _find_similar(scope, stage, result.embedding)
+        if entry:
+            _count("semantic_hits")
+
+    if not entry:
+        _count("misses")
+        return result
+
+    lookup_ms = (time.perf_counter() - started_at) * 1000
+    _count("latency_saved_ms", max(0.0, entry.latency_ms - lookup_ms))
+    logger.info(f"[CACHE] Hit - Stage: {stage}, Lookup: {lookup_ms:.0f}ms, Saved: {entry.latency_ms - lookup_ms:.0f}ms")
+    result.response = entry.response
+    return result
+
+
+async def store(result: CacheLookup, response: str, session_state: Dict[str, Any], stage_after: Optional[str]) -> bool:
+    """
+    Store the reply of an uncached informational turn.
+
+    Skipped if the turn changed the conversation stage, identified the
+    customer (the reply belongs to their scope, not the shared one), set a
+    loan amount or tenure, or the reply mentions the customer.
+
+    Returns:
+        True if stored
+    """
+    if not result.cacheable or result.response is not None or not response:
+        return False
+    if stage_after != result.stage:
+        return False
+    if cache_scope(session_state.get("customer_id")) != result.scope:
+        return False
+    if has_offer_state(session_state):
+        return False
+    customer = session_state.get("customer_data") or {}
+    identifiers = [customer.get("name"), session_state.get("customer_id")]
+    response_lower = response.lower()
+    if any(value and str(value).lower() in response_lower for value in identifiers):
+        return False
+
+    try:
+        embedding = result.embedding
+        if embedding is None:
+            embedding = _unit(await embeddings.aembed_query(result.question))
+    except Exception as e:
+        logger.error(f"[CACHE] Error embedding question: {str(e)}")
+        return False
+
+    entry_id = str(uuid.uuid4())
+    _entries.set(entry_id, CachedResponse(
+        scope=result.scope,
+        stage=result.stage,
+        question=result.question,
+        embedding=embedding,
+        response=response,
+        latency_ms=(time.perf_counter() - result.started_at) * 1000,
+    ))
+    _exact_keys.set((result.scope, result.stage, result.question), entry_id)
+    _count("stored")
+    scope_label = "shared" if result.scope == SHARED_SCOPE else "customer"
+    logger.info(f"[CACHE] Stored reply - Scope: {scope_label}, Stage: {result.stage}, Question: {result.question[:80]}")
+    return True
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Hit ratio, counters and total latency saved."""
+    with _stats_lock:
+        stats = dict(_stats)
+    hits = stats["exact_hits"] + stats["semantic_hits"]
+    stats["hit_ratio"] = round(hits / stats["lookups"], 4) if stats["lookups"] else 0.0
+    stats["latency_saved_ms"] = round(stats["latency_saved_ms"], 1)
+    stats["entries"] = len(_entries)
+    stats["enabled"] = RESPONSE_CACHE_ENABLED
+    return stats
@@ -6,12 +6,14 @@ Usage:
 
 Or with custom settings:
     uv run runner.py --reload
+    uv run runner.py --skip-migrations  # indexes already set up by a deploy step
 """
 
 import os
 import argparse
 import uvicorn
 from dotenv import load_dotenv
+from create_tables import create_collections_and_indexes
 
 load_dotenv()
 
@@ -52,6 +54,13 @@ def main():
         help="Log level (default: info)",
     )
 
+    parser.add_argument(
+        "--skip-migrations",
+        action="store_true",
+        default=os.getenv("SKIP_MIGRATIONS", "false").lower() == "true",
+        help="Don't create/verify MongoDB indexes (create_tables.py) before starting",
+    )
+
     args = parser.parse_args()
 
     print("=" * 60)
@@ -69,6 +78,13 @@ def main():
     print(f"ReDoc: http://{args.host}:{args.port}/redoc")
     print("=" * 60 + "\n")
 
+    # Once per start, before the workers, instead of on every import of database.py
+    if not args.skip_migrations:
+        try:
+            create_collections_and_indexes()
+        except Exception as e:
+            print(f"\nWarning: index setup failed, starting anyway: {str(e)}\n")
+
     uvicorn.run(
         "app:app",
         host=args.host,
@@ -13,10 +13,12 @@ This module provides services backed by MongoDB for:
 """
 
 import logging
-from typing import Dict, Optional
+import re
+from typing import Dict, List, Optional
 from datetime import datetime
-import requests
 import os
+import numpy as np
+from bson import ObjectId
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,12 +26,42 @@ load_dotenv()
 from database import (
     users_collection,
     kycs_collection,
-    offer_template_collection,
     sanctions_collection,
+    run_in_transaction,
+)
+from customer_cache import get_cached_customer, cache_customer, invalidate_customer
+from notification_outbox import dispatcher as notification_dispatcher, enqueue_sanction_notification
+from offer_index import match_offers
+from emi_engine import emi_summary, emi_table, amortization_schedule, batch_emi
+from eligibility_engine import (
+    evaluate_eligibility,
+    MAX_EMI_TO_SALARY,
+    MAX_LIMIT_MULTIPLIER,
+    MIN_CREDIT_SCORE,
+    STATUS_NAMES,
+    REASON_NAMES,
 )
 
 logger = logging.getLogger(__name__)
 
+PAN_PATTERN = re.compile(r"[A-Z]{5}[0-9]{4}[A-Z]")
+
+# Default interest rates by credit score category, used when no offer template matches
+DEFAULT_INTEREST_RATES = {
+    "excellent": {"min": 10.5, "max": 12.0},  # 750+
+    "good": {"min": 12.5, "max": 14.5},  # 700-749
+    "fair": {"min": 15.0, "max": 18.0},  # 650-699
+    "poor": {"min": 18.5, "max": 24.0},  # <650
+}
+
+# Offer grid (get_offer_grid)
+OFFER_GRID_TENURES = [
+    int(t) for t in os.getenv("OFFER_GRID_TENURES", "12,24,36,48,60").split(",")
+]
+OFFER_GRID_AMOUNT_STEPS = int(os.getenv("OFFER_GRID_AMOUNT_STEPS", "8"))
+# Grid ceiling for customers without a pre-approved limit
+OFFER_GRID_DEFAULT_MAX_AMOUNT = float(os.getenv("OFFER_GRID_DEFAULT_MAX_AMOUNT", "500000"))
+
 
 def _normalize_phone(phone: str) -> str:
     """Normalize phone number to 10-digit format (without +91 prefix)."""
@@ -107,6 +139,10 @@ def get_customer_by_phone(phone: str) -> Optional[Dict]:
 
     normalized_phone = _normalize_phone(phone)
 
+    cached = get_cached_customer(("phone", normalized_phone))
+    if cached:
+        return cached
+
     # Query users collection
     user = users_collection.find_one({"phone": normalized_phone})
 
@@ -120,6 +156,7 @@ def get_customer_by_phone(phone: str) -> Optional[Dict]:
     kyc = kycs_collection.find_one({"phone": normalized_phone})
 
     customer_data = _build_customer_data(user, kyc)
+    cache_customer(("phone", normalized_phone), customer_data)
     logger.info(
         f"[SERVICE] get_customer_by_phone - Customer found: {customer_data['customer_id']}"
     )
@@ -132,6 +169,10 @@ def get_customer_by_pan(pan: str) -> Optional[Dict]:
 
     pan_upper = pan.upper().strip()
 
+    cached = get_cached_customer(("pan", pan_upper))
+    if cached:
+        return cached
+
     # Query kycs collection to get phone number
     kyc = kycs_collection.find_one({"pan": pan_upper})
 
@@ -168,6 +209,7 @@ def get_customer_by_pan(pan: str) -> Optional[Dict]:
                 customer_data["dob"] = dob.strftime("%Y-%m-%d")
                 customer_data["age"] = (datetime.now() - dob).days // 365
 
+    cache_customer(("pan", pan_upper), customer_data)
     logger.info(
         f"[SERVICE] get_customer_by_pan - Customer found: {customer_data.get('customer_id')}"
     )
@@ -184,6 +226,10 @@ def get_customer_by_id(customer_id: str) -> Optional[Dict]:
     # customer_id is the normalized phone number
     normalized_phone = _normalize_phone(customer_id)
 
+    cached = get_cached_customer(("phone", normalized_phone))
+    if cached:
+        return cached
+
     # Query users collection
     user = users_collection.find_one({"phone": normalized_phone})
 
@@ -197,6 +243,7 @@ def get_customer_by_id(customer_id: str) -> Optional[Dict]:
     kyc = kycs_collection.find_one({"phone": normalized_phone})
 
     customer_data = _build_customer_data(user, kyc)
+    cache_customer(("phone", normalized_phone), customer_data)
     logger.info(
         f"[SERVICE] get_customer_by_id - Customer found: {customer_data['customer_id']}"
     )
@@ -377,6 +424,37 @@ def verify_otp(phone: str, otp: str) -> Dict:
     }
 
 
+def invalidate_customer_profile(customer_id: str) -> Dict:
+    """
+    Drop a customer's cached profile under every key (phone and PAN) in this process.
+
+    customer_id may be the customer_id (phone, in any format), a PAN, or the
+    KYC record id used as customer_id for customers without a phone.
+    """
+    value = customer_id.strip()
+    phone = None
+    if PAN_PATTERN.fullmatch(value.upper()):
+        kyc = kycs_collection.find_one({"pan": value.upper()}, {"phone": 1, "pan": 1})
+    elif ObjectId.is_valid(value):
+        kyc = kycs_collection.find_one({"_id": ObjectId(value)}, {"phone": 1, "pan": 1})
+    else:
+        phone = _normalize_phone(value)
+        kyc = kycs_collection.find_one({"phone": phone}, {"phone": 1, "pan": 1})
+
+    if kyc and kyc.get("phone"):
+        phone = _normalize_phone(kyc["phone"])
+    pans = [kyc.get("pan")] if kyc else []
+    if PAN_PATTERN.fullmatch(value.upper()):
+        pans.append(value)
+
+    invalidate_customer(phone=phone, pans=pans)
+    return {
+        "success": True,
+        "customer_id": phone or value,
+        "message": f"Customer cache invalidated: {phone or value}",
+    }
+
+
 def fetch_credit_score(customer_id: str) -> Dict:
     """Fetch credit score from database (kycs collection)."""
     logger.info(f"[SERVICE] fetch_credit_score called - customer_id: {customer_id}")
@@ -384,8 +462,13 @@ def fetch_credit_score(customer_id: str) -> Dict:
     # customer_id is the normalized phone number
     normalized_phone = _normalize_phone(customer_id)
 
-    # Query KYC collection for credit score
-    kyc = kycs_collection.find_one({"phone": normalized_phone})
+    # Credit score comes from kycs; use the cached profile when it has one
+    cached = get_cached_customer(("phone", normalized_phone))
+    if cached and cached.get("credit_score") is not None:
+        kyc = {"credit_score": cached["credit_score"]}
+    else:
+        # Query KYC collection for credit score
+        kyc = kycs_collection.find_one({"phone": normalized_phone})
 
     if kyc and kyc.get("credit_score") is not None:
         score = kyc["credit_score"]
@@ -456,15 +539,7 @@ def calculate_emi(loan_amount: float, tenure_months: int, interest_rate: float)
         logger.warning(f"[SERVICE] calculate_emi - Invalid input parameters")
         return {"success": False, "message": "Invalid input parameters"}
 
-    monthly_rate = interest_rate / (12 * 100)
-    emi = (
-        loan_amount
-        * monthly_rate
-        * ((1 + monthly_rate) ** tenure_months)
-        / (((1 + monthly_rate) ** tenure_months) - 1)
-    )
-    total_amount = emi * tenure_months
-    total_interest = total_amount - loan_amount
+    emi, total_amount, total_interest = emi_summary(loan_amount, tenure_months, interest_rate)
 
     logger.info(
         f"[SERVICE] calculate_emi - Calculated EMI: ₹{round(emi, 2):,.2f}, Total: ₹{round(total_amount, 2):,.2f}"
@@ -480,6 +555,71 @@ def calculate_emi(loan_amount: float, tenure_months: int, interest_rate: float)
     }
 
 
+
+def calculate_emi_options(loan_amounts: List[float], tenures: List[int], interest_rate: float) -> Dict:
+    """EMI comparison table for several loan amounts and tenures at one interest rate."""
+    logger.info(
+        f"[SERVICE] calculate_emi_options called - amounts: {loan_amounts}, tenures: {tenures}, rate: {interest_rate}%"
+    )
+
+    if (
+        not loan_amounts
+        or not tenures
+        or interest_rate <= 0
+        or any(amount <= 0 for amount in loan_amounts)
+        or any(tenure <= 0 for tenure in tenures)
+    ):
+        logger.warning(f"[SERVICE] calculate_emi_options - Invalid input parameters")
+        return {"success": False, "message": "Invalid input parameters"}
+
+    emis = emi_table(loan_amounts, tenures, interest_rate)
+    options = [
+        {
+            "loan_amount": amount,
+            "emis": [
+                {
+                    "tenure_months": tenure,
+                    "emi": round(float(emi), 2),
+                    "total_interest": round(float(emi) * tenure - amount, 2),
+                }
+                for tenure, emi in zip(tenures, row)
+            ],
+        }
+        for amount, row in zip(loan_amounts, emis)
+    ]
+
+    logger.info(f"[SERVICE] calculate_emi_options - Calculated {emis.size} EMIs")
+    return {
+        "success": True,
+        "interest_rate": interest_rate,
+        "options": options,
+    }
+
+
+def get_amortization_schedule(loan_amount: float, tenure_months: int, interest_rate: float) -> Dict:
+    """Month-by-month repayment schedule (principal, interest, outstanding balance)."""
+    logger.info(
+        f"[SERVICE] get_amortization_schedule called - amount: ₹{loan_amount:,.0f}, tenure: {tenure_months} months, rate: {interest_rate}%"
+    )
+
+    if loan_amount <= 0 or tenure_months <= 0 or interest_rate <= 0:
+        logger.warning(f"[SERVICE] get_amortization_schedule - Invalid input parameters")
+        return {"success": False, "message": "Invalid input parameters"}
+
+    schedule = amortization_schedule(loan_amount, tenure_months, interest_rate)
+    emi, total_amount, total_interest = emi_summary(loan_amount, tenure_months, interest_rate)
+
+    return {
+        "success": True,
+        "loan_amount": loan_amount,
+        "tenure_months": tenure_months,
+        "interest_rate": interest_rate,
+        "emi": round(emi, 2),
+        "total_amount": round(total_amount, 2),
+        "total_interest": round(total_interest, 2),
+        "schedule": schedule.to_rows(),
+    }
+
 def get_interest_rate(credit_score: int, loan_amount: float) -> float:
     """
     Get interest rate based on credit score and loan amount.
@@ -489,31 +629,18 @@ def get_interest_rate(credit_score: int, loan_amount: float) -> float:
         f"[SERVICE] get_interest_rate called - credit_score: {credit_score}, loan_amount: ₹{loan_amount:,.0f}"
     )
 
-    # Try to find matching offer template from database
-    offer = offer_template_collection.find_one(
-        {
-            "active": True,
-            "min_credit_score": {"$lte": credit_score},
-            "max_credit_score": {"$gte": credit_score},
-            "min_amount": {"$lte": loan_amount},
-            "max_amount": {"$gte": loan_amount},
-        }
+    # Best-rate matching offer template, from the in-memory offer index
+    offer = next(
+        (o for o in match_offers(credit_score, loan_amount) if o.get("base_rate") is not None),
+        None,
     )
 
-    if offer and offer.get("base_rate") is not None:
+    if offer:
         rate = offer["base_rate"]
         logger.info(f"[SERVICE] get_interest_rate - Rate from offer template: {rate}%")
         return round(rate, 2)
 
     # Fall back to default interest rate calculation
-    # Interest rates based on credit score
-    interest_rates = {
-        "excellent": {"min": 10.5, "max": 12.0},  # 750+
-        "good": {"min": 12.5, "max": 14.5},  # 700-749
-        "fair": {"min": 15.0, "max": 18.0},  # 650-699
-        "poor": {"min": 18.5, "max": 24.0},  # <650
-    }
-
     if credit_score >= 750:
         category = "excellent"
     elif credit_score >= 700:
@@ -523,7 +650,7 @@ def get_interest_rate(credit_score: int, loan_amount: float) -> float:
     else:
         category = "poor"
 
-    rate_range = interest_rates[category]
+    rate_range = DEFAULT_INTEREST_RATES[category]
 
     # Higher loan amounts get slightly better rates
     if loan_amount >= 1000000:
@@ -548,8 +675,11 @@ def check_eligibility(
 
     Rules:
     1. Instant Approval: If requested_amount <= pre_approved_limit
-    2. Conditional Approval: If requested_amount <= 2 * pre_approved_limit (requires salary slip)
-    3. Rejection: If requested_amount > 2 * pre_approved_limit OR credit_score < 700
+    2. Conditional Approval: If requested_amount <= MAX_LIMIT_MULTIPLIER * pre_approved_limit
+       (requires salary slip; rejected if EMI > MAX_EMI_TO_SALARY * salary)
+    3. Rejection: If requested_amount > MAX_LIMIT_MULTIPLIER * pre_approved_limit OR credit_score < MIN_CREDIT_SCORE
+
+    The thresholds are eligibility_engine's, shared with the vectorized rules.
     """
     logger.info(
         f"[SERVICE] check_eligibility called - customer_id: {customer_id}, amount: ₹{requested_amount:,.0f}, tenure: {tenure_months} months"
@@ -578,33 +708,33 @@ def check_eligibility(
         if credit_result.get("success"):
             credit_score = credit_result["credit_score"]
 
-    # Rule 1: Rejection if credit score < 700
-    if credit_score < 700:
+    # Rule 1: Rejection if credit score < MIN_CREDIT_SCORE
+    if credit_score < MIN_CREDIT_SCORE:
         logger.warning(
-            f"[SERVICE] check_eligibility - REJECTED: Credit score {credit_score} < 700"
+            f"[SERVICE] check_eligibility - REJECTED: Credit score {credit_score} < {MIN_CREDIT_SCORE}"
         )
         return {
             "eligible": False,
             "status": "rejected",
             "message": "Loan application rejected",
-            "reason": f"Credit score {credit_score} is below minimum requirement of 700",
+            "reason": f"Credit score {credit_score} is below minimum requirement of {MIN_CREDIT_SCORE}",
             "credit_score": credit_score,
             "pre_approved_limit": pre_approved_limit,
         }
 
-    # Rule 2: Rejection if requested amount > 2 * pre_approved_limit
-    if pre_approved_limit > 0 and requested_amount > 2 * pre_approved_limit:
+    # Rule 2: Rejection if requested amount > MAX_LIMIT_MULTIPLIER * pre_approved_limit
+    if pre_approved_limit > 0 and requested_amount > MAX_LIMIT_MULTIPLIER * pre_approved_limit:
         logger.warning(
-            f"[SERVICE] check_eligibility - REJECTED: Amount ₹{requested_amount:,} > 2x limit ₹{2 * pre_approved_limit:,}"
+            f"[SERVICE] check_eligibility - REJECTED: Amount ₹{requested_amount:,} > {MAX_LIMIT_MULTIPLIER}x limit ₹{MAX_LIMIT_MULTIPLIER * pre_approved_limit:,}"
         )
         return {
             "eligible": False,
             "status": "rejected",
             "message": "Loan application rejected",
-            "reason": f"Requested amount ₹{requested_amount:,} exceeds maximum eligible limit of ₹{2 * pre_approved_limit:,}",
+            "reason": f"Requested amount ₹{requested_amount:,} exceeds maximum eligible limit of ₹{MAX_LIMIT_MULTIPLIER * pre_approved_limit:,}",
             "requested_amount": requested_amount,
             "pre_approved_limit": pre_approved_limit,
-            "max_eligible": 2 * pre_approved_limit,
+            "max_eligible": MAX_LIMIT_MULTIPLIER * pre_approved_limit,
         }
 
     # Rule 3: Instant Approval if requested_amount <= pre_approved_limit
@@ -653,12 +783,12 @@ def check_eligibility(
             "requires_salary_slip": True,
         }
 
-    # Check if EMI <= 50% of salary
-    max_allowable_emi = salary * 0.5
+    # Check if EMI <= MAX_EMI_TO_SALARY x salary
+    max_allowable_emi = salary * MAX_EMI_TO_SALARY
 
     if emi <= max_allowable_emi:
         logger.info(
-            f"[SERVICE] check_eligibility - CONDITIONAL APPROVAL: EMI ₹{emi:,.2f} <= 50% salary (₹{max_allowable_emi:,.2f})"
+            f"[SERVICE] check_eligibility - CONDITIONAL APPROVAL: EMI ₹{emi:,.2f} <= {MAX_EMI_TO_SALARY:.0%} salary (₹{max_allowable_emi:,.2f})"
         )
         return {
             "eligible": True,
@@ -677,13 +807,13 @@ def check_eligibility(
         }
     else:
         logger.warning(
-            f"[SERVICE] check_eligibility - REJECTED: EMI ₹{emi:,.2f} > 50% salary (₹{max_allowable_emi:,.2f})"
+            f"[SERVICE] check_eligibility - REJECTED: EMI ₹{emi:,.2f} > {MAX_EMI_TO_SALARY:.0%} salary (₹{max_allowable_emi:,.2f})"
         )
         return {
             "eligible": False,
             "status": "rejected",
             "message": "Loan application rejected",
-            "reason": f"EMI ₹{emi:,.2f} exceeds 50% of salary (₹{max_allowable_emi:,.2f})",
+            "reason": f"EMI ₹{emi:,.2f} exceeds {MAX_EMI_TO_SALARY:.0%} of salary (₹{max_allowable_emi:,.2f})",
             "requested_amount": requested_amount,
             "emi": emi,
             "salary": salary,
@@ -739,31 +869,12 @@ def get_offers_for_credit_score(credit_score: int, loan_amount: float = None) ->
         f"[SERVICE] get_offers_for_credit_score called - credit_score: {credit_score}, loan_amount: {loan_amount}"
     )
 
-    # Build query for matching offers
-    query = {
-        "active": True,
-        "min_credit_score": {"$lte": credit_score},
-        "max_credit_score": {"$gte": credit_score},
-    }
-
-    # Add loan amount filter if provided
-    if loan_amount:
-        query["min_amount"] = {"$lte": loan_amount}
-        query["max_amount"] = {"$gte": loan_amount}
-
-    # Fetch matching offers sorted by base_rate (best rate first)
-    offers = list(offer_template_collection.find(query).sort("base_rate", 1))
+    # Matching offers sorted by base_rate (best rate first), from the in-memory offer index
+    offers = match_offers(credit_score, loan_amount or None)
 
-    if not offers:
+    if not offers and loan_amount:
         # Try without amount filter if no matches
-        query_no_amount = {
-            "active": True,
-            "min_credit_score": {"$lte": credit_score},
-            "max_credit_score": {"$gte": credit_score},
-        }
-        offers = list(
-            offer_template_collection.find(query_no_amount).sort("base_rate", 1)
-        )
+        offers = match_offers(credit_score)
 
     if offers:
         formatted_offers = []
@@ -837,6 +948,121 @@ def get_offers_for_credit_score(credit_score: int, loan_amount: float = None) ->
     }
 
 
+def get_offer_grid(
+    customer_id: str,
+    tenures: Optional[List[int]] = None,
+    amount_steps: Optional[int] = None,
+) -> Dict:
+    """
+    Precomputed offer grid for a customer: every loan amount step up to 2x the
+    pre-approved limit against every tenure, with rate, EMI and eligibility.
+
+    Rates and eligibility follow check_eligibility: each amount is priced
+    with get_interest_rate for that amount (best offer template covering
+    it, else the default rates).
+
+    Args:
+        customer_id: Customer ID
+        tenures: Tenures in months (default OFFER_GRID_TENURES, 12-60)
+        amount_steps: Number of amount steps (default OFFER_GRID_AMOUNT_STEPS)
+    """
+    logger.info(f"[SERVICE] get_offer_grid called - customer_id: {customer_id}")
+
+    customer = get_customer_by_id(customer_id)
+    if not customer:
+        logger.warning(f"[SERVICE] get_offer_grid - Customer not found: {customer_id}")
+        return {"success": False, "message": "Customer not found"}
+
+    credit_score = customer.get("credit_score", 0)
+    if not credit_score:
+        credit_result = fetch_credit_score(customer_id)
+        if credit_result.get("success"):
+            credit_score = credit_result["credit_score"]
+    pre_approved_limit = customer.get("pre_approved_limit", 0) or 0
+    salary = customer.get("salary")
+
+    tenures = sorted(set(tenures or OFFER_GRID_TENURES))
+    steps = amount_steps or OFFER_GRID_AMOUNT_STEPS
+    max_amount = MAX_LIMIT_MULTIPLIER * pre_approved_limit if pre_approved_limit else OFFER_GRID_DEFAULT_MAX_AMOUNT
+    # Evenly spaced steps, rounded to the nearest ₹10,000
+    amounts = sorted(
+        {max(10000.0, round(max_amount * step / steps, -4)) for step in range(1, steps + 1)}
+    )
+
+    # One offer lookup per amount; rates do not depend on tenure. Only offers
+    # covering the amount count, so a cell's rate is the one check_eligibility quotes
+    offers = []
+    for amount in amounts:
+        matched = next(
+            (o for o in match_offers(credit_score, amount) if o.get("base_rate") is not None),
+            {},
+        )
+        offers.append(
+            {
+                "offer_name": matched.get("name", "Tata Capital Personal Loan"),
+                "interest_rate": get_interest_rate(credit_score, amount),
+                "processing_fee_pct": matched.get("processing_fee_pct", 3.5),
+                "min_tenure_months": matched.get("min_tenure_months", 12),
+                "max_tenure_months": matched.get("max_tenure_months", 60),
+            }
+        )
+
+    amount_column = np.array(amounts)[:, np.newaxis]
+    tenure_row = np.array(tenures, dtype=np.float64)[np.newaxis, :]
+    rate_column = np.array([offer["interest_rate"] for offer in offers])[:, np.newaxis]
+
+    emis = batch_emi(amount_column, tenure_row, rate_column)
+    eligibility = evaluate_eligibility(
+        credit_score,
+        pre_approved_limit,
+        amount_column,
+        emis.emi,
+        salary if salary is not None else np.nan,
+    )
+
+    rows = []
+    for i, (amount, offer) in enumerate(zip(amounts, offers)):
+        options = []
+        for j, tenure in enumerate(tenures):
+            option = {
+                "tenure_months": tenure,
+                "emi": round(float(emis.emi[i, j]), 2),
+                "total_interest": round(float(emis.total_interest[i, j]), 2),
+                "eligible": bool(eligibility.eligible[i, j]),
+                "status": STATUS_NAMES[eligibility.status[i, j]],
+                "within_offer_tenure": offer["min_tenure_months"] <= tenure <= offer["max_tenure_months"],
+            }
+            if eligibility.reason[i, j]:
+                option["reason"] = REASON_NAMES[eligibility.reason[i, j]]
+            options.append(option)
+        rows.append(
+            {
+                "loan_amount": amount,
+                "offer_name": offer["offer_name"],
+                "interest_rate": offer["interest_rate"],
+                "processing_fee": round(amount * offer["processing_fee_pct"] / 100, 2),
+                "processing_fee_pct": offer["processing_fee_pct"],
+                "approval_type": "instant" if amount <= pre_approved_limit else "conditional",
+                "requires_salary_slip": bool(eligibility.requires_salary_slip[i].any()),
+                "options": options,
+            }
+        )
+
+    eligible_cells = int(eligibility.eligible.sum())
+    logger.info(
+        f"[SERVICE] get_offer_grid - {len(amounts)} amounts x {len(tenures)} tenures, {eligible_cells} eligible"
+    )
+    return {
+        "success": True,
+        "customer_id": customer_id,
+        "credit_score": credit_score,
+        "pre_approved_limit": pre_approved_limit,
+        "max_eligible_amount": MAX_LIMIT_MULTIPLIER * pre_approved_limit if pre_approved_limit else None,
+        "tenures": tenures,
+        "grid": rows,
+        "message": f"Offer grid with {eligible_cells} eligible options out of {eligibility.status.size}",
+    }
+
 def get_loan_charges_info() -> Dict:
     """
     Get all loan charges and fees information.
@@ -990,39 +1216,25 @@ def create_sanction(
             "updated_at": now,
         }
 
-        # Insert into database
-        result = sanctions_collection.insert_one(sanction_doc)
-        sanction_id = str(result.inserted_id)
-
-        waplify_token = os.getenv("WAPLIFY_AUTH_TOKEN")
-        waba_phone_id = os.getenv("WABA_PHONE_ID")
-        to_number = os.getenv("WHATSAPP_TO_NUMBER")
-        message = f"Your loan has been sanctioned. Your sanction letter is available at https://vittam.growsoc.com/letters/{result.inserted_id}"
-
-        url = "https://app.waplify.io/api/whatsapp/send-message"
-        headers = {
-            "authorization": f"Bearer {waplify_token}",
-            "content-type": "application/json",
-        }
-        data = {
-            "waba_phone_id": waba_phone_id,
-            "to": to_number,
-            "message": message,
-            "message_type": "text",
-        }
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code != 200:
-            logger.error(f"[SERVICE] create_sanction - Failed to send WhatsApp message: {response.text}")
-            return {
-                "success": False,
-                "message": f"Failed to send WhatsApp message: {response.text}",
-            }
-        logger.info(f"[SERVICE] create_sanction - WhatsApp message sent successfully")
-
-        # Update document with sanction_id
-        sanctions_collection.update_one(
-            {"_id": result.inserted_id}, {"$set": {"sanction_id": sanction_id}}
-        )
+        # Single insert with a pre-generated ID, so the record is complete once written
+        sanction_oid = ObjectId()
+        sanction_id = str(sanction_oid)
+        sanction_doc["_id"] = sanction_oid
+        sanction_doc["sanction_id"] = sanction_id
+
+        def write_sanction(mongo_session) -> str:
+            sanctions_collection.insert_one(sanction_doc, session=mongo_session)
+            # WhatsApp notification is sent by the outbox dispatcher, off the request path;
+            # queued in the same transaction so a sanction is never left without it
+            return enqueue_sanction_notification(sanction_id, mongo_session)
+
+        try:
+            notification_id = run_in_transaction(write_sanction)
+        except Exception:
+            # Without transactions (standalone server) the sanction may have been written alone
+            sanctions_collection.delete_one({"_id": sanction_oid})
+            raise
+        notification_dispatcher.wake()
 
         logger.info(
             f"[SERVICE] create_sanction - Sanction created successfully: {sanction_id} for customer: {customer_id}"
@@ -1031,6 +1243,7 @@ def create_sanction(
         return {
             "success": True,
             "sanction_id": sanction_id,
+            "notification_id": notification_id,
             "message": "Sanction created successfully",
         }
     except Exception as e:
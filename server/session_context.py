@@ -0,0 +1,75 @@
+"""
+Request-scoped Session Context
+
+Holds the session state that agent tools read and mutate while handling a
+single chat turn. The context lives in a ContextVar, so every request (or CLI
+turn) sees only its own customer even when many conversations run
+concurrently on the same event loop. LangChain copies the current context
+into the executor threads it uses for sync tools, and the state dict is
+shared by reference, so tool updates are visible to the caller.
+"""
+
+from contextvars import ContextVar, Token
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from turn_service import ChatTurn
+
+
+def new_session_state() -> Dict[str, Any]:
+    """Return a fresh session state for a new conversation."""
+    return {
+        "customer_id": None,
+        "loan_amount": None,
+        "tenure_months": None,
+        "conversation_stage": "initial",  # initial, needs_analysis, verification, underwriting, sanction
+        "customer_data": None,
+        "conversation_history": [],
+    }
+
+
+class SessionContext:
+    """Session state, session ID and document status for the current request."""
+
+    def __init__(
+        self,
+        session_id: Optional[str] = None,
+        state: Optional[Dict[str, Any]] = None,
+        verified_documents: Optional[Dict[str, bool]] = None,
+        history_summary: Optional[str] = None,
+        turn: Optional["ChatTurn"] = None,
+    ):
+        self.session_id = session_id
+        self.state = state if state is not None else new_session_state()
+        self.state.setdefault("conversation_history", [])
+        # Document verification status: {doc_id: is_verified}
+        self.verified_documents = verified_documents or {}
+        # Rolling summary of turns no longer sent verbatim (see history_service.py)
+        self.history_summary = history_summary
+        # Unit of work for API chat turns; None in the CLI (see turn_service.py)
+        self.turn = turn
+        # Token usage of worker agent calls made during this request
+        self.sub_agent_usage: List[Dict[str, Any]] = []
+
+
+_session_context: ContextVar[SessionContext] = ContextVar("session_context")
+
+
+def get_session_context() -> SessionContext:
+    """Get the session context for the current request, creating an empty one if unset."""
+    try:
+        return _session_context.get()
+    except LookupError:
+        context = SessionContext()
+        _session_context.set(context)
+        return context
+
+
+def set_session_context(context: SessionContext) -> Token:
+    """Bind a session context to the current request. Returns a token for reset."""
+    return _session_context.set(context)
+
+
+def reset_session_context(token: Token) -> None:
+    """Restore the session context that was active before set_session_context."""
+    _session_context.reset(token)
@@ -3,6 +3,7 @@
 from datetime import datetime, timezone
 from typing import Optional, List
 from bson import ObjectId
+from pymongo.client_session import ClientSession
 from database import sessions_collection
 from models import Session, SessionMetadata
 
@@ -43,3 +44,12 @@ def update_session(session_id: str, metadata: Optional[SessionMetadata] = None,
         set_data["documents"] = documents  # type: ignore
     sessions_collection.update_one({"session_id": session_id}, {"$set": set_data})
     return get_session(session_id)
+
+
+def add_session_document(session_id: str, document_id: ObjectId, mongo_session: Optional[ClientSession] = None) -> None:
+    """Link a document to the session (atomic, no-op if already linked)"""
+    sessions_collection.update_one(
+        {"session_id": session_id},
+        {"$addToSet": {"documents": document_id}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        session=mongo_session
+    )
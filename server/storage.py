@@ -0,0 +1,216 @@
+"""
+Storage - Document file storage backends
+
+Uploaded documents live on the local filesystem (STORE_DIR) or in S3,
+chosen by USE_REMOTE_UPLOAD; each document records which ("remote"), so
+both kinds can be read regardless of the current setting. Callers go
+through StorageBackend instead of branching on the flag:
+- put / get / get_range / exists / delete (blocking, for worker threads)
+- aput / aget / aget_range (async, run on the default executor)
+
+S3Storage uses the client from config.py, whose connection pool, timeouts
+and retries are tuned there; set S3_ENDPOINT_URL to run it against an
+S3-compatible stand-in such as stub_s3_server.py. It can also presign PUTs
+so clients upload straight to the bucket (presign_put / head).
+"""
+
+import io
+import os
+import base64
+import asyncio
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Union
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+from config import s3, BUCKET_NAME
+
+load_dotenv()
+
+STORE_DIR = Path(__file__).parent / "store"
+USE_REMOTE_UPLOAD = bool(int(os.getenv("USE_REMOTE_UPLOAD", "0")))
+
+# Copy size for local writes and S3 multipart parts
+STORAGE_CHUNK_BYTES = int(os.getenv("STORAGE_CHUNK_BYTES", str(1024 * 1024)))
+
+# S3 multipart upload: each in-flight part is buffered, so keep few per upload
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=int(os.getenv("S3_UPLOAD_CONCURRENCY", "2")),
+)
+
+
+class StorageBackend(ABC):
+    """Blob storage addressed by key (a relative path or S3 object key)."""
+
+    name = "storage"
+
+    @abstractmethod
+    def put(self, key: str, source: BinaryIO) -> None:
+        """Store the contents of a file object, replacing the key only once complete."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        """Contents of key. Raises FileNotFoundError if missing."""
+
+    @abstractmethod
+    def get_range(self, key: str, start: int, length: int) -> bytes:
+        """Up to length bytes of key from offset start."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        self.put(key, io.BytesIO(data))
+
+    async def aput(self, key: str, source: Union[bytes, BinaryIO]) -> None:
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        await asyncio.to_thread(self.put, key, source)
+
+    async def aget(self, key: str) -> bytes:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aget_range(self, key: str, start: int, length: int) -> bytes:
+        return await asyncio.to_thread(self.get_range, key, start, length)
+
+
+class LocalStorage(StorageBackend):
+    """Files under a root directory (keys are paths relative to it)."""
+
+    name = "local"
+
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def put(self, key: str, source: BinaryIO) -> None:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the target and swap in once complete
+        partial_path = path.with_name(path.name + ".part")
+        try:
+            with open(partial_path, "wb") as f:
+                while chunk := source.read(STORAGE_CHUNK_BYTES):
+                    f.write(chunk)
+            os.replace(partial_path, path)
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
+
+    def get(self, key: str) -> bytes:
+        return self.path(key).read_bytes()
+
+    def get_range(self, key: str, start: int, length: int) -> bytes:
+        with open(self.path(key), "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+
+class S3Storage(StorageBackend):
+    """Objects in an S3 (or S3-compatible) bucket."""
+
+    name = "s3"
+
+    def __init__(self, bucket: Optional[str] = BUCKET_NAME, client=s3):
+        self.bucket = bucket
+        self.client = client
+
+    def put(self, key: str, source: BinaryIO) -> None:
+        # Multipart for large files; a failed upload is aborted and the previous object kept
+        self.client.upload_fileobj(source, self.bucket, key, Config=S3_TRANSFER_CONFIG)
+
+    def _get_object(self, key: str, **kwargs) -> bytes:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key, **kwargs)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                raise FileNotFoundError(key) from e
+            raise
+        with response["Body"] as body:
+            return body.read()
+
+    def get(self, key: str) -> bytes:
+        return self._get_object(key)
+
+    def get_range(self, key: str, start: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        return self._get_object(key, Range=f"bytes={start}-{start + length - 1}")
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404", "NotFound"):
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def presign_put(
+        self,
+        key: str,
+        size: int,
+        content_type: Optional[str] = None,
+        sha256: Optional[str] = None,
+        expires_in: int = 900,
+    ) -> Dict[str, Any]:
+        """
+        URL and headers for a client to PUT an object directly. Size (and the
+        SHA-256 hex digest, if given) are signed, so S3 rejects any other body.
+        """
+        params: Dict[str, Any] = {"Bucket": self.bucket, "Key": key, "ContentLength": size}
+        headers = {"Content-Length": str(size)}
+        if content_type:
+            params["ContentType"] = content_type
+            headers["Content-Type"] = content_type
+        if sha256:
+            checksum = base64.b64encode(bytes.fromhex(sha256)).decode("ascii")
+            params["ChecksumSHA256"] = checksum
+            headers["x-amz-checksum-sha256"] = checksum
+        url = self.client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in)
+        return {"url": url, "method": "PUT", "headers": headers, "expires_in": expires_in}
+
+    def head(self, key: str) -> Dict[str, Any]:
+        """Size and SHA-256 hex digest (None unless uploaded with one) of key. Raises FileNotFoundError if missing."""
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key, ChecksumMode="ENABLED")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404", "NotFound"):
+                raise FileNotFoundError(key) from e
+            raise
+        checksum = response.get("ChecksumSHA256")
+        return {
+            "size": response["ContentLength"],
+            # Multipart objects carry a checksum of part checksums ("...-N"), not of the content
+            "sha256": base64.b64decode(checksum).hex() if checksum and "-" not in checksum else None,
+        }
+
+
+local_storage = LocalStorage()
+s3_storage = S3Storage()
+
+
+def get_storage(remote: Optional[bool] = None) -> StorageBackend:
+    """Backend for a document's "remote" flag (default: where new uploads go)."""
+    if remote is None:
+        remote = USE_REMOTE_UPLOAD
+    return s3_storage if remote else local_storage
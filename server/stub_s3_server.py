@@ -0,0 +1,200 @@
+"""
+Stub S3 Server - Local S3-compatible stand-in for document storage
+
+Implements the S3 calls storage.S3Storage makes (path-style URLs, no
+signature checks), keeping objects in memory:
+- PUT / GET (with Range) / HEAD / DELETE object, including presigned PUTs
+  (x-amz-checksum-sha256 is verified on PUT and returned on HEAD)
+- multipart upload: create, upload part, complete, abort
+Buckets are created on first use. Optional latency per request simulates a
+remote store.
+
+Usage:
+    uv run stub_s3_server.py --port 9000 --latency 0.02
+    S3_ENDPOINT_URL=http://localhost:9000 USE_REMOTE_UPLOAD=1 BUCKET_NAME=vittam \\
+        AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x AWS_REGION=us-east-1 uv run app.py
+"""
+
+import re
+import time
+import uuid
+import base64
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+PART_PATTERN = re.compile(r"<PartNumber>(\d+)</PartNumber>")
+
+
+class ObjectStore:
+    """Thread-safe in-memory objects and pending multipart uploads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.checksums: Dict[Tuple[str, str], str] = {}
+        self.uploads: Dict[str, Dict[int, bytes]] = {}
+
+
+def make_handler(store: ObjectStore, latency: float):
+    class StubS3Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, as with real S3
+
+        def _target(self) -> Tuple[str, str, Dict[str, list]]:
+            url = urlsplit(self.path)
+            bucket, _, key = url.path.lstrip("/").partition("/")
+            return bucket, unquote(key), parse_qs(url.query, keep_blank_values=True)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("content-length") or 0))
+
+        def _reply(self, status: int, body: bytes = b"", headers: Dict[str, str] = None, send_body: bool = True):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            if send_body and body:
+                self.wfile.write(body)
+
+        def _error(self, status: int, code: str, send_body: bool = True):
+            body = f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><Error><Code>{code}</Code><Message>{code}</Message></Error>"
+            self._reply(status, body.encode(), {"content-type": "application/xml"}, send_body)
+
+        def do_PUT(self):
+            time.sleep(latency)
+            bucket, key, query = self._target()
+            data = self._body()
+            etag = f'"{hashlib.md5(data).hexdigest()}"'
+            checksum = self.headers.get("x-amz-checksum-sha256")
+            if checksum and checksum != base64.b64encode(hashlib.sha256(data).digest()).decode():
+                return self._error(400, "BadDigest")
+            with store.lock:
+                if "uploadId" in query:
+                    parts = store.uploads.get(query["uploadId"][0])
+                    if parts is None:
+                        return self._error(404, "NoSuchUpload")
+                    parts[int(query["partNumber"][0])] = data
+                elif key:
+                    store.objects[(bucket, key)] = data
+                    if checksum:
+                        store.checksums[(bucket, key)] = checksum
+                    else:
+                        store.checksums.pop((bucket, key), None)
+            self._reply(200, headers={"etag": etag})
+
+        def do_POST(self):
+            time.sleep(latency)
+            bucket, key, query = self._target()
+            body = self._body()
+            if "uploads" in query:
+                upload_id = uuid.uuid4().hex
+                with store.lock:
+                    store.uploads[upload_id] = {}
+                xml = (
+                    "<?xml version=\"1.0\" encoding=\"UTF-8\"?><InitiateMultipartUploadResult>"
+                    f"<Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId>"
+                    "</InitiateMultipartUploadResult>"
+                )
+                return self._reply(200, xml.encode(), {"content-type": "application/xml"})
+
+            if "uploadId" in query:
+                with store.lock:
+                    parts = store.uploads.pop(query["uploadId"][0], None)
+                    if parts is None:
+                        return self._error(404, "NoSuchUpload")
+                    numbers = [int(n) for n in PART_PATTERN.findall(body.decode())]
+                    data = b"".join(parts[n] for n in numbers)
+                    store.objects[(bucket, key)] = data
+                    store.checksums.pop((bucket, key), None)
+                xml = (
+                    "<?xml version=\"1.0\" encoding=\"UTF-8\"?><CompleteMultipartUploadResult>"
+                    f"<Bucket>{bucket}</Bucket><Key>{key}</Key><ETag>\"{hashlib.md5(data).hexdigest()}-{len(numbers)}\"</ETag>"
+                    "</CompleteMultipartUploadResult>"
+                )
+                return self._reply(200, xml.encode(), {"content-type": "application/xml"})
+
+            self._error(400, "InvalidRequest")
+
+        def _get(self, send_body: bool):
+            time.sleep(latency)
+            bucket, key, _ = self._target()
+            with store.lock:
+                data = store.objects.get((bucket, key))
+                checksum = store.checksums.get((bucket, key))
+            if data is None:
+                return self._error(404, "NoSuchKey", send_body)
+
+            headers = {
+                "content-type": "application/octet-stream",
+                "etag": f'"{hashlib.md5(data).hexdigest()}"',
+                "last-modified": formatdate(usegmt=True),
+                "accept-ranges": "bytes",
+            }
+            if checksum and self.headers.get("x-amz-checksum-mode", "").upper() == "ENABLED":
+                headers["x-amz-checksum-sha256"] = checksum
+            match = RANGE_PATTERN.fullmatch(self.headers.get("range", ""))
+            if match and data:
+                start, end = match.groups()
+                if start:
+                    first, last = int(start), min(int(end) if end else len(data) - 1, len(data) - 1)
+                else:
+                    first, last = max(0, len(data) - int(end)), len(data) - 1
+                if first >= len(data):
+                    return self._error(416, "InvalidRange", send_body)
+                headers["content-range"] = f"bytes {first}-{last}/{len(data)}"
+                return self._reply(206, data[first:last + 1], headers, send_body)
+            self._reply(200, data, headers, send_body)
+
+        def do_GET(self):
+            self._get(send_body=True)
+
+        def do_HEAD(self):
+            self._get(send_body=False)
+
+        def do_DELETE(self):
+            time.sleep(latency)
+            bucket, key, query = self._target()
+            with store.lock:
+                if "uploadId" in query:
+                    store.uploads.pop(query["uploadId"][0], None)
+                else:
+                    store.objects.pop((bucket, key), None)
+                    store.checksums.pop((bucket, key), None)
+            self._reply(204)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubS3Handler
+
+
+def make_server(host: str = "127.0.0.1", port: int = 9000, latency: float = 0.0) -> ThreadingHTTPServer:
+    """Create (not start) a stub server; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), make_handler(ObjectStore(), latency))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub S3-compatible server for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering (default: 0)")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency)
+    print(f"Stub S3 server on http://{args.host}:{args.port} (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Stub Waplify Server - Local stand-in for the WhatsApp provider API
+
+Accepts the POSTs the notification outbox dispatcher sends, logs them and
+answers like the provider, optionally with latency and random failures to
+exercise retries.
+
+Usage:
+    uv run stub_waplify_server.py --port 8099 --fail-rate 0.3 --latency 0.5
+    WAPLIFY_API_URL=http://localhost:8099/api/whatsapp/send-message uv run app.py
+"""
+
+import json
+import time
+import uuid
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(fail_rate: float, latency: float):
+    class StubWaplifyHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("content-length") or 0)
+            body = self.rfile.read(length)
+            time.sleep(latency)
+
+            if not self.headers.get("authorization", "").startswith("Bearer "):
+                return self._reply(401, {"success": False, "message": "Missing bearer token"})
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                return self._reply(400, {"success": False, "message": "Invalid JSON"})
+            if random.random() < fail_rate:
+                return self._reply(503, {"success": False, "message": "Stub failure (--fail-rate)"})
+
+            print(f"[STUB] {self.path} to={payload.get('to')} message={payload.get('message')!r}")
+            self._reply(200, {"success": True, "message_id": str(uuid.uuid4())})
+
+        def _reply(self, status: int, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubWaplifyHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub WhatsApp provider for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503 (default: 0)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering (default: 0)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.fail_rate, args.latency))
+    print(f"Stub Waplify server on http://{args.host}:{args.port} (fail rate {args.fail_rate}, latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Turn Service - Per-turn unit of work for chat requests
+
+A chat turn used to read and write MongoDB piecemeal (session twice, history,
+documents twice, both messages, session update plus re-read, latest sanction).
+ChatTurn batches that work:
+- load(): one aggregation reads the session, its unsummarized history, its
+  documents and its latest sanction ($lookup)
+- messages and session state are kept in memory while the agent runs
+- flush(): both messages go out in one bulk_write, the session in one update
+
+Tools that write session state mid-turn (sync_session_to_db) defer to the
+flush when a ChatTurn is bound to the session context.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import InsertOne
+from langchain_core.messages import BaseMessage
+from database import (
+    sessions_collection,
+    conversations_collection,
+    documents_collection,
+    sanctions_collection,
+    start_round_trip_count,
+)
+from customer_cache import start_customer_memo
+from document_service import get_documents_by_session
+from history_service import to_langchain_messages, trim_to_budget
+from models import Conversation, Document, Session, SessionMetadata
+from session_service import create_session
+
+logger = logging.getLogger(__name__)
+
+# Same bound as get_conversations_since: unsummarized messages read per turn
+HISTORY_LOAD_LIMIT = 100
+
+
+def _turn_pipeline(session_id: str) -> List[Dict[str, Any]]:
+    """Aggregation that loads a session with everything a chat turn reads."""
+    return [
+        {"$match": {"session_id": session_id}},
+        {"$limit": 1},
+        # Newest unsummarized history (after the (created_at, _id) summary cursor), oldest first
+        {"$lookup": {
+            "from": conversations_collection.name,
+            "let": {
+                "sid": "$session_id",
+                "since": {"$ifNull": ["$history_summarized_until", None]},
+                "since_id": {"$ifNull": ["$history_summarized_until_id", None]},
+            },
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$session_id", "$$sid"]},
+                    {"$or": [
+                        {"$eq": ["$$since", None]},
+                        {"$gt": ["$created_at", "$$since"]},
+                        {"$and": [
+                            {"$ne": ["$$since_id", None]},
+                            {"$eq": ["$created_at", "$$since"]},
+                            {"$gt": ["$_id", "$$since_id"]},
+                        ]},
+                    ]},
+                ]}}},
+                {"$sort": {"created_at": -1, "_id": -1}},
+                {"$limit": HISTORY_LOAD_LIMIT},
+                {"$sort": {"created_at": 1, "_id": 1}},
+            ],
+            "as": "conversations",
+        }},
+        {"$lookup": {
+            "from": documents_collection.name,
+            "localField": "session_id",
+            "foreignField": "session_id",
+            "as": "turn_documents",
+        }},
+        # Most recent sanction only
+        {"$lookup": {
+            "from": sanctions_collection.name,
+            "let": {"sid": "$session_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$session_id", "$$sid"]}}},
+                {"$sort": {"created_at": -1}},
+                {"$limit": 1},
+                {"$project": {"sanction_id": 1}},
+            ],
+            "as": "latest_sanction",
+        }},
+    ]
+
+
+class ChatTurn:
+    """Reads and writes for one chat turn, batched into as few round-trips as possible."""
+
+    def __init__(self, session_id: str, user_message: str):
+        self.session_id = session_id
+        self.user_message = user_message
+        self.session: Session = {}
+        self.conversations: List[Conversation] = []
+        self.documents: List[Document] = []
+        self.latest_sanction_id: Optional[str] = None
+        # Set by the sanction tool when a sanction is created during this turn
+        self.created_sanction_id: Optional[str] = None
+        # Set when documents were verified during this turn (loaded copy is stale)
+        self.documents_dirty = False
+        self._pending_messages: List[Conversation] = []
+        # Must be started on the request's own context, not in a worker thread
+        self._round_trips = start_round_trip_count()
+        start_customer_memo()
+
+    @property
+    def round_trips(self) -> int:
+        """MongoDB round-trips made by this request so far."""
+        return self._round_trips[0]
+
+    # ===== LOAD =====
+
+    def load(self) -> None:
+        """Load session, unsummarized history, documents and latest sanction in one aggregation."""
+        results = list(sessions_collection.aggregate(_turn_pipeline(self.session_id)))
+
+        if results:
+            loaded = results[0]
+            self.conversations = loaded.pop("conversations", [])
+            self.documents = loaded.pop("turn_documents", [])
+            latest_sanction = loaded.pop("latest_sanction", [])
+            if latest_sanction:
+                self.latest_sanction_id = (
+                    latest_sanction[0].get("sanction_id") or str(latest_sanction[0]["_id"])
+                )
+            self.session = loaded  # type: ignore
+        else:
+            # New session: nothing else to load
+            self.session = create_session(self.session_id, {"conversation_stage": "initial"}, True)
+
+        self.add_message("user", self.user_message)
+        logger.info(
+            f"[TURN] Loaded session {self.session_id} - Messages: {len(self.conversations)}, "
+            f"Documents: {len(self.documents)}"
+        )
+
+    def session_state(self) -> Dict[str, Any]:
+        """Build the agent session state from the loaded session metadata."""
+        metadata = self.session.get("metadata", {})
+        return {
+            "customer_id": metadata.get("customer_id"),
+            "loan_amount": metadata.get("loan_amount"),
+            "tenure_months": metadata.get("tenure_months"),
+            "conversation_stage": metadata.get("conversation_stage", "initial"),
+            "customer_data": metadata.get("customer_data"),
+        }
+
+    def agent_history(self) -> Tuple[Optional[str], List[BaseMessage]]:
+        """
+        Agent context for this turn, as history_service.load_agent_history.
+
+        Returns:
+            (history_summary, recent_messages including the new user message)
+        """
+        messages = to_langchain_messages(self.conversations + self._pending_messages)
+        return self.session.get("history_summary"), trim_to_budget(messages)
+
+    def get_documents(self) -> List[Document]:
+        """Documents for the session, re-read only if they were verified during this turn."""
+        if self.documents_dirty:
+            self.documents = get_documents_by_session(self.session_id)
+            self.documents_dirty = False
+        return self.documents
+
+    @property
+    def sanction_id(self) -> Optional[str]:
+        """Sanction created during this turn, else the latest one loaded for the session."""
+        return self.created_sanction_id or self.latest_sanction_id
+
+    # ===== WRITE =====
+
+    def add_message(self, role: str, content: str, agent_type: Optional[str] = None) -> None:
+        """Stage a conversation message; written on flush()."""
+        now = datetime.now(timezone.utc)
+        self._pending_messages.append({
+            "session_id": self.session_id,
+            "message": {"role": role, "content": content, "timestamp": now},
+            "created_at": now,
+            "agent_type": agent_type,
+        })
+
+    def flush(self, session_state: Dict[str, Any]) -> None:
+        """Write staged messages (one bulk_write) and the session state (one update)."""
+        if self._pending_messages:
+            conversations_collection.bulk_write(
+                [InsertOne(doc) for doc in self._pending_messages], ordered=True
+            )
+            self.conversations.extend(self._pending_messages)
+            self._pending_messages = []
+
+        metadata: SessionMetadata = {
+            "customer_id": session_state.get("customer_id"),
+            "loan_amount": session_state.get("loan_amount"),
+            "tenure_months": session_state.get("tenure_months"),
+            "conversation_stage": session_state.get("conversation_stage"),
+            "customer_data": session_state.get("customer_data"),
+        }
+        sessions_collection.update_one(
+            {"session_id": self.session_id},
+            {"$set": {"metadata": metadata, "updated_at": datetime.now(timezone.utc)}},
+        )
+        logger.info(
+            f"[TURN] Flushed session {self.session_id} - DB round trips this request: {self.round_trips}"
+        )
@@ -0,0 +1,111 @@
+"""
+Verification Cache - Reuse verdicts for identical document uploads
+
+Customers often upload the same file twice (as identity and address proof,
+or again after a network error), and each upload cost a PDF render and a
+vision-model call. create_document stores a SHA-256 of the file; verdicts
+are cached under (content hash, doc_id, prompt version, vision model) at two
+levels:
+- a process-wide TTL/LRU cache (VERIFICATION_CACHE_MAX_ENTRIES, evicted
+  least recently used, entries live VERIFICATION_CACHE_TTL_SECONDS)
+- the verification_cache collection, shared by API processes and job
+  workers, removed after 30 days by a TTL index on created_at
+
+Only verdicts the model actually produced are cached, never errors or
+unparseable responses. Bump VERIFICATION_PROMPT_VERSION when the prompt
+changes so stale verdicts stop matching. Counters are reported by
+get_verification_cache_stats().
+"""
+
+import os
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from pymongo.errors import PyMongoError
+from database import verification_cache_collection
+from ttl_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+VERIFICATION_CACHE_ENABLED = os.getenv("VERIFICATION_CACHE_ENABLED", "true").lower() == "true"
+VERIFICATION_CACHE_TTL_SECONDS = float(os.getenv("VERIFICATION_CACHE_TTL_SECONDS", "3600"))
+VERIFICATION_CACHE_MAX_ENTRIES = int(os.getenv("VERIFICATION_CACHE_MAX_ENTRIES", "2048"))
+
+_memory_cache: TTLLRUCache[Dict[str, Any]] = TTLLRUCache(
+    maxsize=VERIFICATION_CACHE_MAX_ENTRIES, ttl_seconds=VERIFICATION_CACHE_TTL_SECONDS
+)
+
+_counters_lock = threading.Lock()
+_counters = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "stores": 0}
+
+
+def _count(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def cache_key(content_sha256: str, doc_id: str, prompt_version: str, model: str) -> str:
+    return f"{content_sha256}:{doc_id}:{prompt_version}:{model}"
+
+
+def get_cached_verdict(key: str) -> Optional[Dict[str, Any]]:
+    """Cached verify_document_with_langchain result for key, or None."""
+    if not VERIFICATION_CACHE_ENABLED:
+        return None
+
+    verdict = _memory_cache.get(key)
+    if verdict is not None:
+        _count("memory_hits")
+        return verdict
+
+    try:
+        entry = verification_cache_collection.find_one({"_id": key}, {"verdict": 1})
+    except PyMongoError as e:
+        logger.error(f"[VERIFY_CACHE] Error reading cache: {str(e)}")
+        entry = None
+    if entry is None:
+        _count("misses")
+        return None
+
+    _count("mongo_hits")
+    _memory_cache.set(key, entry["verdict"])
+    return entry["verdict"]
+
+
+def store_verdict(key: str, verdict: Dict[str, Any]) -> None:
+    """Cache a verdict produced by the vision model."""
+    if not VERIFICATION_CACHE_ENABLED:
+        return
+
+    _memory_cache.set(key, verdict)
+    try:
+        verification_cache_collection.replace_one(
+            {"_id": key},
+            {"verdict": verdict, "created_at": datetime.now(timezone.utc)},
+            upsert=True,
+        )
+    except PyMongoError as e:
+        logger.error(f"[VERIFY_CACHE] Error writing cache: {str(e)}")
+        return
+    _count("stores")
+
+
+def get_verification_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters (memory and Mongo) and in-process cache size."""
+    with _counters_lock:
+        counters = dict(_counters)
+    hits = counters["memory_hits"] + counters["mongo_hits"]
+    lookups = hits + counters["misses"]
+    memory = _memory_cache.stats()
+    return {
+        "enabled": VERIFICATION_CACHE_ENABLED,
+        **counters,
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "memory_size": memory["size"],
+        "memory_maxsize": memory["maxsize"],
+        "memory_evictions": memory["evictions"],
+    }
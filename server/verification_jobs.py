@@ -0,0 +1,370 @@
+"""
+Verification Jobs - Mongo-backed queue for document verification
+
+Verifying documents takes a vision-model call per document (5-15 s each), too
+long to hold an HTTP request open behind the load balancer. The verify
+endpoints now enqueue a job in the verification_jobs collection and return
+202 with its job_id; workers run the job and store its result, which clients
+read from GET /jobs/{job_id}:
+- queued -> running -> succeeded / failed
+- jobs are claimed atomically, oldest first, so workers can run in several
+  API processes and in separate worker processes
+- a job left "running" by a crashed worker is reclaimed when its lease
+  expires, up to VERIFICATION_JOB_MAX_ATTEMPTS
+- asking to verify a session or document that already has a queued job
+  returns that job instead of adding another (one upsert on dedupe_key,
+  unique among queued jobs; a running job may be checking an older upload,
+  so it is not reused)
+
+With AUTO_VERIFY_ON_UPLOAD=true each upload enqueues a document job, so
+verification is usually finished by the time the agent or the widget asks.
+A session job waits for the session's earlier document jobs and reuses their
+outcome rather than calling the vision model again: while they are active it
+goes back to the queue for VERIFICATION_JOB_REQUEUE_SECONDS, freeing its
+worker for them.
+
+Finished jobs are pushed to the customer's next /chat/stream turn as
+"verification" events (VERIFICATION_PUSH_TO_CHAT_STREAM), and removed after
+7 days by a TTL index on finished_at.
+
+Workers run in the API's event loop (app.py lifespan) unless
+VERIFICATION_WORKERS_ENABLED=false; run this module for a separate worker:
+    uv run verification_jobs.py
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from dotenv import load_dotenv
+from database import documents_collection, verification_jobs_collection
+from document_verification_service import verify_document, verify_session_documents
+from models import ClaimedVerificationJob, VerificationJob
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+VERIFICATION_WORKERS_ENABLED = os.getenv("VERIFICATION_WORKERS_ENABLED", "true").lower() == "true"
+# Jobs run at once per process (a session job verifies its documents in parallel itself)
+VERIFICATION_WORKERS = int(os.getenv("VERIFICATION_WORKERS", "4"))
+AUTO_VERIFY_ON_UPLOAD = os.getenv("AUTO_VERIFY_ON_UPLOAD", "true").lower() == "true"
+VERIFICATION_PUSH_TO_CHAT_STREAM = os.getenv("VERIFICATION_PUSH_TO_CHAT_STREAM", "true").lower() == "true"
+# How often idle workers check for jobs queued by other processes
+VERIFICATION_JOB_POLL_SECONDS = float(os.getenv("VERIFICATION_JOB_POLL_SECONDS", "2"))
+# How long a claimed job is reserved for the worker running it
+VERIFICATION_JOB_LEASE_SECONDS = float(os.getenv("VERIFICATION_JOB_LEASE_SECONDS", "300"))
+VERIFICATION_JOB_MAX_ATTEMPTS = int(os.getenv("VERIFICATION_JOB_MAX_ATTEMPTS", "3"))
+# Longest a session job waits for earlier document jobs
+VERIFICATION_JOB_WAIT_SECONDS = float(os.getenv("VERIFICATION_JOB_WAIT_SECONDS", "120"))
+# How long a waiting session job stays back in the queue before it checks again
+VERIFICATION_JOB_REQUEUE_SECONDS = float(os.getenv("VERIFICATION_JOB_REQUEUE_SECONDS", "2"))
+
+ACTIVE_STATUSES = ["queued", "running"]
+
+
+# ===== QUEUE =====
+
+
+def _dedupe_key(kind: str, session_id: str, document_id: Optional[str]) -> str:
+    return f"{kind}:{session_id}:{document_id or ''}"
+
+
+def _enqueue(kind: str, session_id: str, document_id: Optional[str] = None) -> str:
+    """Insert a queued job, or return the one already queued for the same work."""
+    dedupe_key = _dedupe_key(kind, session_id, document_id)
+    now = datetime.now(timezone.utc)
+    job: VerificationJob = {
+        "_id": ObjectId(),
+        "dedupe_key": dedupe_key,
+        "kind": kind,
+        "session_id": session_id,
+        "document_id": document_id,
+        "status": "queued",
+        "attempts": 0,
+        "result": None,
+        "error": None,
+        "delivered": False,
+        "locked_until": None,
+        "run_after": None,
+        "created_at": now,
+        "updated_at": now,
+        "started_at": None,
+        "finished_at": None,
+    }
+    # dedupe_key is unique while set (queued jobs), so concurrent requests get one job
+    try:
+        existing = verification_jobs_collection.find_one_and_update(
+            {"dedupe_key": dedupe_key}, {"$setOnInsert": job}, projection={"_id": 1}, upsert=True
+        )
+    except DuplicateKeyError:
+        # A concurrent request inserted it first
+        existing = verification_jobs_collection.find_one({"dedupe_key": dedupe_key}, {"_id": 1})
+    if existing:
+        return str(existing["_id"])
+
+    job_id = str(job["_id"])
+    logger.info(f"[JOBS] Queued {kind} verification job {job_id} - Session: {session_id}, Document: {document_id}")
+    worker.wake()
+    return job_id
+
+
+def enqueue_session_verification(session_id: str) -> str:
+    """Queue verification of all of a session's documents. Returns the job_id."""
+    return _enqueue("session", session_id)
+
+
+def enqueue_document_verification(document_id: str) -> Optional[str]:
+    """Queue verification of one document. Returns the job_id, or None if the document doesn't exist."""
+    try:
+        document = documents_collection.find_one({"_id": ObjectId(document_id)}, {"session_id": 1})
+    except InvalidId:
+        return None
+    if not document:
+        return None
+    return _enqueue("document", document["session_id"], document_id)
+
+
+def _serialize(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": str(job["_id"]),
+        "kind": job.get("kind"),
+        "session_id": job.get("session_id"),
+        "document_id": job.get("document_id"),
+        "status": job.get("status"),
+        "attempts": job.get("attempts", 0),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Status (and result, once finished) of a job, or None if not found."""
+    try:
+        job = verification_jobs_collection.find_one({"_id": ObjectId(job_id)})
+    except InvalidId:
+        return None
+    return _serialize(job) if job else None
+
+
+def take_undelivered_results(session_id: str) -> List[Dict[str, Any]]:
+    """Finished jobs of a session not yet pushed to its chat stream, marked as delivered."""
+    jobs = list(
+        verification_jobs_collection.find(
+            {"session_id": session_id, "status": {"$in": ["succeeded", "failed"]}, "delivered": False}
+        ).sort("finished_at", 1)
+    )
+    if jobs:
+        verification_jobs_collection.update_many(
+            {"_id": {"$in": [job["_id"] for job in jobs]}}, {"$set": {"delivered": True}}
+        )
+    return [_serialize(job) for job in jobs]
+
+
+def session_verification_pending(session_id: str) -> bool:
+    """Whether the session has active jobs or documents still awaiting a verdict."""
+    if verification_jobs_collection.find_one({"session_id": session_id, "status": {"$in": ACTIVE_STATUSES}}, {"_id": 1}):
+        return True
+    return documents_collection.find_one(
+        {"session_id": session_id, "verification_status": {"$nin": ["verified", "rejected"]}}, {"_id": 1}
+    ) is not None
+
+
+def _earlier_jobs_active(job: ClaimedVerificationJob) -> bool:
+    """Whether the job's session has queued or running jobs created before it."""
+    return verification_jobs_collection.find_one(
+        {
+            "session_id": job["session_id"],
+            "status": {"$in": ACTIVE_STATUSES},
+            "created_at": {"$lt": job["created_at"]},
+            "_id": {"$ne": job["_id"]},
+        },
+        {"_id": 1},
+    ) is not None
+
+
+def claim_job() -> Optional[ClaimedVerificationJob]:
+    """Atomically reserve the oldest queued job that is due (or a running one whose lease expired)."""
+    now = datetime.now(timezone.utc)
+    return verification_jobs_collection.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued", "run_after": {"$not": {"$gt": now}}},
+                {"status": "running", "locked_until": {"$lte": now}},
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "locked_until": now + timedelta(seconds=VERIFICATION_JOB_LEASE_SECONDS),
+                "started_at": now,
+                "updated_at": now,
+            },
+            # Requests from now on queue a new job (this one may check an older upload)
+            "$unset": {"dedupe_key": ""},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _finish(job: ClaimedVerificationJob, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+    now = datetime.now(timezone.utc)
+    verification_jobs_collection.update_one(
+        {"_id": job["_id"]},
+        {
+            "$set": {
+                "status": status,
+                "result": result,
+                "error": error,
+                "locked_until": None,
+                "finished_at": now,
+                "updated_at": now,
+            }
+        },
+    )
+
+
+def _requeue(job: ClaimedVerificationJob, delay: float) -> None:
+    """Put a claimed job back in the queue, due after delay; the claim doesn't count as an attempt."""
+    now = datetime.now(timezone.utc)
+    # Without its dedupe_key: a request made meanwhile may have queued the same work
+    verification_jobs_collection.update_one(
+        {"_id": job["_id"]},
+        {
+            "$set": {
+                "status": "queued",
+                "run_after": now + timedelta(seconds=delay),
+                "locked_until": None,
+                "started_at": None,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": -1},
+        },
+    )
+
+
+def run_job(job: ClaimedVerificationJob) -> None:
+    """Run a claimed job and store its outcome."""
+    started = time.monotonic()
+    if job.get("attempts", 1) > VERIFICATION_JOB_MAX_ATTEMPTS:
+        _finish(job, "failed", error="Verification was interrupted too many times")
+        logger.error(f"[JOBS] Job {job['_id']} abandoned after {job['attempts'] - 1} attempts")
+        return
+
+    try:
+        if job["kind"] == "document":
+            if not job["document_id"]:
+                raise ValueError("Document job has no document_id")
+            result = verify_document(job["document_id"])
+        else:
+            # Let document jobs queued at upload finish first and reuse their outcome,
+            # without holding a worker while they run (up to VERIFICATION_JOB_WAIT_SECONDS)
+            waited = datetime.now(timezone.utc).replace(tzinfo=None) - job["created_at"].replace(tzinfo=None)
+            if waited.total_seconds() < VERIFICATION_JOB_WAIT_SECONDS and _earlier_jobs_active(job):
+                _requeue(job, VERIFICATION_JOB_REQUEUE_SECONDS)
+                logger.info(f"[JOBS] Job {job['_id']} (session) requeued until earlier jobs of {job['session_id']} finish")
+                return
+            result = verify_session_documents(job["session_id"], reverify_rejected=False)
+    except Exception as e:
+        logger.error(f"[JOBS] Job {job['_id']} failed: {str(e)}")
+        _finish(job, "failed", error=str(e))
+        return
+
+    status = "succeeded" if result.get("success", False) else "failed"
+    _finish(job, status, result=result, error=None if status == "succeeded" else result.get("message"))
+    logger.info(f"[JOBS] Job {job['_id']} ({job['kind']}) {status} in {time.monotonic() - started:.1f}s")
+
+
+# ===== WORKER =====
+
+
+class VerificationWorker:
+    """Runs queued jobs from VERIFICATION_WORKERS asyncio tasks, each job on a thread."""
+
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake_event: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self) -> None:
+        """Start the workers in the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = wake_event = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(wake_event), name=f"verification-worker-{i}")
+            for i in range(VERIFICATION_WORKERS)
+        ]
+        logger.info(f"[JOBS] {VERIFICATION_WORKERS} verification workers started")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        logger.info("[JOBS] Verification workers stopped")
+
+    def wake(self) -> None:
+        """Check for queued jobs now (callable from any thread)."""
+        if self.running and self._loop is not None and self._wake_event is not None:
+            self._loop.call_soon_threadsafe(self._wake_event.set)
+
+    async def _run(self, wake_event: asyncio.Event) -> None:
+        while True:
+            # Cleared before claiming, so a job queued meanwhile is not missed
+            wake_event.clear()
+            try:
+                job = await asyncio.to_thread(claim_job)
+                if job is not None:
+                    await asyncio.to_thread(run_job, job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[JOBS] Worker error: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(wake_event.wait(), timeout=VERIFICATION_JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+
+worker = VerificationWorker()
+
+
+async def run_worker() -> None:
+    """Run the workers until interrupted (standalone worker process)."""
+    await worker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await worker.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass